@@ -3,6 +3,7 @@ from functools import lru_cache
 from bcn_client import BCNClient
 from managers.downloads import DownloadManager
 from managers.institutions import InstitutionManager
+from managers.listados import ListadosManager
 from managers.norms import NormsManager
 from managers.norms_types import TiposNormasManager
 from managers.metadata import MetadataManager
@@ -40,4 +41,9 @@ def get_download_logger() -> DownloadManager:
     
 @lru_cache
 def get_metadata_manager() -> MetadataManager:
-    return MetadataManager()
\ No newline at end of file
+    return MetadataManager()
+
+
+@lru_cache
+def get_listados_manager() -> ListadosManager:
+    return ListadosManager()
\ No newline at end of file
@@ -2,10 +2,13 @@ from datetime import date
 from typing import Literal, Optional
 from fastapi import APIRouter, Depends, Query, HTTPException
 from api.dependencies import get_client, get_parser, get_norm_manager
-from utils.norm_types import NormResponse
+from utils.norm_types import Norm, NormResponse
 
 router = APIRouter(prefix="/normas", tags=["normas"])
 
+# Desde cuántos IDs POST /normas/batch parsea en paralelo (parse_many)
+PARSE_MANY_MIN = 8
+
 
 @router.get("/stats")
 def get_stats(
@@ -102,7 +105,44 @@ def get_norma(
     if not norma:
         raise HTTPException(status_code=404, detail="Norma no encontrada")
     markdown, norm_data = parser.parse_from_string(norma)
-    return NormResponse(norma=norm_data, markdown=markdown)
+    return NormResponse(norma=norm_data.to_model(), markdown=markdown)
+
+
+@router.get("/{norma_id}/metadatos", response_model=Norm)
+def get_norma_metadatos(
+    norma_id: int,
+    client=Depends(get_client),
+    parser=Depends(get_parser),
+):
+    # Solo metadatos: el parser deja de leer al cerrar <Metadatos>
+    xml = client.get_norma_metadatos(norma_id, en_bytes=True)
+    if not xml:
+        raise HTTPException(status_code=404, detail="Norma no encontrada")
+    return parser.parse_metadata(xml).to_model()
+
+
+@router.get("/{norma_id}/articulos")
+def get_articulos(
+    norma_id: int,
+    tipo_parte: Optional[str] = Query(default=None, description="Ej: Artículo, Título"),
+    manager=Depends(get_norm_manager),
+):
+    articulos = manager.get_articulos(norma_id, tipo_parte=tipo_parte)
+    if not articulos:
+        raise HTTPException(status_code=404, detail="La norma no tiene índice de artículos")
+    return {"id_norma": norma_id, "articulos": articulos}
+
+
+@router.get("/{norma_id}/articulos/{articulo}")
+def get_articulo(
+    norma_id: int,
+    articulo: str,
+    manager=Depends(get_norm_manager),
+):
+    resultado = manager.get_articulo(norma_id, articulo)
+    if not resultado:
+        raise HTTPException(status_code=404, detail="Artículo no encontrado")
+    return {"id_norma": norma_id, **resultado}
 
 
 @router.post("/batch")
@@ -113,12 +153,19 @@ def get_normas_batch(
 ):
     if not normas_id:
         raise HTTPException(status_code=400, detail="No se proporcionaron IDs de normas")
-    normas = []
+    xmls = []
     for norma_id in normas_id:
-        norma = client.get_norma_completa(norma_id)
+        norma = client.get_norma_completa(norma_id, en_bytes=True)
         if not norma:
             raise HTTPException(status_code=404, detail=f"Norma {norma_id} no encontrada")
-        markdown, norm_data = parser.parse_from_string(norma)
-        normas.append({"norma": norm_data, "markdown": markdown})
+        xmls.append((norma_id, norma))
+
+    # Con pocos IDs no compensa levantar procesos: se parsea en el worker
+    procesos = None if len(xmls) >= PARSE_MANY_MIN else 1
+    normas = []
+    for norma_id, markdown, norm_data in parser.parse_many(xmls, procesos=procesos):
+        if markdown is None:
+            raise norm_data
+        normas.append(NormResponse(norma=norm_data.to_model(), markdown=markdown))
     return normas
     
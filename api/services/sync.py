@@ -10,6 +10,7 @@ from services.sync import SyncStats, sync_institucion
 from api.dependencies import (
     get_metadata_manager,
     get_download_logger,
+    get_listados_manager,
     get_norm_manager,
     get_tipos_manager,
 )
@@ -32,6 +33,7 @@ def sync_normas_institucion(normas: list, institucion_id: int) -> dict:
         "tipos":    get_tipos_manager(),
         "metadata": get_metadata_manager(),
         "logger":   get_download_logger(),
+        "listados": get_listados_manager(),
     }
 
     # La API no tiene límite propio — lo debe aplicar el router antes de llamar aquí
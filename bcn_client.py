@@ -1,21 +1,59 @@
+import asyncio
 import hashlib
 import logging
+import os
+import re
+import threading
 import time
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+import httpx
 import requests
 from requests.adapters import HTTPAdapter
 from requests.sessions import Request
 from urllib3.util.retry import Retry
 
+from utils.cache import CacheBackend, CacheIndex, a_texto, make_backend
+from utils.circuit_breaker import CircuitBreaker, CircuitoAbierto
+from utils.file_lock import FileLock
+from utils.rate_budget import presupuesto_del_nodo
+from utils.rate_limit import RateLimiter, parse_retry_after
+
 logger = logging.getLogger(__name__)
 
 
-class BCNClient:
-    """Cliente para la API de BCN."""
+# idNorma dentro de una URL de la BCN (listados y claves de caché)
+ID_NORMA_RE = re.compile(r"idNorma=(\d+)")
+
+
+class _NoModificada:
+    """Marcador para una revalidación respondida con 304: el XML en caché sigue vigente."""
+
+    def __repr__(self) -> str:
+        return "NO_MODIFICADA"
+
+
+NO_MODIFICADA = _NoModificada()
+
+
+class ListadoIncompleto(Exception):
+    """El listado de una institución se cortó a mitad de lectura (red o XML truncado)."""
+
+    def __init__(self, id_institucion: int, leidas: int, causa: Exception):
+        self.id_institucion = id_institucion
+        self.leidas = leidas
+        super().__init__(
+            f"Listado de la institución {id_institucion} incompleto "
+            f"tras {leidas} normas: {causa}"
+        )
+
+
+class _BaseBCNClient:
+    """Lógica compartida por BCNClient y AsyncBCNClient: URLs, caché y parseo de listados."""
 
     # URLs base de los servicios
     BASE_URL = "https://www.leychile.cl"
@@ -27,34 +65,433 @@ class BCNClient:
         "normas_institucion": "/Consulta/obtxml?opt=6&idCategoria={}&down=True",  # Por institución
     }
 
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+        "Accept": "application/xml, text/xml, */*",
+        "Accept-Language": "es-CL,es;q=0.9",
+        "Referer": "https://www.leychile.cl/",
+    }
+
+    # Respuestas que se reintentan con backoff
+    RETRY_STATUS = [429, 500, 502, 503, 504]
+
+    # TTL del caché por endpoint, en segundos. Los listados cambian cada vez
+    # que la BCN publica una norma; el XML de una norma y sus metadatos, rara vez.
+    CACHE_TTL = {
+        "normas_institucion": 6 * 3600,
+        "norma_completa": 30 * 86400,
+        "metadatos": 30 * 86400,
+    }
+
+    # Presupuesto del caché en disco (BCN_CACHE_MAX_MB, 0 = sin límite)
+    CACHE_MAX_MB = 2048
+
+    # Cada cuántas escrituras se revisa si hay que desalojar entradas
+    EVICT_CHECK_EVERY = 50
+
+    # Espera máxima por el lock de descarga de otro proceso antes de ir igual a la BCN
+    LOCK_TIMEOUT = 120
+
     def __init__(
         self,
         cache_dir: str = "data/cache",
         rate_limit_delay: float = 0.5,
         timeout: int = 30,
         max_retries: int = 3,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache_ttl: Optional[Dict[str, float]] = None,
+        cache_max_bytes: Optional[int] = None,
+        cache_backend: Optional[CacheBackend] = None,
+        base_url: Optional[str] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
     ):
+        # BCN_BASE_URL permite apuntar a un servidor local (tests/bcn_stub.py)
+        self.BASE_URL = (base_url or os.getenv("BCN_BASE_URL") or self.BASE_URL).rstrip("/")
+
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_index = CacheIndex(self.cache_dir)
+        # Dónde se guarda el contenido: archivos sueltos o packs (BCN_CACHE_BACKEND)
+        self.cache = cache_backend or make_backend(self.cache_dir)
+
+        self.cache_ttl = {**self.CACHE_TTL, **(cache_ttl or {})}
+        if cache_max_bytes is None:
+            max_mb = int(os.getenv("BCN_CACHE_MAX_MB", self.CACHE_MAX_MB))
+            cache_max_bytes = max_mb * 1024 * 1024
+        self.cache_max_bytes = cache_max_bytes
+        self._escrituras = 0
 
-        self.rate_limit_delay = rate_limit_delay
         self.timeout = timeout
-        self.last_request_time = 0
+        self.max_retries = max_retries
+
+        # Sin limitador explícito se mantiene el espaciado fijo de rate_limit_delay
+        self.rate_limit_delay = rate_limit_delay
+        self.rate_limiter = rate_limiter or RateLimiter(delay=rate_limit_delay)
+        # Con BCN_RATE_TOTAL todos los procesos del nodo comparten la tasa
+        if self.rate_limiter.presupuesto is None:
+            self.rate_limiter.presupuesto = presupuesto_del_nodo(self.cache_dir)
+
+        # Con la BCN caída las requests fallan al instante (CircuitoAbierto)
+        # en vez de agotar timeouts norma por norma
+        self.breaker = circuit_breaker or CircuitBreaker()
+
+    def _feedback(
+        self, status: Optional[int], latencia: float, retry_after: Optional[float] = None
+    ) -> None:
+        """Informa una respuesta (o su ausencia) al rate limiter y al circuit breaker."""
+        self.rate_limiter.feedback(status, latencia, retry_after)
+        if status is None or status >= 500:
+            self.breaker.registrar_falla()
+        else:
+            self.breaker.registrar_exito()
+
+    def _read_cache(
+        self, cache_key: str, endpoint: Optional[str] = None
+    ) -> Optional[bytes]:
+        """
+        Devuelve el XML en caché, o None si no existe o ya venció el TTL del
+        endpoint. Sin endpoint no se aplica TTL.
+        """
+        entrada = self.cache_index.get(cache_key)
+        if entrada is None:
+            stat = self.cache.stat(cache_key)
+            if stat is None:
+                return None
+            # Entrada anterior al índice: se registra con su fecha de escritura
+            tamano, guardado_en = stat
+            self.cache_index.save(
+                cache_key, tipo=endpoint, tamano=tamano, guardado_en=guardado_en
+            )
+            entrada = {"validado_en": guardado_en}
+
+        ttl = self.cache_ttl.get(endpoint) if endpoint else None
+        if ttl is not None and time.time() - entrada["validado_en"] > ttl:
+            logger.debug(f"Cache EXPIRED: {cache_key}")
+            return None
+
+        content = self.cache.get_bytes(cache_key)
+        if content is None:
+            return None
+
+        self.cache_index.mark_access(cache_key)
+        logger.debug(f"Cache HIT: {cache_key}")
+        return content
+
+    def _write_cache(
+        self, cache_key: str, content: bytes, headers=None, endpoint: Optional[str] = None
+    ):
+        tamano = self.cache.put(cache_key, content)
+
+        # Validadores para revalidar después con un GET condicional, y el md5
+        # que NormsManager.save reutiliza en vez de volver a hashear el XML
+        headers = headers or {}
+        self.cache_index.save(
+            cache_key,
+            tipo=endpoint,
+            tamano=tamano,
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+            hash=hashlib.md5(content).hexdigest(),
+        )
+        logger.debug(f"Cache WRITE: {cache_key}")
+
+        self._escrituras += 1
+        if self.cache_max_bytes and self._escrituras % self.EVICT_CHECK_EVERY == 0:
+            self._evict_lru()
+
+    def _evict_lru(self) -> int:
+        """
+        Si el caché supera cache_max_bytes, elimina las entradas usadas hace
+        más tiempo hasta quedar en el 90% del presupuesto (así no se desaloja
+        en cada escritura). Devuelve la cantidad de entradas eliminadas.
+        """
+        total = self.cache_index.total_bytes()
+        if total <= self.cache_max_bytes:
+            return 0
+
+        claves = self.cache_index.lru_candidates(total - int(self.cache_max_bytes * 0.9))
+        self.cache.delete(claves)
+        self.cache_index.delete(claves)
+
+        logger.info(f"Caché sobre el límite: {len(claves)} entradas desalojadas (LRU)")
+        return len(claves)
+
+    def _conditional_headers(self, cache_key: str) -> Dict[str, str]:
+        """
+        Headers If-None-Match / If-Modified-Since para revalidar una entrada.
+        Vacío si no hay XML en caché o la BCN no entregó validadores.
+        """
+        if not self.cache.exists(cache_key):
+            return {}
+
+        entrada = self.cache_index.get(cache_key)
+        if not entrada:
+            return {}
+
+        headers = {}
+        if entrada["etag"]:
+            headers["If-None-Match"] = entrada["etag"]
+        if entrada["last_modified"]:
+            headers["If-Modified-Since"] = entrada["last_modified"]
+        return headers
+
+    def _fetch_lock(self, cache_key: str) -> FileLock:
+        """
+        Lock entre procesos para descargar `cache_key` (single-flight). Se
+        reparte en 4096 archivos por prefijo de hash para no crear uno por URL.
+        """
+        prefijo = hashlib.md5(cache_key.encode()).hexdigest()[:3]
+        return FileLock(self.cache_dir / "locks" / f"{prefijo}.lock", timeout=self.LOCK_TIMEOUT)
+
+    def _resultado_reciente(self, cache_key: str, desde: float, revalidar: bool):
+        """
+        Si otro proceso descargó o revalidó la clave mientras se esperaba el
+        lock, devuelve ese resultado en vez de volver a la BCN. None si no.
+        """
+        entrada = self.cache_index.get(cache_key)
+        if not entrada or entrada["validado_en"] < desde:
+            return None
+
+        if revalidar and entrada["guardado_en"] < desde:
+            # Solo se revalidó (304): para el llamador la norma no cambió
+            return NO_MODIFICADA
+
+        return self.cache.get_bytes(cache_key)
+
+    @staticmethod
+    def _salida(content, en_bytes: bool):
+        """Los métodos públicos devuelven str salvo que se pidan los bytes crudos."""
+        if en_bytes or not isinstance(content, bytes):
+            return content
+        return a_texto(content)
+
+    def hash_norma(self, id_norma: int) -> Optional[str]:
+        """
+        md5 del XML completo de la norma, calculado al descargarlo. None si la
+        entrada es anterior al índice de hashes o no está en caché.
+        """
+        url = self.BASE_URL + self.ENDPOINTS["norma_completa"].format(id_norma)
+        entrada = self.cache_index.get(url)
+        return entrada["hash"] if entrada else None
+
+    def invalidar_metadatos(self, ids_normas: Iterable[int]) -> int:
+        """
+        Quita del caché los metadatos de las normas (contenido y validadores):
+        la próxima consulta va a la BCN sin GET condicional y no puede
+        terminar en un 304. Devuelve la cantidad de normas invalidadas.
+        """
+        claves = [
+            self.BASE_URL + self.ENDPOINTS["metadatos"].format(nid) for nid in ids_normas
+        ]
+        if claves:
+            self.cache.delete(claves)
+            self.cache_index.delete(claves)
+        return len(claves)
+
+    def get_norma_en_cache(
+        self, id_norma: int, en_bytes: bool = False
+    ) -> Optional[Union[str, bytes]]:
+        """XML completo de la norma si está en caché (sin TTL ni red), o None."""
+        url = self.BASE_URL + self.ENDPOINTS["norma_completa"].format(id_norma)
+        content = self.cache.get_bytes(url)
+        return None if content is None else self._salida(content, en_bytes)
+
+    @staticmethod
+    def _norma_desde_elem(norma_elem: ET.Element) -> Dict:
+        """
+        Convierte un <NORMA> del listado (opt=6) en el dict que usa el resto
+        del sistema. hash_entrada es el md5 del <NORMA> completo: el sync
+        incremental lo compara contra el del último listado.
+        """
+        # Sin el tail: en streaming puede no haber llegado todavía
+        tail, norma_elem.tail = norma_elem.tail, None
+        hash_entrada = hashlib.md5(ET.tostring(norma_elem)).hexdigest()
+        norma_elem.tail = tail
+
+        # Extraer idNorma del URL (formato: ...?idNorma=12345)
+        url_norma = norma_elem.findtext("URL", "")
+        match = ID_NORMA_RE.search(url_norma)
+        id_norma = int(match.group(1)) if match else None
+
+        # Extraer tipo y número desde TIPOS_NUMEROS
+        tipo_numero_elem = norma_elem.find(".//TIPO_NUMERO")
+        numero = None
+        abreviatura = None
+        tipo_norma = None
+        id_tipo_norma = None  # Codigo de la bcn
+
+        if tipo_numero_elem is not None:
+            numero = tipo_numero_elem.findtext("NUMERO")
+            abreviatura = tipo_numero_elem.findtext("ABREVIACION")
+            tipo_norma = tipo_numero_elem.findtext("DESCRIPCION")
+            id_tipo_norma = tipo_numero_elem.findtext("TIPO")
+            # remover formato (ej:XX13->13) si existe
+            if id_tipo_norma:
+                id_tipo_norma = int(id_tipo_norma.strip("X"))
+
+        # Extraer organismos (estan separados por ,)
+        organismos = []
+        for org in norma_elem.findall(".//ORGANISMO"):
+            if org.text and org.text.find(",") != -1:
+                organismos.extend(o.strip() for o in org.text.split(","))
+            else:
+                organismos.append(org.text)
+
+        return {
+            "id": id_norma,
+            "tipo": tipo_norma,
+            "id_tipo": id_tipo_norma,  # Desde TIPO_NUMEROS -> TIPO aka id tipo
+            "numero": numero,  # Numero de la norma (ej: Decreto 179, Ley 21517)
+            "abreviatura": abreviatura,
+            "titulo": norma_elem.findtext("TITULO", "").strip(),
+            "materia": norma_elem.findtext("MATERIA", "").strip(),
+            "fecha_promulgacion": norma_elem.findtext("FECHA_PROMULGACION"),
+            "fecha_publicacion": norma_elem.findtext("FECHA_PUBLICACION"),
+            "organismos": organismos,
+            "url": url_norma,
+            "hash_entrada": hash_entrada,
+        }
+
+    def _iter_normas_xml(self, chunks: Iterable) -> Iterator[Dict]:
+        """
+        Parsea incrementalmente un listado opt=6 a partir de trozos (str o
+        bytes) y entrega cada norma apenas se cierra su <NORMA>. Los elementos
+        ya procesados se descartan, así que la memoria no crece con el listado.
+
+        Lanza ET.ParseError si el XML está mal formado.
+        """
+        # El XML tiene estructura: <NORMAS_CONVENIO><NORMA>...</NORMA></NORMAS_CONVENIO>
+        parser = ET.XMLPullParser(events=("start", "end"))
+        root = None
+
+        def listas() -> Iterator[Dict]:
+            nonlocal root
+            for evento, elem in parser.read_events():
+                if evento == "start":
+                    if root is None:
+                        root = elem
+                    continue
+                if elem.tag != "NORMA":
+                    continue
+
+                norma = self._norma_desde_elem(elem)
+                # Soltar el subárbol ya leído (el root guarda referencia a sus hijos)
+                elem.clear()
+                root.clear()
+
+                # Solo entregar si tiene ID válido
+                if norma["id"]:
+                    yield norma
+                else:
+                    logger.warning(f"Norma sin ID válido: {norma['titulo'][:50]}")
+
+        for chunk in chunks:
+            parser.feed(chunk)
+            yield from listas()
+        parser.close()
+        yield from listas()
+
+    def _parse_normas_institucion(
+        self, id_institucion: int, xml_content: bytes
+    ) -> Optional[List[Dict]]:
+        try:
+            normas = list(self._iter_normas_xml([xml_content]))
+        except ET.ParseError as e:
+            logger.error(f"Error parseando XML: {e}")
+            return None
+
+        logger.info(f"Institución {id_institucion}: {len(normas)} normas encontradas")
+        return normas
+
+    def get_cache_stats(self) -> Dict:
+        # Se lee del índice: recorrer el directorio con stat() por archivo no
+        # escala a cientos de miles de entradas.
+        stats = self.cache_index.stats()
+
+        return {
+            "total_archivos": stats["total_archivos"],
+            "tamano_total_mb": stats["total_bytes"] / (1024 * 1024),
+            "limite_mb": (
+                self.cache_max_bytes / (1024 * 1024) if self.cache_max_bytes else None
+            ),
+            "por_tipo": stats["por_tipo"],
+            "backend": self.cache.nombre,
+            **self.cache.stats(),
+            "directorio": str(self.cache_dir),
+        }
+
+    def clear_cache(self):
+        total = self.cache_index.stats()["total_archivos"]
+        self.cache.clear()
+        self.cache_index.clear()
+        logger.info(f"Caché limpiado: {total} entradas eliminadas")
+
+    def compact_cache(self) -> Dict:
+        """Recupera el espacio de entradas reemplazadas o desalojadas (backend pack)."""
+        return self.cache.compact()
+
+    def iter_normas_en_cache(
+        self, en_bytes: bool = False
+    ) -> Iterator[Tuple[int, Union[str, bytes]]]:
+        """
+        Recorre (id_norma, xml) de todas las normas completas en caché, para
+        reprocesar sin volver a la BCN. El orden lo decide el backend.
+        """
+        claves = self.cache_index.keys("norma_completa")
+        for clave, xml in self.cache.iter_items(claves, en_bytes=en_bytes):
+            match = ID_NORMA_RE.search(clave)
+            if match:
+                yield int(match.group(1)), xml
+
+
+class BCNClient(_BaseBCNClient):
+    """Cliente para la API de BCN."""
+
+    def __init__(
+        self,
+        cache_dir: str = "data/cache",
+        rate_limit_delay: float = 0.5,
+        timeout: int = 30,
+        max_retries: int = 3,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache_ttl: Optional[Dict[str, float]] = None,
+        cache_max_bytes: Optional[int] = None,
+        cache_backend: Optional[CacheBackend] = None,
+        base_url: Optional[str] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        propagar_circuito: bool = False,
+    ):
+        super().__init__(
+            cache_dir=cache_dir,
+            rate_limit_delay=rate_limit_delay,
+            timeout=timeout,
+            max_retries=max_retries,
+            rate_limiter=rate_limiter,
+            cache_ttl=cache_ttl,
+            cache_max_bytes=cache_max_bytes,
+            cache_backend=cache_backend,
+            base_url=base_url,
+            circuit_breaker=circuit_breaker,
+        )
 
         self.session = self._create_session(max_retries)
+        # Con el circuito abierto las requests devuelven None como cualquier
+        # otra falla; sync y refresh piden la excepción para pausar o abortar
+        self.propagar_circuito = propagar_circuito
 
         logger.info(f"BCN Client inicializado (cache={self.cache_dir})")
 
     def _create_session(self, max_retries: int) -> requests.Session:
         session = requests.Session()
 
+        # urllib3 solo reintenta errores de conexión. Los 429/5xx se reintentan
+        # en _make_request para que el rate limiter vea cada respuesta.
         retry_strategy = Retry(
             total=max_retries,
             connect=max_retries,
             read=max_retries,
-            status=max_retries,
+            status=0,
             backoff_factor=0.5,
-            status_forcelist=[429, 500, 502, 503, 504],
             allowed_methods=["GET", "POST"],
             respect_retry_after_header=False,
         )
@@ -63,80 +500,146 @@ class BCNClient:
         session.mount("https://", adapter)
         session.mount("http://", adapter)
 
-        session.headers.update(
-            {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "Accept": "application/xml, text/xml, */*",
-                "Accept-Language": "es-CL,es;q=0.9",
-                "Referer": "https://www.leychile.cl/",
-            }
-        )
+        session.headers.update(self.HEADERS)
 
         return session
 
     def _rate_limit(self):
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.rate_limit_delay:
-            time.sleep(self.rate_limit_delay - elapsed)
-        self.last_request_time = time.time()
-
-    def _get_cache_path(self, cache_key: str) -> Path:
-        hash_key = hashlib.md5(cache_key.encode()).hexdigest()
-        return self.cache_dir / f"{hash_key}.xml"
-
-    def _read_cache(self, cache_key: str) -> Optional[str]:
-        cache_path = self._get_cache_path(cache_key)
-
-        if cache_path.exists():
-            logger.debug(f"Cache HIT: {cache_key}")
-            return cache_path.read_text(encoding="utf-8")
-
-        return None
-
-    def _write_cache(self, cache_key: str, content: str):
-        cache_path = self._get_cache_path(cache_key)
-        cache_path.write_text(content, encoding="utf-8")
-        logger.debug(f"Cache WRITE: {cache_key}")
+        self.rate_limiter.acquire()
 
     def _make_request(
-        self, url: str, use_cache: bool = True, cache_key: Optional[str] = None
-    ) -> Optional[str]:
+        self,
+        url: str,
+        use_cache: bool = True,
+        cache_key: Optional[str] = None,
+        revalidar: bool = False,
+        endpoint: Optional[str] = None,
+    ):
+        """
+        GET con caché. Con revalidar=True no se confía en la copia local: se
+        envía un GET condicional y, si la BCN responde 304, se devuelve
+        NO_MODIFICADA en vez del XML.
+
+        `endpoint` (clave de ENDPOINTS) define el TTL de la entrada. Una
+        entrada vencida se renueva también con un GET condicional, así que
+        si no cambió basta un 304 para volver a usarla.
+
+        Ante un miss se toma un lock por clave compartido entre procesos: si
+        otro proceso ya está descargando la misma URL se espera su resultado
+        en vez de repetir la request.
+
+        Con el circuit breaker abierto devuelve None, salvo con
+        propagar_circuito=True, donde se lanza CircuitoAbierto.
+        """
+        try:
+            return self._request_con_cache(url, use_cache, cache_key, revalidar, endpoint)
+        except CircuitoAbierto as e:
+            if self.propagar_circuito:
+                raise
+            logger.error(f"{e}: {url}")
+            return None
+
+    def _request_con_cache(
+        self,
+        url: str,
+        use_cache: bool,
+        cache_key: Optional[str],
+        revalidar: bool,
+        endpoint: Optional[str],
+    ):
         cache_key = cache_key or url
 
-        if use_cache:
-            cached = self._read_cache(cache_key)
+        if not use_cache:
+            return self._fetch(url, cache_key, {}, revalidar, endpoint, use_cache=False)
+
+        if not revalidar:
+            cached = self._read_cache(cache_key, endpoint=endpoint)
             if cached:
                 return cached
 
-        self._rate_limit()
+        desde = time.time()
+        lock = self._fetch_lock(cache_key)
+        if not lock.acquire():
+            logger.warning(f"Lock de descarga agotado, se descarga igual: {cache_key}")
 
         try:
-            logger.info(f"Request: {url}")
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
+            reciente = self._resultado_reciente(cache_key, desde, revalidar)
+            if reciente is not None:
+                logger.debug(f"Cache HIT (descargado por otro proceso): {cache_key}")
+                return reciente
 
-            content = response.text
+            headers = self._conditional_headers(cache_key)
+            return self._fetch(url, cache_key, headers, revalidar, endpoint)
+        finally:
+            lock.release()
 
-            if use_cache:
-                self._write_cache(cache_key, content)
+    def _fetch(
+        self,
+        url: str,
+        cache_key: str,
+        headers: Dict[str, str],
+        revalidar: bool,
+        endpoint: Optional[str],
+        use_cache: bool = True,
+    ):
+        """GET a la BCN con reintentos; guarda la respuesta en caché."""
+        for intento in range(self.max_retries + 1):
+            self.breaker.esperar_turno()
+            self._rate_limit()
+            inicio = time.monotonic()
 
-            return content
+            try:
+                logger.info(f"Request: {url}")
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
 
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTP error {e.response.status_code}: {url}")
-            return None
+                self._feedback(
+                    response.status_code,
+                    time.monotonic() - inicio,
+                    parse_retry_after(response.headers.get("Retry-After")),
+                )
 
-        except requests.exceptions.Timeout:
-            logger.error(f"Request timed out: {url}")
-            return None
+                # El backoff lo aplica el limitador en el próximo _rate_limit()
+                if (
+                    response.status_code in self.RETRY_STATUS
+                    and intento < self.max_retries
+                ):
+                    continue
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request fallo: {url} - {e}")
-            return None
+                if response.status_code == 304:
+                    self.cache_index.touch(cache_key)
+                    logger.debug(f"Cache REVALIDADO (304): {cache_key}")
+                    return NO_MODIFICADA if revalidar else self._read_cache(cache_key)
 
-        except Exception as e:
-            logger.error(f"Error inesperado: {url} - {e}")
-            return None
+                response.raise_for_status()
+
+                content = response.content
+
+                if use_cache:
+                    self._write_cache(cache_key, content, response.headers, endpoint)
+
+                return content
+
+            except requests.exceptions.HTTPError as e:
+                logger.error(f"HTTP error {e.response.status_code}: {url}")
+                return None
+
+            except requests.exceptions.Timeout:
+                self._feedback(None, time.monotonic() - inicio)
+                if intento < self.max_retries:
+                    continue
+                logger.error(f"Request timed out: {url}")
+                return None
+
+            except requests.exceptions.RequestException as e:
+                self._feedback(None, time.monotonic() - inicio)
+                logger.error(f"Request fallo: {url} - {e}")
+                return None
+
+            except Exception as e:
+                logger.error(f"Error inesperado: {url} - {e}")
+                return None
+
+        return None
 
     def get_normas_por_institucion(
         self, id_institucion: int, use_cache: bool = True
@@ -145,95 +648,157 @@ class BCNClient:
             id_institucion
         )
 
-        xml_content = self._make_request(url, use_cache=use_cache)
+        xml_content = self._make_request(
+            url, use_cache=use_cache, endpoint="normas_institucion"
+        )
 
         if not xml_content:
             return None
 
+        return self._parse_normas_institucion(id_institucion, xml_content)
+
+    def iter_normas_institucion(
+        self, id_institucion: int, use_cache: bool = True
+    ) -> Iterator[Dict]:
+        """
+        Versión en streaming de get_normas_por_institucion: entrega cada norma
+        del listado a medida que llega el cuerpo HTTP (o se lee del caché),
+        sin cargar el XML completo ni construir el árbol entero.
+
+        El listado se guarda en caché solo si se leyó completo. Si la
+        conexión se corta o el XML viene mal formado a mitad de lectura se
+        lanza ListadoIncompleto después de entregar las normas ya leídas:
+        quien consume no debe tomar lo recibido como el listado completo.
+        """
+        endpoint = "normas_institucion"
+        url = self.BASE_URL + self.ENDPOINTS[endpoint].format(id_institucion)
+        response = None
+        recibido = None  # bytes leídos de la red, para cachear al terminar
+        total = 0
+
         try:
-            root = ET.fromstring(xml_content)
-            normas = []
-
-            # El XML tiene estructura: <NORMAS_CONVENIO><NORMA>...</NORMA></NORMAS_CONVENIO>
-            for norma_elem in root.findall(".//NORMA"):
-                # Extraer ID de la norma desde la URL
-                url_norma = norma_elem.findtext("URL", "")
-                id_norma = None
-
-                # Extraer idNorma del URL (formato: ...?idNorma=12345)
-                import re
-
-                match = re.search(r"idNorma=(\d+)", url_norma)
-                if match:
-                    id_norma = int(match.group(1))
-
-                # Extraer tipo y número desde TIPOS_NUMEROS
-                tipo_numero_elem = norma_elem.find(".//TIPO_NUMERO")
-                numero = None
-                abreviatura = None
-                tipo_norma = None
-                id_tipo_norma = None  # Codigo de la bcn
-
-                if tipo_numero_elem is not None:
-                    numero = tipo_numero_elem.findtext("NUMERO")
-                    abreviatura = tipo_numero_elem.findtext("ABREVIACION")
-                    tipo_norma = tipo_numero_elem.findtext("DESCRIPCION")
-                    id_tipo_norma = tipo_numero_elem.findtext("TIPO")
-                    # remover formato (ej:XX13->13) si existe
-                    if id_tipo_norma:
-                        id_tipo_norma = int(id_tipo_norma.strip("X"))
-
-                # Extraer organismos (estan separados por ,)
-                organismos = []
-                for org in norma_elem.findall(".//ORGANISMO"):
-                    if org.text and org.text.find(",") != -1:
-                        orgs = org.text.split(",")
-                        # remover espacios en blanco
-                        orgs = [org.strip() for org in orgs]
-                        organismos.extend(orgs)
-                    else:
-                        organismos.append(org.text)
-
-                norma = {
-                    "id": id_norma,
-                    "tipo": tipo_norma,
-                    "id_tipo": id_tipo_norma,  # Desde TIPO_NUMEROS -> TIPO aka id tipo
-                    "numero": numero,  # Numero de la norma (ej: Decreto 179, Ley 21517)
-                    "abreviatura": abreviatura,
-                    "titulo": norma_elem.findtext("TITULO", "").strip(),
-                    "materia": norma_elem.findtext("MATERIA", "").strip(),
-                    "fecha_promulgacion": norma_elem.findtext("FECHA_PROMULGACION"),
-                    "fecha_publicacion": norma_elem.findtext("FECHA_PUBLICACION"),
-                    "organismos": organismos,
-                    "url": url_norma,
-                }
-
-                # Solo agregar si tiene ID válido
-                if norma["id"]:
-                    normas.append(norma)
+            cached = self._read_cache(url, endpoint=endpoint) if use_cache else None
+
+            if cached:
+                chunks = [cached]
+            else:
+                headers = self._conditional_headers(url) if use_cache else {}
+                response = self._open_stream(url, headers)
+                if response is None:
+                    return
+
+                if response.status_code == 304:
+                    self.cache_index.touch(url)
+                    cached = self._read_cache(url)
+                    chunks = [cached] if cached else []
                 else:
-                    logger.warning(f"Norma sin ID válido: {norma['titulo'][:50]}")
+                    recibido = []
+
+                    def leer() -> Iterator[bytes]:
+                        for chunk in response.iter_content(chunk_size=64 * 1024):
+                            recibido.append(chunk)
+                            yield chunk
+
+                    chunks = leer()
+
+            for norma in self._iter_normas_xml(chunks):
+                total += 1
+                yield norma
+
+            logger.info(f"Institución {id_institucion}: {total} normas encontradas")
+
+            if use_cache and recibido is not None:
+                self._write_cache(url, b"".join(recibido), response.headers, endpoint)
+
+        except (ET.ParseError, requests.exceptions.RequestException) as e:
+            logger.error(f"Listado incompleto: {url} - {e}")
+            raise ListadoIncompleto(id_institucion, total, e) from e
+        finally:
+            if response is not None:
+                response.close()
+
+    def _open_stream(
+        self, url: str, headers: Dict[str, str]
+    ) -> Optional[requests.Response]:
+        """
+        Abre un GET en streaming con los mismos reintentos y feedback al rate
+        limiter que _fetch. Devuelve la respuesta con el cuerpo sin leer
+        (200 o 304), o None si falló.
+        """
+        for intento in range(self.max_retries + 1):
+            self.breaker.esperar_turno()
+            self._rate_limit()
+            inicio = time.monotonic()
 
-            logger.info(
-                f"Institución {id_institucion}: {len(normas)} normas encontradas"
-            )
-            return normas
+            try:
+                logger.info(f"Request (stream): {url}")
+                response = self.session.get(
+                    url, headers=headers, timeout=self.timeout, stream=True
+                )
+
+                self._feedback(
+                    response.status_code,
+                    time.monotonic() - inicio,
+                    parse_retry_after(response.headers.get("Retry-After")),
+                )
+
+                if response.status_code in self.RETRY_STATUS and intento < self.max_retries:
+                    response.close()
+                    continue
+
+                if response.status_code != 304 and not response.ok:
+                    logger.error(f"HTTP error {response.status_code}: {url}")
+                    response.close()
+                    return None
+
+                return response
+
+            except requests.exceptions.Timeout:
+                self._feedback(None, time.monotonic() - inicio)
+                if intento < self.max_retries:
+                    continue
+                logger.error(f"Request timed out: {url}")
+                return None
+
+            except requests.exceptions.RequestException as e:
+                self._feedback(None, time.monotonic() - inicio)
+                logger.error(f"Request fallo: {url} - {e}")
+                return None
 
-        except ET.ParseError as e:
-            logger.error(f"Error parseando XML: {e}")
-            return None
+        return None
 
     def get_norma_metadatos(
-        self, id_norma: int, use_cache: bool = True
-    ) -> Optional[str]:
+        self,
+        id_norma: int,
+        use_cache: bool = True,
+        revalidar: bool = False,
+        en_bytes: bool = False,
+    ) -> Optional[Union[str, bytes]]:
         url = self.BASE_URL + self.ENDPOINTS["metadatos"].format(id_norma)
-        return self._make_request(url, use_cache=use_cache)
+        content = self._make_request(
+            url, use_cache=use_cache, revalidar=revalidar, endpoint="metadatos"
+        )
+        return self._salida(content, en_bytes)
 
     def get_norma_completa(
-        self, id_norma: int, use_cache: bool = True
-    ) -> Optional[str]:
+        self,
+        id_norma: int,
+        use_cache: bool = True,
+        revalidar: bool = False,
+        en_bytes: bool = False,
+    ) -> Optional[Union[str, bytes]]:
+        """
+        XML completo de una norma. Con revalidar=True devuelve NO_MODIFICADA
+        si la BCN confirma (304) que la copia en caché sigue vigente.
+
+        Con en_bytes=True se entregan los bytes tal como llegaron de la BCN,
+        sin decodificar: el parser y NormsManager.save los aceptan directo.
+        """
         url = self.BASE_URL + self.ENDPOINTS["norma_completa"].format(id_norma)
-        return self._make_request(url, use_cache=use_cache)
+        content = self._make_request(
+            url, use_cache=use_cache, revalidar=revalidar, endpoint="norma_completa"
+        )
+        return self._salida(content, en_bytes)
 
     def download_normas_institucion(
         self,
@@ -313,22 +878,431 @@ class BCNClient:
 
         return stats
 
-    def get_cache_stats(self) -> Dict:
-        cache_files = list(self.cache_dir.glob("*.xml"))
-        total_size = sum(f.stat().st_size for f in cache_files)
-
-        return {
-            "total_archivos": len(cache_files),
-            "tamano_total_mb": total_size / (1024 * 1024),
-            "directorio": str(self.cache_dir),
-        }
-
-    def clear_cache(self):
-        cache_files = list(self.cache_dir.glob("*.xml"))
-        for f in cache_files:
-            f.unlink()
-        logger.info(f"Caché limpiado: {len(cache_files)} archivos eliminados")
-
     def close(self):
         self.session.close()
+        self.cache.close()
+        self.cache_index.close()
         logger.info("BCN Client cerrado")
+
+
+class AsyncBCNClient(_BaseBCNClient):
+    """
+    Cliente asíncrono para la API de BCN.
+
+    Mantiene un pool de conexiones keep-alive y permite varias requests en
+    vuelo a la vez (hasta max_concurrencia). El presupuesto de tasa es
+    compartido: las requests se inician según el rate_limiter (por defecto
+    separadas por rate_limit_delay), pero la latencia de cada una se solapa
+    con la de las demás.
+
+    Uso:
+        async with AsyncBCNClient(max_concurrencia=8) as client:
+            xmls = await client.get_normas_completas([206396, 10542])
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "data/cache",
+        rate_limit_delay: float = 0.5,
+        timeout: int = 30,
+        max_retries: int = 3,
+        max_concurrencia: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache_ttl: Optional[Dict[str, float]] = None,
+        cache_max_bytes: Optional[int] = None,
+        cache_backend: Optional[CacheBackend] = None,
+        base_url: Optional[str] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        propagar_circuito: bool = False,
+    ):
+        super().__init__(
+            cache_dir=cache_dir,
+            rate_limit_delay=rate_limit_delay,
+            timeout=timeout,
+            max_retries=max_retries,
+            rate_limiter=rate_limiter,
+            cache_ttl=cache_ttl,
+            cache_max_bytes=cache_max_bytes,
+            cache_backend=cache_backend,
+            base_url=base_url,
+            circuit_breaker=circuit_breaker,
+        )
+
+        self.max_concurrencia = max_concurrencia
+        self._semaforo = asyncio.Semaphore(max_concurrencia)
+        # Igual que en BCNClient: None por norma salvo que se pida la excepción
+        self.propagar_circuito = propagar_circuito
+
+        # El caché (SQLite, archivos, packs) es E/S bloqueante: corre en
+        # threads propios para no frenar las demás requests en vuelo.
+        # aclose() espera a que terminen antes de cerrar el caché.
+        self._io = ThreadPoolExecutor(
+            max_workers=max_concurrencia, thread_name_prefix="bcn-cache"
+        )
+
+        self.session = httpx.AsyncClient(
+            headers=self.HEADERS,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=max_concurrencia,
+                max_keepalive_connections=max_concurrencia,
+            ),
+            # Reintentos de conexión; los de estado HTTP se manejan en _make_request
+            transport=httpx.AsyncHTTPTransport(retries=max_retries),
+        )
+
+        logger.info(
+            f"BCN Async Client inicializado "
+            f"(cache={self.cache_dir}, concurrencia={max_concurrencia})"
+        )
+
+    async def __aenter__(self) -> "AsyncBCNClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def _rate_limit(self):
+        # El limitador reserva turnos sin bloquear: las requests quedan
+        # espaciadas sin serializar su tiempo de respuesta.
+        await self.rate_limiter.acquire_async()
+
+    async def _en_thread(self, funcion, *args):
+        """Ejecuta E/S bloqueante del caché fuera del event loop."""
+        return await asyncio.get_running_loop().run_in_executor(self._io, funcion, *args)
+
+    async def _make_request(
+        self,
+        url: str,
+        use_cache: bool = True,
+        cache_key: Optional[str] = None,
+        revalidar: bool = False,
+        endpoint: Optional[str] = None,
+    ):
+        """
+        Mismo contrato que BCNClient._make_request: con el circuit breaker
+        abierto devuelve None, salvo con propagar_circuito=True.
+        """
+        try:
+            return await self._request_con_cache(
+                url, use_cache, cache_key, revalidar, endpoint
+            )
+        except CircuitoAbierto as e:
+            if self.propagar_circuito:
+                raise
+            logger.error(f"{e}: {url}")
+            return None
+
+    async def _request_con_cache(
+        self,
+        url: str,
+        use_cache: bool,
+        cache_key: Optional[str],
+        revalidar: bool,
+        endpoint: Optional[str],
+    ):
+        cache_key = cache_key or url
+
+        if not use_cache:
+            return await self._fetch(url, cache_key, {}, revalidar, endpoint, use_cache=False)
+
+        if not revalidar:
+            cached = await self._en_thread(self._read_cache, cache_key, endpoint)
+            if cached:
+                return cached
+
+        # Mismo single-flight que BCNClient, esperando el lock sin bloquear el loop
+        desde = time.time()
+        lock = self._fetch_lock(cache_key)
+        if not await lock.acquire_async():
+            logger.warning(f"Lock de descarga agotado, se descarga igual: {cache_key}")
+
+        try:
+            reciente = await self._en_thread(
+                self._resultado_reciente, cache_key, desde, revalidar
+            )
+            if reciente is not None:
+                logger.debug(f"Cache HIT (descargado por otro proceso): {cache_key}")
+                return reciente
+
+            headers = await self._en_thread(self._conditional_headers, cache_key)
+            return await self._fetch(url, cache_key, headers, revalidar, endpoint)
+        finally:
+            lock.release()
+
+    async def _fetch(
+        self,
+        url: str,
+        cache_key: str,
+        headers: Dict[str, str],
+        revalidar: bool,
+        endpoint: Optional[str],
+        use_cache: bool = True,
+    ):
+        async with self._semaforo:
+            for intento in range(self.max_retries + 1):
+                await self.breaker.esperar_turno_async()
+                await self._rate_limit()
+                inicio = time.monotonic()
+
+                try:
+                    logger.info(f"Request: {url}")
+                    response = await self.session.get(url, headers=headers)
+
+                    # Con presupuesto compartido un rechazo escribe el backoff en su archivo
+                    await self._en_thread(
+                        self._feedback,
+                        response.status_code,
+                        time.monotonic() - inicio,
+                        parse_retry_after(response.headers.get("Retry-After")),
+                    )
+
+                    # El backoff lo aplica el limitador en el próximo _rate_limit()
+                    if (
+                        response.status_code in self.RETRY_STATUS
+                        and intento < self.max_retries
+                    ):
+                        continue
+
+                    if response.status_code == 304:
+                        await self._en_thread(self.cache_index.touch, cache_key)
+                        logger.debug(f"Cache REVALIDADO (304): {cache_key}")
+                        if revalidar:
+                            return NO_MODIFICADA
+                        return await self._en_thread(self._read_cache, cache_key)
+
+                    response.raise_for_status()
+
+                    content = response.content
+
+                    if use_cache:
+                        await self._en_thread(
+                            self._write_cache, cache_key, content, response.headers, endpoint
+                        )
+
+                    return content
+
+                except httpx.HTTPStatusError as e:
+                    logger.error(f"HTTP error {e.response.status_code}: {url}")
+                    return None
+
+                except httpx.TimeoutException:
+                    await self._en_thread(self._feedback, None, time.monotonic() - inicio)
+                    if intento < self.max_retries:
+                        continue
+                    logger.error(f"Request timed out: {url}")
+                    return None
+
+                except httpx.HTTPError as e:
+                    await self._en_thread(self._feedback, None, time.monotonic() - inicio)
+                    logger.error(f"Request fallo: {url} - {e}")
+                    return None
+
+                except Exception as e:
+                    logger.error(f"Error inesperado: {url} - {e}")
+                    return None
+
+        return None
+
+    async def get_normas_por_institucion(
+        self, id_institucion: int, use_cache: bool = True
+    ) -> Optional[List[Dict]]:
+        url = self.BASE_URL + self.ENDPOINTS["normas_institucion"].format(
+            id_institucion
+        )
+
+        xml_content = await self._make_request(
+            url, use_cache=use_cache, endpoint="normas_institucion"
+        )
+
+        if not xml_content:
+            return None
+
+        return self._parse_normas_institucion(id_institucion, xml_content)
+
+    async def get_norma_metadatos(
+        self,
+        id_norma: int,
+        use_cache: bool = True,
+        revalidar: bool = False,
+        en_bytes: bool = False,
+    ) -> Optional[Union[str, bytes]]:
+        url = self.BASE_URL + self.ENDPOINTS["metadatos"].format(id_norma)
+        content = await self._make_request(
+            url, use_cache=use_cache, revalidar=revalidar, endpoint="metadatos"
+        )
+        return self._salida(content, en_bytes)
+
+    async def get_norma_completa(
+        self,
+        id_norma: int,
+        use_cache: bool = True,
+        revalidar: bool = False,
+        en_bytes: bool = False,
+    ) -> Optional[Union[str, bytes]]:
+        url = self.BASE_URL + self.ENDPOINTS["norma_completa"].format(id_norma)
+        content = await self._make_request(
+            url, use_cache=use_cache, revalidar=revalidar, endpoint="norma_completa"
+        )
+        return self._salida(content, en_bytes)
+
+    async def get_normas_completas(
+        self,
+        ids_normas: Iterable[int],
+        use_cache: bool = True,
+        revalidar: bool = False,
+        en_bytes: bool = False,
+    ) -> Dict[int, Optional[Union[str, bytes]]]:
+        """
+        Descarga varias normas en paralelo. Devuelve {id_norma: xml | None},
+        o NO_MODIFICADA por norma si se revalidó y la BCN respondió 304.
+        """
+        ids_normas = list(ids_normas)
+        xmls = await asyncio.gather(
+            *(
+                self.get_norma_completa(
+                    nid, use_cache=use_cache, revalidar=revalidar, en_bytes=en_bytes
+                )
+                for nid in ids_normas
+            )
+        )
+        return dict(zip(ids_normas, xmls))
+
+    async def get_normas_metadatos(
+        self,
+        ids_normas: Iterable[int],
+        use_cache: bool = True,
+        revalidar: bool = False,
+        en_bytes: bool = False,
+    ) -> Dict[int, Optional[Union[str, bytes]]]:
+        """Igual que get_normas_completas() pero contra el endpoint de metadatos."""
+        ids_normas = list(ids_normas)
+        xmls = await asyncio.gather(
+            *(
+                self.get_norma_metadatos(
+                    nid, use_cache=use_cache, revalidar=revalidar, en_bytes=en_bytes
+                )
+                for nid in ids_normas
+            )
+        )
+        return dict(zip(ids_normas, xmls))
+
+    async def aclose(self):
+        await self.session.aclose()
+        # Una escritura de caché puede seguir en su thread aunque la request
+        # se haya cancelado
+        await asyncio.to_thread(self._io.shutdown)
+        self.cache.close()
+        self.cache_index.close()
+        logger.info("BCN Async Client cerrado")
+
+
+def iter_normas_completas(
+    ids_normas: Iterable[int],
+    max_concurrencia: int = 8,
+    ventana: Optional[int] = None,
+    use_cache: bool = True,
+    revalidar: bool = False,
+    en_bytes: bool = False,
+    **client_kwargs,
+) -> Iterator[Tuple[int, Optional[Union[str, bytes]]]]:
+    """
+    Puente síncrono sobre AsyncBCNClient para consumidores que no son async
+    (services.sync, CLI NLP).
+
+    Descarga los ids en ventanas con un event loop propio en un thread de
+    fondo: mientras el llamador procesa una ventana, la siguiente ya se está
+    descargando. Entrega (id_norma, xml | None) en el mismo orden de
+    `ids_normas`, con memoria acotada a dos ventanas. Con revalidar=True
+    las normas que no cambiaron llegan como NO_MODIFICADA.
+    """
+    return _iter_en_ventanas(
+        "get_normas_completas",
+        ids_normas,
+        max_concurrencia,
+        ventana,
+        use_cache,
+        revalidar,
+        en_bytes,
+        client_kwargs,
+    )
+
+
+def iter_normas_metadatos(
+    ids_normas: Iterable[int],
+    max_concurrencia: int = 8,
+    ventana: Optional[int] = None,
+    use_cache: bool = True,
+    revalidar: bool = False,
+    en_bytes: bool = False,
+    **client_kwargs,
+) -> Iterator[Tuple[int, Optional[Union[str, bytes]]]]:
+    """Como iter_normas_completas() pero descarga solo los metadatos (services.refresh)."""
+    return _iter_en_ventanas(
+        "get_normas_metadatos",
+        ids_normas,
+        max_concurrencia,
+        ventana,
+        use_cache,
+        revalidar,
+        en_bytes,
+        client_kwargs,
+    )
+
+
+def _iter_en_ventanas(
+    metodo: str,
+    ids_normas: Iterable[int],
+    max_concurrencia: int,
+    ventana: Optional[int],
+    use_cache: bool,
+    revalidar: bool,
+    en_bytes: bool,
+    client_kwargs: Dict,
+) -> Iterator[Tuple[int, Optional[Union[str, bytes]]]]:
+    ids_normas = list(ids_normas)
+    ventana = ventana or max_concurrencia * 4
+    lotes = [ids_normas[i : i + ventana] for i in range(0, len(ids_normas), ventana)]
+
+    if not lotes:
+        return
+
+    loop = asyncio.new_event_loop()
+    hilo = threading.Thread(target=loop.run_forever, name="bcn-fetch", daemon=True)
+    hilo.start()
+
+    async def _crear_cliente() -> AsyncBCNClient:
+        return AsyncBCNClient(max_concurrencia=max_concurrencia, **client_kwargs)
+
+    client = asyncio.run_coroutine_threadsafe(_crear_cliente(), loop).result()
+    descargar = getattr(client, metodo)
+
+    def lanzar(lote: List[int]):
+        return asyncio.run_coroutine_threadsafe(
+            descargar(lote, use_cache=use_cache, revalidar=revalidar, en_bytes=en_bytes),
+            loop,
+        )
+
+    pendiente = lanzar(lotes[0])
+    try:
+        for i, lote in enumerate(lotes):
+            xmls = pendiente.result()
+            pendiente = lanzar(lotes[i + 1]) if i + 1 < len(lotes) else None
+
+            for nid in lote:
+                yield nid, xmls.get(nid)
+    finally:
+        # El llamador puede abandonar el generador a mitad (p. ej. sync
+        # cancelado): se cancela la ventana en curso antes de cerrar el loop.
+        async def _cerrar() -> None:
+            tareas = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for tarea in tareas:
+                tarea.cancel()
+            await asyncio.gather(*tareas, return_exceptions=True)
+            await client.aclose()
+
+        asyncio.run_coroutine_threadsafe(_cerrar(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        hilo.join()
+        loop.close()
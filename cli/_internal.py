@@ -32,6 +32,7 @@ def init_managers():
     from loaders.institutions import InstitutionLoader
     from managers.downloads import DownloadManager
     from managers.institutions import InstitutionManager
+    from managers.listados import ListadosManager
     from managers.metadata import MetadataManager
     from managers.nlp import NLPManager
     from managers.norms import NormsManager
@@ -47,6 +48,7 @@ def init_managers():
             "tipos": TiposNormasManager(db_connection=conn),
             "normas": NormsManager(db_connection=conn),
             "logger": DownloadManager(db_connection=conn),
+            "listados": ListadosManager(db_connection=conn),
             "scheduler": SchedulesManager(db_connection=conn),
             "metadata": MetadataManager(db_connection=conn),
             "nlp": NLPManager(db_connection=conn),
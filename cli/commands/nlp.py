@@ -109,9 +109,15 @@ def analizar_institucion(
             "Requiere Ollama y gemmna4 installado "
         ),
     ),
+    concurrencia: int = typer.Option(
+        1, "--concurrencia", "-c", min=1, help="Descargas simultáneas a la BCN"
+    ),
+    procesos: int = typer.Option(
+        1, "--procesos", "-p", min=0, help="Procesos para parsear XML (0 = todos los núcleos)"
+    ),
 ):
     """Analiza en batch todas las normas sincronizadas de una institución."""
-    from bcn_client import BCNClient
+    from bcn_client import BCNClient, iter_normas_completas
     from utils.norm_parser import BCNXMLParser
 
     client = BCNClient()
@@ -163,20 +169,37 @@ def analizar_institucion(
 
         stats = {"ok": 0, "errores": 0, "sin_xml": 0, "referencias": 0, "entidades": 0}
 
-        for i, norma in enumerate(normas, 1):
-            id_norma = norma.get("id", None)
-            if id_norma is None:
-                continue
-            try:
-                xml = client.get_norma_completa(id_norma)
-                if not xml:
+        ids = [n["id"] for n in normas if n.get("id") is not None]
+        if concurrencia > 1:
+            descargas = iter_normas_completas(
+                ids, max_concurrencia=concurrencia, en_bytes=True
+            )
+        else:
+            descargas = ((nid, client.get_norma_completa(nid, en_bytes=True)) for nid in ids)
+
+        procesadas = 0
+
+        def con_xml():
+            # Las normas sin XML se informan acá; el resto va al pool de parseo
+            nonlocal procesadas
+            for id_norma, xml in descargas:
+                if xml:
+                    yield id_norma, xml
+                else:
+                    procesadas += 1
                     stats["sin_xml"] += 1
                     output.print_sync_error(
-                        i, len(normas), id_norma, "XML no disponible"
+                        procesadas, len(normas), id_norma, "XML no disponible"
                     )
-                    continue
 
-                markdown, _ = parser.parse_from_string(xml)
+        parseadas = parser.parse_many(con_xml(), procesos=procesos or None)
+
+        for id_norma, markdown, norma in parseadas:
+            procesadas += 1
+            i = procesadas
+            try:
+                if markdown is None:
+                    raise norma
 
                 resultado = nlp_mgr.analizar_y_guardar(
                     id_norma=id_norma,
@@ -3,11 +3,15 @@ Comandos relacionados con normas:
   bcn normas list <institucion>
   bcn normas get <id>
   bcn normas sync <institucion>
+  bcn normas refresh-status <institucion>
+  bcn normas reprocesar [--institucion] [--tipo] [--desde] [--hasta]
   bcn normas search <query>
   bcn normas metadata <id>
+  bcn normas articulo <id> [articulo]
   bcn normas by-metadata <clave> <valor>
 """
 
+from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
@@ -123,6 +127,16 @@ def sync(
     force: bool = typer.Option(
         False, "--force", help="Re-descargar aunque no haya cambios"
     ),
+    concurrencia: Optional[int] = typer.Option(
+        None, "--concurrencia", "-c", min=1, help="Descargas simultáneas a la BCN"
+    ),
+    procesos: Optional[int] = typer.Option(
+        None, "--procesos", "-p", min=1, help="Procesos de parseo (por defecto 1)"
+    ),
+    completo: bool = typer.Option(
+        False, "--completo",
+        help="Revisar todo el listado, no solo lo que cambió desde el último sync",
+    ),
 ):
     """Sincroniza normas de una institución a la base de datos."""
     from services.sync import sync_institucion
@@ -152,6 +166,9 @@ def sync(
             force=force,
             on_progress=on_progress,
             on_log=on_log,
+            concurrencia=concurrencia,
+            procesos=procesos,
+            incremental=not completo,
         )
 
         output.print_sync_summary(stats.as_dict(), stats.total_procesadas)
@@ -163,6 +180,107 @@ def sync(
         managers["conn"].close()
 
 
+@app.command("refresh-status")
+def refresh_status(
+    institucion: int = typer.Argument(..., help="ID de la institución"),
+    descargar: bool = typer.Option(
+        True, "--descargar/--no-descargar",
+        help="Descargar el XML de las normas con cambios reales",
+    ),
+    concurrencia: int = typer.Option(
+        1, "--concurrencia", "-c", min=1, help="Requests simultáneas a la BCN"
+    ),
+):
+    """Refresca estado, fechas y materias de las normas guardadas usando solo metadatos."""
+    from services.refresh import refresh_estado_institucion
+
+    managers = require_managers()
+
+    try:
+        inst = managers["instituciones"].get_by_id(institucion)
+        if not inst:
+            output.error(f"Institución {institucion} no encontrada en la DB.")
+            raise typer.Exit(1)
+
+        console.print(f"\nRefrescando estado de [bold cyan]{inst.nombre}[/bold cyan]\n")
+
+        def on_progress(procesadas: int, total: int, id_norma: int, resultado: str) -> None:
+            # Solo se muestran las normas que cambiaron: la mayoría no cambia
+            if resultado != "sin_cambios":
+                output.print_sync_progress(procesadas, total, id_norma, resultado)
+
+        stats = refresh_estado_institucion(
+            inst_id=institucion,
+            managers=managers,
+            on_progress=on_progress,
+            concurrencia=concurrencia,
+            descargar=descargar,
+        )
+
+        output.print_refresh_summary(stats.as_dict())
+
+    except typer.Exit:
+        raise
+    except Exception as e:
+        output.error(f"Error fatal: {e}")
+        raise typer.Exit(1)
+    finally:
+        managers["conn"].close()
+
+
+@app.command("reprocesar")
+def reprocesar(
+    institucion: Optional[int] = typer.Option(
+        None, "--institucion", "-i", help="Solo normas de esta institución"
+    ),
+    tipo: Optional[str] = typer.Option(
+        None, "--tipo", "-t", help="Tipo de norma (nombre o abreviatura, ej: ley)"
+    ),
+    desde: Optional[datetime] = typer.Option(
+        None, "--desde", formats=["%Y-%m-%d"], help="Fecha de publicación desde"
+    ),
+    hasta: Optional[datetime] = typer.Option(
+        None, "--hasta", formats=["%Y-%m-%d"], help="Fecha de publicación hasta"
+    ),
+    limit: Optional[int] = typer.Option(
+        None, "--limit", "-n", help="Máximo de normas a reprocesar"
+    ),
+    procesos: int = typer.Option(
+        0, "--procesos", "-p", min=0, help="Procesos para parsear XML (0 = todos los núcleos)"
+    ),
+):
+    """Regenera Markdown, metadata y artículos desde el XML guardado, sin ir a la BCN."""
+    from services.reprocess import reprocesar_normas
+
+    managers = require_managers()
+
+    try:
+        def on_progress(procesadas: int, total: int, id_norma: int, resultado: str) -> None:
+            # Solo se muestran los problemas: en una corrida normal son miles de normas
+            if resultado != "reprocesada":
+                output.print_sync_progress(procesadas, total, id_norma, resultado)
+
+        console.print("\nReprocesando normas desde el XML guardado\n")
+        stats = reprocesar_normas(
+            managers=managers,
+            id_institucion=institucion,
+            tipo=tipo,
+            desde=desde.date() if desde else None,
+            hasta=hasta.date() if hasta else None,
+            limit=limit,
+            procesos=procesos or None,
+            on_progress=on_progress,
+        )
+
+        output.print_reprocess_summary(stats.as_dict())
+
+    except Exception as e:
+        output.error(f"Error fatal: {e}")
+        raise typer.Exit(1)
+    finally:
+        managers["conn"].close()
+
+
 @app.command("search")
 def search(
     query: str = typer.Argument(..., help="Texto a buscar"),
@@ -199,6 +317,35 @@ def get_metadata(
         managers["conn"].close()
 
 
+@app.command("articulo")
+def get_articulo(
+    id: int = typer.Argument(..., help="ID de la norma"),
+    articulo: Optional[str] = typer.Argument(
+        None, help="Artículo a mostrar (ej: 14, '14 bis', primero). Sin él, lista el índice"
+    ),
+):
+    """Muestra un artículo de una norma guardada, o su índice de artículos."""
+    managers = require_managers()
+
+    try:
+        if articulo is None:
+            output.print_articulos(id, managers["normas"].get_articulos(id))
+            return
+
+        resultado = managers["normas"].get_articulo(id, articulo)
+        if not resultado:
+            output.error(f"La norma {id} no tiene el artículo '{articulo}' en su índice")
+            raise typer.Exit(1)
+        output.print_articulo(id, resultado)
+    except typer.Exit:
+        raise
+    except Exception as e:
+        output.error(str(e))
+        raise typer.Exit(1)
+    finally:
+        managers["conn"].close()
+
+
 @app.command("by-metadata")
 def by_metadata(
     clave: str = typer.Argument(..., help="Clave de metadata (ej: materia, organismo)"),
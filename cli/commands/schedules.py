@@ -101,6 +101,9 @@ def start(
     ),
     timezone: str = typer.Option("UTC", "--tz", help="Zona horaria del cron: UTC, America/Santiago, etc."),
     ahora: bool = typer.Option(False, "--ahora", help="Ejecutar el sync inmediatamente al arrancar (útil para testing)"),
+    modo: str = typer.Option(
+        "sync", "--modo", help="sync (descarga completa) | estado (refresco vía metadatos)"
+    ),
 ):
     """Lanza un proceso scheduler independiente por cada institución."""
     ids = _parse_ids(instituciones)
@@ -108,6 +111,10 @@ def start(
         output.error("No se especificaron instituciones válidas.")
         raise typer.Exit(1)
 
+    if modo not in ("sync", "estado"):
+        output.error(f"Modo inválido: {modo}. Usa 'sync' o 'estado'.")
+        raise typer.Exit(1)
+
     managers = require_managers()
     schedules_mgr = _get_schedules_mgr(managers)
 
@@ -115,10 +122,12 @@ def start(
     for i, inst_id in enumerate(ids):
         job = schedules_mgr.get_by_inst_id(inst_id)
 
-        # Si ya hay un proceso vivo para esta institución, saltar
+        # Un solo job por institución: si ya hay un proceso vivo (sync o
+        # estado) se salta, registrar otro dejaría huérfano al que corre
         if job and job.get("pid") and _process_is_running(job["pid"]):
             output.warning(
-                f"Institución #{inst_id}: scheduler ya corriendo (PID {job['pid']}). Omitiendo."
+                f"Institución #{inst_id}: scheduler {job['nombre']} ya corriendo "
+                f"(PID {job['pid']}). Omitiendo."
             )
             continue
 
@@ -135,6 +144,7 @@ def start(
             "dia":      dia,
             "timezone": timezone,
             "ahora":    ahora,
+            "modo":     modo,
         })
 
         log_path = _log_file_for(inst_id)
@@ -143,7 +153,7 @@ def start(
         # Registrar PID en DB inmediatamente para que el proceso pueda actualizarlo luego
         schedules_mgr.upsert_job(
             inst_id=inst_id,
-            nombre=f"sync_{inst_id}",
+            nombre=f"{modo}_{inst_id}",
             hora=h,
             minuto=m,
             limite=limite,
@@ -262,6 +272,15 @@ def add(
     managers = require_managers()
     schedules_mgr = _get_schedules_mgr(managers)
 
+    job = schedules_mgr.get_by_inst_id(inst_id)
+    if job and job.get("pid") and _process_is_running(job["pid"]):
+        output.error(
+            f"Institución #{inst_id}: el job {job['nombre']} está corriendo (PID {job['pid']}). "
+            f"Detenlo con 'scheduler stop --inst {inst_id}' antes de reemplazarlo."
+        )
+        managers["conn"].close()
+        raise typer.Exit(1)
+
     try:
         schedules_mgr.upsert_job(
             inst_id=inst_id,
@@ -2,7 +2,7 @@
 Comandos del sistema:
   bcn init
   bcn stats
-  bcn cache stats | clear
+  bcn cache stats | clear | compact
 """
 
 from pathlib import Path
@@ -75,7 +75,7 @@ def stats(
         managers["conn"].close()
 
 
-# Cache es un sub-grupo con dos acciones: stats y clear
+# Cache es un sub-grupo con tres acciones: stats, clear y compact
 cache_app = typer.Typer(help="Gestiona el caché local")
 
 
@@ -113,4 +113,26 @@ def cache_clear(
         output.error(str(e))
         raise typer.Exit(1)
     finally:
-        client.close()
\ No newline at end of file
+        client.close()
+
+@cache_app.command("compact")
+def cache_compact():
+    """Reescribe los packs del caché descartando entradas reemplazadas o desalojadas."""
+    from bcn_client import BCNClient
+
+    client = BCNClient()
+    try:
+        if client.cache.nombre != "pack":
+            output.info("El backend 'file' no necesita compactación (BCN_CACHE_BACKEND=pack).")
+            return
+
+        resultado = client.compact_cache()
+        liberados = (resultado["bytes_antes"] - resultado["bytes_despues"]) / (1024 * 1024)
+        output.success(
+            f"Caché compactado: {resultado['entradas']} entradas, {liberados:.2f} MB liberados."
+        )
+    except Exception as e:
+        output.error(str(e))
+        raise typer.Exit(1)
+    finally:
+        client.close()
@@ -96,15 +96,28 @@ def print_search_results(results: list):
             norma.get("numero", "—"),
             str(norma.get("fecha_publicacion", "—")),
         )
+        if norma.get("fragmento"):
+            table.add_row("", "", "", _resaltar_fragmento(norma["fragmento"]), "", "", "")
 
     console.print(f"\n  [bold]{len(results)}[/bold] resultado(s) encontrado(s)\n")
     console.print(table)
 
 
+def _resaltar_fragmento(fragmento: str) -> Text:
+    """ts_headline marca los términos encontrados entre ** **."""
+    texto = Text(style="dim")
+    for i, parte in enumerate(" ".join(fragmento.split()).split("**")):
+        texto.append(parte, style="bold yellow" if i % 2 else None)
+    return texto
+
+
 def print_sync_progress(i: int, total: int, id_norma: int, result: str):
-    color = {"nueva": "green", "actualizada": "yellow", "sin_cambios": "dim"}.get(
-        result, "red"
-    )
+    color = {
+        "nueva": "green",
+        "actualizada": "yellow",
+        "sin_cambios": "dim",
+        "cambio": "magenta",
+    }.get(result, "red")
     console.print(
         f"  [{i}/{total}] Norma [cyan]{id_norma}[/cyan] → [bold {color}]{result}[/bold {color}]"
     )
@@ -126,11 +139,72 @@ def print_sync_summary(stats: dict, total: int):
     table.add_row("[yellow]Actualizadas[/yellow]", str(stats["actualizadas"]))
     table.add_row("[dim]Sin cambios[/dim]", str(stats["sin_cambios"]))
     table.add_row("[red]Errores[/red]", str(stats["errores"]))
+    if stats.get("omitidas"):
+        table.add_row("[dim]Omitidas (listado sin cambios)[/dim]", str(stats["omitidas"]))
+    if stats.get("listado_incompleto"):
+        table.add_row("[yellow]Listado BCN[/yellow]", "incompleto (snapshot sin cerrar)")
+
+    if stats.get("tasa_bcn") is not None:
+        table.add_section()
+        table.add_row("[dim]Tasa BCN final[/dim]", f"{stats['tasa_bcn']:.2f} req/s")
+        table.add_row("[dim]Reducciones de tasa[/dim]", str(stats.get("reducciones_tasa", 0)))
+
+    if stats.get("aperturas_circuito"):
+        table.add_row("[dim]Circuito BCN[/dim]", f"{stats['circuito']} ({stats['aperturas_circuito']} aperturas)")
+
+    if stats.get("error"):
+        table.add_section()
+        table.add_row("[red]Abortada[/red]", stats["error"])
+        console.print("\n")
+        console.print(Panel(table, title="Sincronización abortada", border_style="red"))
+        return
 
     console.print("\n")
     console.print(Panel(table, title="Sincronización completada", border_style="green"))
 
 
+def print_refresh_summary(stats: dict):
+    table = Table(box=box.ROUNDED, show_header=False, border_style="green")
+    table.add_column("Métrica", style="bold")
+    table.add_column("Valor", justify="right")
+
+    table.add_row("Revisadas", str(stats["revisadas"]))
+    table.add_row("[dim]Sin cambios[/dim]", str(stats["sin_cambios"]))
+    table.add_row("[yellow]Metadata actualizada[/yellow]", str(stats["actualizadas"]))
+    table.add_row("[magenta]Descargadas por cambio[/magenta]", str(stats["descargadas"]))
+    table.add_row("[red]Errores[/red]", str(stats["errores"]))
+
+    if stats.get("aperturas_circuito"):
+        table.add_row("[dim]Circuito BCN[/dim]", f"{stats['circuito']} ({stats['aperturas_circuito']} aperturas)")
+
+    if stats.get("error"):
+        table.add_section()
+        table.add_row("[red]Abortado[/red]", stats["error"])
+        console.print("\n")
+        console.print(Panel(table, title="Refresco de estado abortado", border_style="red"))
+        return
+
+    console.print("\n")
+    console.print(Panel(table, title="Refresco de estado completado", border_style="green"))
+
+
+def print_reprocess_summary(stats: dict):
+    table = Table(box=box.ROUNDED, show_header=False, border_style="green")
+    table.add_column("Métrica", style="bold")
+    table.add_column("Valor", justify="right")
+
+    table.add_row("[green]Reprocesadas[/green]", str(stats["reprocesadas"]))
+    table.add_row("[yellow]Sin XML local[/yellow]", str(stats["sin_xml"]))
+    table.add_row("[red]Errores[/red]", str(stats["errores"]))
+    table.add_section()
+    table.add_row("[dim]Duración[/dim]", f"{stats['segundos']:.1f}s")
+    table.add_row("[dim]Throughput[/dim]", f"{stats['docs_por_segundo']:.1f} docs/s")
+
+    titulo = "Reprocesamiento cancelado" if stats.get("cancelada") else "Reprocesamiento completado"
+    console.print("\n")
+    console.print(Panel(table, title=titulo, border_style="green"))
+
+
 # ── Stats ─────────────────────────────────────────────────────────────────────
 
 
@@ -197,8 +271,22 @@ def print_cache_stats(stats: dict):
 
     table.add_row("Archivos", str(stats["total_archivos"]))
     table.add_row("Tamaño", f"{stats['tamano_total_mb']:.2f} MB")
+    limite = stats.get("limite_mb")
+    table.add_row("Límite", f"{limite:.0f} MB" if limite else "sin límite")
+    table.add_row("Backend", stats.get("backend", "file"))
+    if stats.get("backend") == "pack":
+        table.add_row("Packs", f"{stats['packs']} ({stats['compresion']})")
+        table.add_row("Sin compactar", f"{stats['bytes_muertos'] / (1024 * 1024):.2f} MB")
     table.add_row("Directorio", stats["directorio"])
 
+    por_tipo = stats.get("por_tipo") or {}
+    if por_tipo:
+        table.add_section()
+        for tipo, t in sorted(por_tipo.items()):
+            table.add_row(
+                f"  {tipo}", f"{t['archivos']} · {t['bytes'] / (1024 * 1024):.2f} MB"
+            )
+
     console.print(Panel(table, title="Caché local", border_style="dim"))
 
 # ── Scheduler ─────────────────────────────────────────────────────────────────
@@ -302,6 +390,58 @@ def print_norma_metadata(id_norma: int, metadata: dict):
     console.print(Panel(table, title=f"Metadata — Norma {id_norma}", border_style="cyan"))
 
 
+def print_articulos(id_norma: int, articulos: list):
+    if not articulos:
+        console.print(
+            f"[yellow]La norma {id_norma} no tiene índice de artículos "
+            f"(se genera al sincronizarla).[/yellow]"
+        )
+        return
+
+    table = Table(
+        box=box.SIMPLE_HEAD,
+        show_edge=False,
+        header_style="bold cyan",
+    )
+    table.add_column("Parte", style="bold")
+    table.add_column("Nombre")
+    table.add_column("Título", overflow="ellipsis", max_width=50)
+    table.add_column("Estado", justify="center")
+
+    for art in articulos:
+        marcas = []
+        if art["derogado"]:
+            marcas.append("[red]derogado[/red]")
+        if art["transitorio"]:
+            marcas.append("[yellow]transitorio[/yellow]")
+        sangria = "  " * max(0, art["nivel"] - 2)
+        table.add_row(
+            f"{sangria}{art['tipo_parte'] or '—'}",
+            art["nombre"] or "",
+            art["titulo"] or "",
+            " ".join(marcas),
+        )
+
+    console.print(
+        Panel(table, title=f"Artículos — Norma {id_norma}", border_style="cyan")
+    )
+
+
+def print_articulo(id_norma: int, articulo: dict):
+    subtitulo = articulo["ruta"] or None
+    if articulo["derogado"]:
+        subtitulo = f"{subtitulo + ' · ' if subtitulo else ''}[red]derogado[/red]"
+    texto = articulo.get("texto")
+    console.print(
+        Panel(
+            texto if texto is not None else "[dim]Markdown no disponible[/dim]",
+            title=f"Norma {id_norma} — {articulo['tipo_parte']} {articulo['nombre']}",
+            subtitle=subtitulo,
+            border_style="cyan",
+        )
+    )
+
+
 def print_metadata_stats(stats: dict):
     table = Table(box=box.SIMPLE_HEAD, show_edge=False, header_style="bold cyan")
     table.add_column("Métrica", min_width=24)
@@ -1,9 +1,10 @@
 import os
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import psycopg2
 from dotenv import load_dotenv
+from psycopg2.extras import execute_values
 
 load_dotenv()
 
@@ -78,6 +79,42 @@ class DownloadManager:
         except Exception as e:
             print(f"Error logging: {e}")
 
+    def log_many(self, entradas: List[Tuple], cursor=None):
+        """
+        Registra varias descargas con un solo INSERT
+
+        Args:
+            entradas: [(id_norma, estado, tipo_descarga, error), ...]
+            cursor: Cursor del llamador para escribir dentro de su transacción
+                    (sin commit; los errores se propagan). Sin cursor, abre uno
+                    propio y confirma como log().
+        """
+        if not entradas:
+            return
+
+        sql = """
+            INSERT INTO descargas (id_norma, estado, tipo_descarga, error_mensaje)
+            VALUES %s
+        """
+        filas = [
+            (id_norma, estado, tipo_descarga, error or None)
+            for id_norma, estado, tipo_descarga, error in entradas
+        ]
+
+        if cursor is not None:
+            execute_values(cursor, sql, filas, page_size=len(filas))
+            return
+
+        try:
+            cursor = self.conn.cursor()
+            execute_values(cursor, sql, filas, page_size=len(filas))
+            self.conn.commit()
+            cursor.close()
+
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Error logging: {e}")
+
     def get_recent(
         self, days: int = 7, estado: Optional[str] = None, limit: int = 100
     ) -> List[Dict]:
@@ -0,0 +1,200 @@
+import os
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+import psycopg2
+from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+
+load_dotenv()
+
+
+def fecha_listado(texto: Optional[str]) -> Optional[date]:
+    """Fecha del listado opt=6 ("31-12-2020") como date; None si no se puede leer."""
+    if not texto:
+        return None
+    try:
+        return datetime.strptime(texto.strip(), "%d-%m-%Y").date()
+    except ValueError:
+        return None
+
+
+class ListadosManager:
+    """
+    Snapshot del listado de normas de cada institución (opt=6) y marca del
+    último sync completo. El sync incremental compara el listado nuevo
+    contra el snapshot para descargar solo lo nuevo o cambiado.
+    """
+
+    table_name = "listados_instituciones"
+    marcas_table = "sync_instituciones"
+
+    def __init__(self, db_connection=None) -> None:
+        self.conn = db_connection
+        self.own_connection = False
+
+        if not self.conn:
+            self.conn = psycopg2.connect(
+                host=os.getenv("POSTGRES_HOST", "localhost"),
+                port=os.getenv("POSTGRES_PORT", 5432),
+                database=os.getenv("POSTGRES_DB", "bcn_normas"),
+                user=os.getenv("POSTGRES_USER", "bcn_user"),
+                password=os.getenv("POSTGRES_PASSWORD", "bcn_password"),
+            )
+            self.own_connection = True
+
+        self.ensure_listados_tables()
+
+    def ensure_listados_tables(self) -> None:
+        """Crea las tablas del snapshot y de marcas de sync si no existen."""
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table_name} (
+                id_institucion    INTEGER NOT NULL,
+                id_norma          INTEGER NOT NULL,
+                fecha_publicacion DATE,
+                titulo            TEXT,
+                hash_entrada      VARCHAR(32) NOT NULL,
+                verificado_en     TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (id_institucion, id_norma)
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_listados_verificado
+                ON {self.table_name}(id_institucion, verificado_en);
+
+            CREATE TABLE IF NOT EXISTS {self.marcas_table} (
+                id_institucion     INTEGER PRIMARY KEY,
+                ultimo_sync        TIMESTAMP NOT NULL,
+                ultima_publicacion DATE,
+                normas_listadas    INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        self.conn.commit()
+        cursor.close()
+
+    def get_snapshot(self, id_institucion: int) -> Dict[int, Dict]:
+        """
+        Snapshot guardado del listado: {id_norma: {"hash_entrada",
+        "fecha_publicacion", "titulo", "verificado_en"}}.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"""
+            SELECT id_norma, hash_entrada, fecha_publicacion, titulo, verificado_en
+            FROM {self.table_name}
+            WHERE id_institucion = %s
+            """,
+            (id_institucion,),
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+
+        return {
+            row[0]: {
+                "hash_entrada": row[1],
+                "fecha_publicacion": row[2],
+                "titulo": row[3],
+                "verificado_en": row[4],
+            }
+            for row in rows
+        }
+
+    def get_marca(self, id_institucion: int) -> Optional[Dict]:
+        """Marca del último sync completo de la institución, o None si nunca terminó uno."""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"""
+            SELECT ultimo_sync, ultima_publicacion, normas_listadas
+            FROM {self.marcas_table}
+            WHERE id_institucion = %s
+            """,
+            (id_institucion,),
+        )
+        row = cursor.fetchone()
+        cursor.close()
+
+        if not row:
+            return None
+        return {
+            "ultimo_sync": row[0],
+            "ultima_publicacion": row[1],
+            "normas_listadas": row[2],
+        }
+
+    def save_entradas(self, id_institucion: int, normas: List[Dict]) -> int:
+        """
+        Guarda en el snapshot las entradas del listado de normas ya
+        sincronizadas (dicts de BCNClient con hash_entrada), marcándolas
+        como verificadas ahora.
+        """
+        unicas = list({n["id"]: n for n in normas}.values())
+        if not unicas:
+            return 0
+
+        cursor = self.conn.cursor()
+        execute_values(
+            cursor,
+            f"""
+            INSERT INTO {self.table_name}
+                (id_institucion, id_norma, fecha_publicacion, titulo, hash_entrada, verificado_en)
+            VALUES %s
+            ON CONFLICT (id_institucion, id_norma) DO UPDATE SET
+                fecha_publicacion = EXCLUDED.fecha_publicacion,
+                titulo            = EXCLUDED.titulo,
+                hash_entrada      = EXCLUDED.hash_entrada,
+                verificado_en     = EXCLUDED.verificado_en
+            """,
+            [
+                (
+                    id_institucion,
+                    n["id"],
+                    fecha_listado(n.get("fecha_publicacion")),
+                    n.get("titulo"),
+                    n["hash_entrada"],
+                    datetime.now(),
+                )
+                for n in unicas
+            ],
+            page_size=1000,
+        )
+        self.conn.commit()
+        cursor.close()
+
+        return len(unicas)
+
+    def cerrar_sync(
+        self, id_institucion: int, normas: List[Dict], completo: bool = True
+    ) -> None:
+        """
+        Registra la marca del sync que acaba de terminar. Con el listado
+        completo (sin limit) se quitan del snapshot las normas que ya no
+        aparecen en él.
+        """
+        fechas = [f for f in (fecha_listado(n.get("fecha_publicacion")) for n in normas) if f]
+
+        cursor = self.conn.cursor()
+        if completo:
+            cursor.execute(
+                f"""
+                DELETE FROM {self.table_name}
+                WHERE id_institucion = %s AND NOT (id_norma = ANY(%s))
+                """,
+                (id_institucion, [n["id"] for n in normas]),
+            )
+
+        cursor.execute(
+            f"""
+            INSERT INTO {self.marcas_table}
+                (id_institucion, ultimo_sync, ultima_publicacion, normas_listadas)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (id_institucion) DO UPDATE SET
+                ultimo_sync        = EXCLUDED.ultimo_sync,
+                ultima_publicacion = GREATEST(
+                    {self.marcas_table}.ultima_publicacion, EXCLUDED.ultima_publicacion
+                ),
+                normas_listadas    = EXCLUDED.normas_listadas
+            """,
+            (id_institucion, datetime.now(), max(fechas, default=None), len(normas)),
+        )
+        self.conn.commit()
+        cursor.close()
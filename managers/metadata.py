@@ -1,8 +1,9 @@
 import os
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 import psycopg2
 from dotenv import load_dotenv
+from psycopg2.extras import execute_values
 
 load_dotenv()
 
@@ -60,6 +61,49 @@ class MetadataManager:
             (id_norma,),
         )
 
+        entries = self._entradas(id_norma, parsed_data)
+        if not entries:
+            return
+
+        cursor.executemany(
+            f"""
+            INSERT INTO {self.table_name} (id_norma, clave, valor, tipo_valor)
+            VALUES (%s, %s, %s, %s)
+            """,
+            entries,
+        )
+
+    def save_many(self, cursor, normas: List[Tuple[int, Dict]]) -> None:
+        """Como save() para varias normas: un DELETE y un INSERT para todo el bloque.
+
+        normas: [(id_norma, parsed_data), ...] con ids sin repetir.
+        """
+        if not normas:
+            return
+
+        cursor.execute(
+            f"DELETE FROM {self.table_name} WHERE id_norma = ANY(%s)",
+            ([id_norma for id_norma, _ in normas],),
+        )
+
+        entries = [
+            entry
+            for id_norma, parsed_data in normas
+            for entry in self._entradas(id_norma, parsed_data)
+        ]
+        if not entries:
+            return
+
+        execute_values(
+            cursor,
+            f"INSERT INTO {self.table_name} (id_norma, clave, valor, tipo_valor) VALUES %s",
+            entries,
+            page_size=len(entries),
+        )
+
+    @staticmethod
+    def _entradas(id_norma: int, parsed_data: Dict) -> List[Tuple[int, str, str, str]]:
+        """Filas EAV (id_norma, clave, valor, tipo_valor) de una norma."""
         entries = []
 
         for materia in parsed_data.get("materias", []):
@@ -83,16 +127,7 @@ class MetadataManager:
                 )
             )
 
-        if not entries:
-            return
-
-        cursor.executemany(
-            f"""
-            INSERT INTO {self.table_name} (id_norma, clave, valor, tipo_valor)
-            VALUES (%s, %s, %s, %s)
-            """,
-            entries,
-        )
+        return entries
 
     def get_by_norma(self, id_norma: int) -> Dict:
         """Devuelve toda la metadata de una norma como dict reconstruido."""
@@ -126,6 +161,28 @@ class MetadataManager:
 
         return [row[0] for row in rows]
 
+    def get_valores_by_normas(self, ids_normas: List[int], clave: str) -> Dict[int, List[str]]:
+        """Valores de una clave para varias normas en una sola consulta: {id_norma: [valores]}."""
+        if not ids_normas:
+            return {}
+
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"""
+            SELECT id_norma, valor
+            FROM {self.table_name}
+            WHERE id_norma = ANY(%s) AND clave = %s
+            """,
+            (list(ids_normas), clave),
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+
+        result: Dict[int, List[str]] = {}
+        for id_norma, valor in rows:
+            result.setdefault(id_norma, []).append(valor)
+        return result
+
     def get_normas_by_clave_valor(
         self, clave: str, valor: str, limit: int = 50, offset: int = 0
     ) -> List[Dict]:
@@ -1,22 +1,53 @@
+import contextlib
 import hashlib
+import logging
 import os
+import re
+import shutil
 from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, List, Literal, Optional
+from typing import Dict, Iterable, List, Literal, Optional, Set, Tuple, Union
 
 import psycopg2
 from dotenv import load_dotenv
+from psycopg2.extras import execute_batch, execute_values
 
 from managers.metadata import MetadataManager
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+_PREFIJO_ARTICULO = re.compile(r"^(art[íi]culo|art\.?)\s*", re.IGNORECASE)
+
+
+def _estado_descarga(resultado: str) -> str:
+    """Estado en descargas para el resultado de save(): 'sin_cambios' o 'exitosa'."""
+    return "sin_cambios" if resultado == "sin_cambios" else "exitosa"
+
+
+def clave_articulo(nombre: Optional[str]) -> Optional[str]:
+    """
+    Normaliza el nombre de un artículo para buscarlo: "Artículo 14 bis",
+    "art. 14 bis" y "14 BIS" dan "14 bis"; "14º" da "14".
+    """
+    if not nombre:
+        return None
+    clave = _PREFIJO_ARTICULO.sub("", nombre.strip())
+    clave = re.sub(r"[º°ª.]", "", clave)
+    return " ".join(clave.lower().split()) or None
+
 
 class NormsManager:
     """Gestiona el CRUD de normas en PostgreSQL, incluyendo versionado histórico."""
 
     table_name = "normas"
     versions_table = "normas_versiones"
+    articulos_table = "normas_articulos"
+    texto_table = "normas_texto"
+
+    # Caracteres del cuerpo que entran al tsvector (límite de 1 MB de Postgres)
+    MAX_TEXTO_INDEXADO = 1_000_000
 
     def __init__(
         self,
@@ -45,10 +76,14 @@ class NormsManager:
 
         self._ensure_normas_table()
         self._ensure_versiones_table()
+        self._ensure_articulos_table()
 
         # MetadataManager comparte la misma conexión para participar en las mismas transacciones
         self.metadata = MetadataManager(db_connection=self.conn)
 
+        # Después de la metadata: la carga inicial toma las materias de normas_metadata
+        self._ensure_texto_table()
+
     def _ensure_normas_table(self) -> None:
         """Crea la tabla principal de normas y la tabla de relación con instituciones."""
         cursor = self.conn.cursor()
@@ -61,6 +96,7 @@ class NormsManager:
                 estado              VARCHAR(20) DEFAULT 'vigente',
                 fecha_publicacion   DATE,
                 fecha_promulgacion  DATE,
+                fecha_version       DATE,
                 organismo           TEXT,
                 xml_path            TEXT,
                 md_path             TEXT,
@@ -71,6 +107,10 @@ class NormsManager:
                 fecha_actualizacion TIMESTAMP
             );
 
+            -- Columnas agregadas después de la primera versión del esquema
+            ALTER TABLE {self.table_name}
+                ADD COLUMN IF NOT EXISTS fecha_version DATE;
+
             CREATE INDEX IF NOT EXISTS idx_normas_tipo
                 ON {self.table_name}(id_tipo);
             CREATE INDEX IF NOT EXISTS idx_normas_estado
@@ -111,6 +151,145 @@ class NormsManager:
         self.conn.commit()
         cursor.close()
 
+    def _ensure_articulos_table(self) -> None:
+        """Crea el índice de artículos (estructuras funcionales) de cada norma."""
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.articulos_table} (
+                id_norma    INTEGER NOT NULL REFERENCES {self.table_name}(id) ON DELETE CASCADE,
+                orden       INTEGER NOT NULL,
+                tipo_parte  VARCHAR(50),
+                id_parte    VARCHAR(50),
+                nombre      TEXT,
+                clave       TEXT,
+                titulo      TEXT,
+                nivel       SMALLINT NOT NULL,
+                ruta        TEXT,
+                derogado    BOOLEAN NOT NULL DEFAULT FALSE,
+                transitorio BOOLEAN NOT NULL DEFAULT FALSE,
+                inicio      INTEGER NOT NULL,
+                fin         INTEGER NOT NULL,
+                PRIMARY KEY (id_norma, orden)
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_articulos_clave
+                ON {self.articulos_table}(id_norma, tipo_parte, clave);
+        """)
+        self.conn.commit()
+        cursor.close()
+
+    def _ensure_texto_table(self) -> None:
+        """
+        Crea la tabla del texto completo con su tsvector ponderado (título A,
+        materias B, cuerpo C). Va aparte de normas para que los scans de
+        normas no arrastren el texto; Postgres lo guarda en TOAST.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT to_regclass(%s)", (self.texto_table,))
+        nueva = cursor.fetchone()[0] is None
+
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.texto_table} (
+                id_norma INTEGER PRIMARY KEY REFERENCES {self.table_name}(id) ON DELETE CASCADE,
+                titulo   TEXT,
+                materias TEXT,
+                texto    TEXT,
+                tsv      TSVECTOR GENERATED ALWAYS AS (
+                    setweight(to_tsvector('spanish', coalesce(titulo, '')), 'A') ||
+                    setweight(to_tsvector('spanish', coalesce(materias, '')), 'B') ||
+                    setweight(to_tsvector('spanish',
+                        left(coalesce(texto, ''), {self.MAX_TEXTO_INDEXADO})), 'C')
+                ) STORED
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_normas_texto_tsv
+                ON {self.texto_table} USING gin(tsv);
+        """)
+
+        if nueva:
+            # Normas guardadas antes de esta tabla: se buscan por título y
+            # materias hasta que un sync o `normas reprocesar` cargue el cuerpo
+            cursor.execute(f"""
+                INSERT INTO {self.texto_table} (id_norma, titulo, materias)
+                SELECT n.id, n.titulo, string_agg(m.valor, ' ')
+                FROM {self.table_name} n
+                LEFT JOIN normas_metadata m ON m.id_norma = n.id AND m.clave = 'materia'
+                GROUP BY n.id, n.titulo
+            """)
+
+        self.conn.commit()
+        cursor.close()
+
+    def _save_texto(self, cursor, normas: List[Tuple[int, Dict]]) -> None:
+        """
+        Reemplaza el texto indexado de las normas [(id_norma, parsed_data)]
+        dentro de la transacción del llamador, con un solo INSERT.
+        """
+        if not normas:
+            return
+        execute_values(
+            cursor,
+            f"""
+            INSERT INTO {self.texto_table} (id_norma, titulo, materias, texto)
+            VALUES %s
+            ON CONFLICT (id_norma) DO UPDATE SET
+                titulo   = EXCLUDED.titulo,
+                materias = EXCLUDED.materias,
+                texto    = EXCLUDED.texto
+            """,
+            [
+                (
+                    id_norma,
+                    parsed_data.get("titulo"),
+                    " ".join(parsed_data.get("materias") or []) or None,
+                    parsed_data.get("contenido_texto"),
+                )
+                for id_norma, parsed_data in normas
+            ],
+            page_size=len(normas),
+        )
+
+    def _save_articulos(self, cursor, normas: List[Tuple[int, List]]) -> None:
+        """
+        Reemplaza el índice de artículos de las normas [(id_norma, articulos)]
+        dentro de la transacción del llamador: un DELETE y un INSERT paginado.
+        """
+        if not normas:
+            return
+        cursor.execute(
+            f"DELETE FROM {self.articulos_table} WHERE id_norma = ANY(%s)",
+            ([id_norma for id_norma, _ in normas],),
+        )
+        execute_values(
+            cursor,
+            f"""
+            INSERT INTO {self.articulos_table} (
+                id_norma, orden, tipo_parte, id_parte, nombre, clave, titulo,
+                nivel, ruta, derogado, transitorio, inicio, fin
+            ) VALUES %s
+            """,
+            [
+                (
+                    id_norma,
+                    a.orden,
+                    a.tipo_parte,
+                    a.id_parte,
+                    a.nombre,
+                    clave_articulo(a.nombre),
+                    a.titulo,
+                    a.nivel,
+                    a.ruta,
+                    a.derogado,
+                    a.transitorio,
+                    a.inicio,
+                    a.fin,
+                )
+                for id_norma, articulos in normas
+                for a in articulos
+            ],
+            page_size=1000,
+        )
+
     def _archive_version(
         self, cursor, id_norma: int, version_num: int, row: tuple
     ) -> None:
@@ -118,14 +297,43 @@ class NormsManager:
 
         row debe ser (hash_xml, xml_path, md_path, titulo, estado).
         """
+        cursor.execute(
+            f"""
+            INSERT INTO {self.versions_table}
+                (id_norma, version_num, hash_xml, xml_path, md_path, titulo, estado)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (id_norma, version_num) DO NOTHING
+            """,
+            self._copiar_version(id_norma, version_num, row),
+        )
+
+    def _copiar_version(self, id_norma: int, version_num: int, row: tuple) -> tuple:
+        """
+        Copia XML y Markdown actuales a {id}_v{n} y devuelve la fila para
+        normas_versiones: (id_norma, version_num, hash_xml, xml_path, md_path,
+        titulo, estado).
+        """
+        fila, copias = self._planificar_version(id_norma, version_num, row)
+        for src, dst in copias:
+            shutil.copyfile(src, dst)
+        return fila
+
+    def _planificar_version(
+        self, id_norma: int, version_num: int, row: tuple
+    ) -> Tuple[tuple, List[Tuple[Path, Path]]]:
+        """
+        Fila de normas_versiones para el estado actual de una norma y las
+        copias (origen, {id}_v{n}) que la respaldan, sin copiar nada todavía.
+        """
         hash_xml, xml_path, md_path, titulo, estado = row
+        copias: List[Tuple[Path, Path]] = []
 
         versioned_xml_path = None
         if xml_path:
             src = Path(xml_path)
             if src.exists():
                 dst = src.parent / f"{id_norma}_v{version_num}{src.suffix}"
-                dst.write_text(src.read_text(encoding="utf-8"), encoding="utf-8")
+                copias.append((src, dst))
                 versioned_xml_path = str(dst)
 
         versioned_md_path = None
@@ -133,43 +341,110 @@ class NormsManager:
             src = Path(md_path)
             if src.exists():
                 dst = src.parent / f"{id_norma}_v{version_num}{src.suffix}"
-                dst.write_text(src.read_text(encoding="utf-8"), encoding="utf-8")
+                copias.append((src, dst))
                 versioned_md_path = str(dst)
 
-        cursor.execute(
-            f"""
-            INSERT INTO {self.versions_table}
-                (id_norma, version_num, hash_xml, xml_path, md_path, titulo, estado)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (id_norma, version_num) DO NOTHING
-            """,
-            (
-                id_norma,
-                version_num,
-                hash_xml,
-                versioned_xml_path,
-                versioned_md_path,
-                titulo,
-                estado,
-            ),
+        fila = (
+            id_norma,
+            version_num,
+            hash_xml,
+            versioned_xml_path,
+            versioned_md_path,
+            titulo,
+            estado,
+        )
+        return fila, copias
+
+    def _upsert_sql(self, valores: str) -> str:
+        """INSERT … ON CONFLICT de normas; valores es el placeholder de VALUES."""
+        return f"""
+            INSERT INTO {self.table_name} (
+                id, id_tipo, numero, titulo, estado,
+                fecha_publicacion, fecha_promulgacion, fecha_version, organismo,
+                xml_path, md_path, contenido_texto,
+                hash_xml, version_actual, fecha_descarga, fecha_actualizacion
+            ) VALUES {valores}
+            ON CONFLICT (id) DO UPDATE SET
+                id_tipo             = EXCLUDED.id_tipo,
+                numero              = EXCLUDED.numero,
+                titulo              = EXCLUDED.titulo,
+                estado              = EXCLUDED.estado,
+                fecha_publicacion   = EXCLUDED.fecha_publicacion,
+                fecha_promulgacion  = EXCLUDED.fecha_promulgacion,
+                fecha_version       = EXCLUDED.fecha_version,
+                organismo           = EXCLUDED.organismo,
+                xml_path            = EXCLUDED.xml_path,
+                md_path             = EXCLUDED.md_path,
+                contenido_texto     = EXCLUDED.contenido_texto,
+                hash_xml            = EXCLUDED.hash_xml,
+                version_actual      = EXCLUDED.version_actual,
+                fecha_actualizacion = CURRENT_TIMESTAMP
+            """
+
+    @staticmethod
+    def _fila_norma(
+        id_norma: int,
+        id_tipo: Optional[int],
+        parsed_data: Dict,
+        xml_path: Path,
+        md_path: Optional[Path],
+        hash_xml: str,
+        version: int,
+    ) -> tuple:
+        """Valores de _upsert_sql para una norma."""
+        return (
+            id_norma,
+            id_tipo,
+            parsed_data.get("numero"),
+            parsed_data.get("titulo"),
+            parsed_data.get("estado", "vigente"),
+            parsed_data.get("fecha_publicacion"),
+            parsed_data.get("fecha_promulgacion"),
+            parsed_data.get("fecha_version"),
+            parsed_data.get("organismo"),
+            str(xml_path),
+            str(md_path) if md_path else None,
+            None,  # el texto vive en normas_texto
+            hash_xml,
+            version,
+            datetime.now(),
+            datetime.now(),
         )
 
     def save(
         self,
         id_norma: int,
-        xml_content: str,
+        xml_content: Union[str, bytes],
         parsed_data: Dict,
         id_tipo: Optional[int] = None,
         id_institucion: Optional[int] = None,
         markdown: Optional[str] = None,
         force: bool = False,
+        hash_xml: Optional[str] = None,
+        markdown_file: Optional[Path] = None,
+        articulos: Optional[List] = None,
     ) -> str:
         """
         Guarda o actualiza una norma, archivando la versión anterior si hubo cambios.
 
+        xml_content se escribe tal cual; si llega como bytes (BCNClient con
+        en_bytes=True) no se decodifica ni re-codifica. hash_xml es el md5 ya
+        calculado al descargar (BCNClient.hash_norma); si falta se calcula acá.
+
+        markdown_file es una alternativa a markdown para normas muy grandes:
+        un archivo temporal en md_dir ya escrito por
+        BCNXMLParser.render_markdown, que se mueve a su lugar (o se borra si
+        la norma no cambió).
+
+        articulos es el índice de BCNXMLParser.parse_con_indice (offsets en
+        el Markdown guardado); si viene, reemplaza al de la versión anterior.
+
         Returns: 'nueva' | 'actualizada' | 'sin_cambios'
         """
-        hash_xml = hashlib.md5(xml_content.encode()).hexdigest()
+        if isinstance(xml_content, str):
+            xml_content = xml_content.encode("utf-8")
+        if hash_xml is None:
+            hash_xml = hashlib.md5(xml_content).hexdigest()
 
         cursor = self.conn.cursor()
         cursor.execute(
@@ -184,16 +459,11 @@ class NormsManager:
 
         if existing and existing[0] == hash_xml and not force:
             cursor.close()
+            if markdown_file:
+                Path(markdown_file).unlink(missing_ok=True)
             return "sin_cambios"
 
-        xml_path = self.xml_dir / f"{id_norma}.xml"
-        xml_path.write_text(xml_content, encoding="utf-8")
-
-        md_path = None
-        if markdown:
-            md_path = self.md_dir / f"{id_norma}.md"
-            md_path.write_text(markdown, encoding="utf-8")
-
+        # La versión anterior se archiva antes de sobreescribir sus archivos
         if existing:
             prev_hash, prev_xml, prev_md, prev_titulo, prev_estado, version_actual = (
                 existing
@@ -208,50 +478,30 @@ class NormsManager:
         else:
             next_version = 1
 
+        xml_path = self.xml_dir / f"{id_norma}.xml"
+        xml_path.write_bytes(xml_content)
+
+        md_path = None
+        if markdown_file:
+            md_path = self.md_dir / f"{id_norma}.md"
+            os.replace(markdown_file, md_path)
+        elif markdown:
+            md_path = self.md_dir / f"{id_norma}.md"
+            md_path.write_text(markdown, encoding="utf-8")
+
         cursor.execute(
-            f"""
-            INSERT INTO {self.table_name} (
-                id, id_tipo, numero, titulo, estado,
-                fecha_publicacion, fecha_promulgacion, organismo,
-                xml_path, md_path, contenido_texto,
-                hash_xml, version_actual, fecha_descarga, fecha_actualizacion
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (id) DO UPDATE SET
-                id_tipo             = EXCLUDED.id_tipo,
-                numero              = EXCLUDED.numero,
-                titulo              = EXCLUDED.titulo,
-                estado              = EXCLUDED.estado,
-                fecha_publicacion   = EXCLUDED.fecha_publicacion,
-                fecha_promulgacion  = EXCLUDED.fecha_promulgacion,
-                organismo           = EXCLUDED.organismo,
-                xml_path            = EXCLUDED.xml_path,
-                md_path             = EXCLUDED.md_path,
-                contenido_texto     = EXCLUDED.contenido_texto,
-                hash_xml            = EXCLUDED.hash_xml,
-                version_actual      = EXCLUDED.version_actual,
-                fecha_actualizacion = CURRENT_TIMESTAMP
-            """,
-            (
-                id_norma,
-                id_tipo,
-                parsed_data.get("numero"),
-                parsed_data.get("titulo"),
-                parsed_data.get("estado", "vigente"),
-                parsed_data.get("fecha_publicacion"),
-                parsed_data.get("fecha_promulgacion"),
-                parsed_data.get("organismo"),
-                str(xml_path),
-                str(md_path) if md_path else None,
-                parsed_data.get("contenido_texto"),
-                hash_xml,
-                next_version,
-                datetime.now(),
-                datetime.now(),
+            self._upsert_sql("(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"),
+            self._fila_norma(
+                id_norma, id_tipo, parsed_data, xml_path, md_path, hash_xml, next_version
             ),
         )
 
         # Delegar metadata al MetadataManager compartiendo el cursor de esta transacción
         self.metadata.save(cursor, id_norma, parsed_data)
+        self._save_texto(cursor, [(id_norma, parsed_data)])
+
+        if articulos is not None:
+            self._save_articulos(cursor, [(id_norma, articulos)])
 
         if id_institucion:
             cursor.execute(
@@ -268,6 +518,289 @@ class NormsManager:
 
         return "actualizada" if existing else "nueva"
 
+    def save_many(
+        self,
+        filas: List[Dict],
+        lote: int = 200,
+        descargas=None,
+        tipo_descarga: str = "completa",
+        registros: Optional[List[Tuple]] = None,
+    ) -> List[Tuple[str, Optional[str]]]:
+        """
+        Guarda varias normas ya parseadas con una transacción por bloque de
+        `lote` normas. Cada tabla (normas, versiones, metadata, texto,
+        artículos, normas_instituciones y descargas) se escribe con una sola
+        sentencia por bloque (execute_values + ON CONFLICT), en vez de las
+        4–6 idas y vueltas y los commits por norma de save().
+
+        Cada fila tiene los mismos campos que los argumentos de save():
+        {"id_norma", "xml_content", "parsed_data", "id_tipo", "id_institucion",
+        "markdown", "force", "hash_xml", "markdown_file", "articulos"}.
+
+        descargas es un DownloadManager: cada norma del bloque queda
+        registrada como "exitosa", "sin_cambios" (mismo hash, no se reescribe)
+        o "error" con tipo_descarga, junto con `registros` — entradas
+        (id_norma, estado, tipo_descarga, error) de normas que el llamador ya
+        descartó antes de llegar aquí —. Si comparte la conexión, el registro
+        entra en la misma transacción.
+
+        Si un bloque falla se deshace y se reintenta norma a norma con save(),
+        para que una norma con problemas no arrastre al resto.
+
+        Returns: [(resultado, error)] en el orden de filas, con resultado
+        'nueva' | 'actualizada' | 'sin_cambios' | 'error'.
+        """
+        registros = list(registros or [])
+        resultados: List[Tuple[str, Optional[str]]] = []
+
+        for inicio in range(0, len(filas), lote):
+            bloque = filas[inicio : inicio + lote]
+            resultados.extend(
+                self._save_bloque(bloque, descargas, tipo_descarga, registros)
+            )
+            registros = []
+
+        if registros and descargas is not None:
+            descargas.log_many(registros)
+
+        return resultados
+
+    def _save_bloque(
+        self, bloque: List[Dict], descargas, tipo_descarga: str, registros: List[Tuple]
+    ) -> List[Tuple[str, Optional[str]]]:
+        """Un bloque de save_many: una transacción, o norma a norma si falla."""
+        ids = [fila["id_norma"] for fila in bloque]
+
+        # ON CONFLICT no admite dos filas con el mismo id en una sentencia
+        if len(set(ids)) != len(ids):
+            return self._save_uno_a_uno(bloque, descargas, tipo_descarga, registros)
+
+        misma_conexion = descargas is not None and descargas.conn is self.conn
+
+        cursor = self.conn.cursor()
+        archivos: List[Tuple[Path, Path]] = []
+        copias: List[Tuple[Path, Path]] = []
+        try:
+            resultados, sin_cambios = self._escribir_bloque(cursor, bloque, archivos, copias)
+            entradas = registros + [
+                (nid, _estado_descarga(resultados[nid]), tipo_descarga, None) for nid in ids
+            ]
+            if misma_conexion:
+                descargas.log_many(entradas, cursor=cursor)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            # Los temporales propios se borran; los markdown_file los usa save()
+            temporales = {Path(f["markdown_file"]) for f in bloque if f.get("markdown_file")}
+            for origen, _ in archivos:
+                if Path(origen) not in temporales:
+                    Path(origen).unlink(missing_ok=True)
+            return self._save_uno_a_uno(bloque, descargas, tipo_descarga, registros)
+        finally:
+            cursor.close()
+
+        self._mover_archivos(copias, archivos, sin_cambios)
+
+        if descargas is not None and not misma_conexion:
+            descargas.log_many(entradas)
+
+        return [(resultados[nid], None) for nid in ids]
+
+    def _mover_archivos(
+        self,
+        copias: List[Tuple[Path, Path]],
+        archivos: List[Tuple[Path, Path]],
+        sin_cambios: List[Path],
+    ) -> None:
+        """
+        Versiones archivadas y XML/Markdown nuevos recién confirmada la
+        transacción: si el bloque se deshace no queda ninguna copia {id}_v{n}
+        y save() encuentra los archivos anteriores intactos. Las copias van
+        antes de reemplazar los archivos que respaldan.
+
+        Las filas ya están confirmadas: un archivo que falla (disco lleno,
+        permisos) queda en el log y no hace fallar al resto del bloque.
+        """
+        for origen, destino in copias:
+            try:
+                shutil.copyfile(origen, destino)
+            except OSError as e:
+                logger.error(f"No se pudo archivar la versión {destino}: {e}")
+        for origen, destino in archivos:
+            try:
+                os.replace(origen, destino)
+            except OSError as e:
+                logger.error(f"No se pudo reemplazar {destino}: {e}")
+                with contextlib.suppress(OSError):
+                    Path(origen).unlink(missing_ok=True)
+        for markdown_file in sin_cambios:
+            with contextlib.suppress(OSError):
+                Path(markdown_file).unlink(missing_ok=True)
+
+    def _escribir_bloque(
+        self,
+        cursor,
+        bloque: List[Dict],
+        archivos: List[Tuple[Path, Path]],
+        copias: List[Tuple[Path, Path]],
+    ) -> Tuple[Dict[int, str], List[Path]]:
+        """
+        Escribe un bloque sin confirmar, con una sentencia por tabla. XML y
+        Markdown nuevos quedan en temporales y se agregan a `archivos` como
+        (temporal, destino); las copias de las versiones que se archivan se
+        agregan a `copias` como (actual, {id}_v{n}). Devuelve el resultado por id y los Markdown
+        temporales de las normas sin cambios, que se borran tras el commit.
+        """
+        cursor.execute(
+            f"""
+            SELECT id, hash_xml, xml_path, md_path, titulo, estado, version_actual
+            FROM {self.table_name}
+            WHERE id = ANY(%s)
+            """,
+            ([fila["id_norma"] for fila in bloque],),
+        )
+        existentes = {row[0]: row[1:] for row in cursor.fetchall()}
+
+        resultados: Dict[int, str] = {}
+        sin_cambios: List[Path] = []
+        filas_normas, versiones, guardadas = [], [], []
+
+        for fila in bloque:
+            id_norma = fila["id_norma"]
+            xml_content = fila["xml_content"]
+            if isinstance(xml_content, str):
+                xml_content = xml_content.encode("utf-8")
+            hash_xml = fila.get("hash_xml") or hashlib.md5(xml_content).hexdigest()
+
+            existing = existentes.get(id_norma)
+            if existing and existing[0] == hash_xml and not fila.get("force"):
+                resultados[id_norma] = "sin_cambios"
+                if fila.get("markdown_file"):
+                    sin_cambios.append(fila["markdown_file"])
+                continue
+
+            # La versión anterior se copia tras el commit, antes de tocar sus archivos
+            if existing:
+                version_actual = existing[5]
+                version, respaldo = self._planificar_version(
+                    id_norma, version_actual, existing[:5]
+                )
+                versiones.append(version)
+                copias.extend(respaldo)
+                next_version = version_actual + 1
+            else:
+                next_version = 1
+
+            xml_path = self.xml_dir / f"{id_norma}.xml"
+            tmp = xml_path.with_suffix(".xml.tmp")
+            tmp.write_bytes(xml_content)
+            archivos.append((tmp, xml_path))
+
+            md_path = None
+            if fila.get("markdown_file"):
+                md_path = self.md_dir / f"{id_norma}.md"
+                archivos.append((Path(fila["markdown_file"]), md_path))
+            elif fila.get("markdown"):
+                md_path = self.md_dir / f"{id_norma}.md"
+                tmp = md_path.with_suffix(".md.tmp")
+                tmp.write_text(fila["markdown"], encoding="utf-8")
+                archivos.append((tmp, md_path))
+
+            filas_normas.append(
+                self._fila_norma(
+                    id_norma,
+                    fila.get("id_tipo"),
+                    fila["parsed_data"],
+                    xml_path,
+                    md_path,
+                    hash_xml,
+                    next_version,
+                )
+            )
+            guardadas.append(fila)
+            resultados[id_norma] = "actualizada" if existing else "nueva"
+
+        if versiones:
+            execute_values(
+                cursor,
+                f"""
+                INSERT INTO {self.versions_table}
+                    (id_norma, version_num, hash_xml, xml_path, md_path, titulo, estado)
+                VALUES %s
+                ON CONFLICT (id_norma, version_num) DO NOTHING
+                """,
+                versiones,
+                page_size=len(versiones),
+            )
+
+        if not guardadas:
+            return resultados, sin_cambios
+
+        execute_values(
+            cursor, self._upsert_sql("%s"), filas_normas, page_size=len(filas_normas)
+        )
+
+        parseadas = [(fila["id_norma"], fila["parsed_data"]) for fila in guardadas]
+        self.metadata.save_many(cursor, parseadas)
+        self._save_texto(cursor, parseadas)
+        self._save_articulos(
+            cursor,
+            [
+                (fila["id_norma"], fila["articulos"])
+                for fila in guardadas
+                if fila.get("articulos") is not None
+            ],
+        )
+
+        instituciones = [
+            (fila["id_norma"], fila["id_institucion"])
+            for fila in guardadas
+            if fila.get("id_institucion")
+        ]
+        if instituciones:
+            execute_values(
+                cursor,
+                """
+                INSERT INTO normas_instituciones (id_norma, id_institucion)
+                VALUES %s
+                ON CONFLICT (id_norma, id_institucion) DO NOTHING
+                """,
+                instituciones,
+                page_size=len(instituciones),
+            )
+
+        return resultados, sin_cambios
+
+    def _save_uno_a_uno(
+        self,
+        bloque: List[Dict],
+        descargas,
+        tipo_descarga: str,
+        registros: List[Tuple],
+    ) -> List[Tuple[str, Optional[str]]]:
+        """Respaldo de save_many: cada norma con save() y su propio commit."""
+        if registros and descargas is not None:
+            descargas.log_many(registros)
+
+        resultados: List[Tuple[str, Optional[str]]] = []
+        for fila in bloque:
+            try:
+                resultados.append((self.save(**fila), None))
+            except Exception as e:
+                self.conn.rollback()
+                resultados.append(("error", str(e)))
+
+            if descargas is not None:
+                resultado, error = resultados[-1]
+                descargas.log(
+                    fila["id_norma"],
+                    "error" if error else _estado_descarga(resultado),
+                    tipo_descarga,
+                    error,
+                )
+
+        return resultados
+
     def get_by_id(self, id_norma: int) -> Optional[Dict]:
         cursor = self.conn.cursor()
         cursor.execute(
@@ -316,6 +849,259 @@ class NormsManager:
             "instituciones": instituciones,
         }
 
+    def get_existing_ids(self, ids_normas: Iterable[int]) -> Set[int]:
+        """Devuelve el subconjunto de ids que ya están guardados en la DB."""
+        ids_normas = list(ids_normas)
+        if not ids_normas:
+            return set()
+
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"SELECT id FROM {self.table_name} WHERE id = ANY(%s)",
+            (ids_normas,),
+        )
+        existentes = {row[0] for row in cursor.fetchall()}
+        cursor.close()
+
+        return existentes
+
+    def get_hashes(self, ids_normas: Iterable[int]) -> Dict[int, str]:
+        """
+        md5 del XML guardado de cada id ya presente en la DB, en una sola
+        consulta. El sync lo precarga para descartar normas sin cambios
+        antes de parsearlas.
+        """
+        ids_normas = list(ids_normas)
+        if not ids_normas:
+            return {}
+
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"SELECT id, hash_xml FROM {self.table_name} WHERE id = ANY(%s)",
+            (ids_normas,),
+        )
+        hashes = {row[0]: row[1] for row in cursor.fetchall()}
+        cursor.close()
+
+        return hashes
+
+    def get_para_reprocesar(
+        self,
+        id_institucion: Optional[int] = None,
+        tipo: Optional[str] = None,
+        desde: Optional[date] = None,
+        hasta: Optional[date] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        Normas guardadas a reprocesar desde su XML local, con filtros
+        opcionales por institución, tipo (nombre o abreviatura, como
+        get_by_type) y rango de fecha_publicacion.
+        """
+        condiciones = []
+        params: List = []
+        if id_institucion is not None:
+            condiciones.append(
+                "n.id IN (SELECT id_norma FROM normas_instituciones WHERE id_institucion = %s)"
+            )
+            params.append(id_institucion)
+        if tipo:
+            condiciones.append(
+                "n.id_tipo IN (SELECT id FROM tipos_normas "
+                "WHERE nombre ILIKE %s OR abreviatura ILIKE %s)"
+            )
+            params.extend([f"%{tipo}%", f"%{tipo}%"])
+        if desde:
+            condiciones.append("n.fecha_publicacion >= %s")
+            params.append(desde)
+        if hasta:
+            condiciones.append("n.fecha_publicacion <= %s")
+            params.append(hasta)
+
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        limite = "LIMIT %s" if limit else ""
+        if limit:
+            params.append(limit)
+
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"""
+            SELECT n.id, n.xml_path, n.md_path
+            FROM {self.table_name} n
+            {where}
+            ORDER BY n.id
+            {limite}
+            """,
+            params,
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+
+        return [{"id": row[0], "xml_path": row[1], "md_path": row[2]} for row in rows]
+
+    def update_reprocesadas(self, filas: List[Dict]) -> int:
+        """
+        Guarda en una sola transacción el resultado de reprocesar normas cuyo
+        XML no cambió: columnas derivadas del parser, metadata EAV e índice
+        de artículos. No archiva versión ni toca hash_xml.
+
+        Cada fila: {"id_norma", "parsed_data", "md_path", "articulos"}.
+        """
+        if not filas:
+            return 0
+
+        cursor = self.conn.cursor()
+        try:
+            execute_batch(
+                cursor,
+                f"""
+                UPDATE {self.table_name} SET
+                    numero              = %(numero)s,
+                    titulo              = %(titulo)s,
+                    estado              = %(estado)s,
+                    fecha_publicacion   = %(fecha_publicacion)s,
+                    fecha_promulgacion  = %(fecha_promulgacion)s,
+                    fecha_version       = %(fecha_version)s,
+                    organismo           = %(organismo)s,
+                    md_path             = %(md_path)s,
+                    contenido_texto     = NULL,
+                    fecha_actualizacion = CURRENT_TIMESTAMP
+                WHERE id = %(id_norma)s
+                """,
+                [
+                    {
+                        "id_norma": fila["id_norma"],
+                        "numero": fila["parsed_data"].get("numero"),
+                        "titulo": fila["parsed_data"].get("titulo"),
+                        "estado": fila["parsed_data"].get("estado", "vigente"),
+                        "fecha_publicacion": fila["parsed_data"].get("fecha_publicacion"),
+                        "fecha_promulgacion": fila["parsed_data"].get("fecha_promulgacion"),
+                        "fecha_version": fila["parsed_data"].get("fecha_version"),
+                        "organismo": fila["parsed_data"].get("organismo"),
+                        "md_path": str(fila["md_path"]) if fila["md_path"] else None,
+                    }
+                    for fila in filas
+                ],
+                page_size=500,
+            )
+            parseadas = [(fila["id_norma"], fila["parsed_data"]) for fila in filas]
+            self.metadata.save_many(cursor, parseadas)
+            self._save_texto(cursor, parseadas)
+            self._save_articulos(
+                cursor,
+                [
+                    (fila["id_norma"], fila["articulos"])
+                    for fila in filas
+                    if fila.get("articulos") is not None
+                ],
+            )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        return len(filas)
+
+    def get_estado_by_institucion(self, id_institucion: int) -> Dict[int, Dict]:
+        """
+        Campos que cambian con el estado de una norma (vigencia, fechas, versión),
+        para todas las normas guardadas de una institución. Lo usa el refresco
+        de estado para comparar contra los metadatos de la BCN.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"""
+            SELECT n.id, n.id_tipo, n.titulo, n.estado,
+                   n.fecha_publicacion, n.fecha_promulgacion, n.fecha_version
+            FROM {self.table_name} n
+            JOIN normas_instituciones ni ON n.id = ni.id_norma
+            WHERE ni.id_institucion = %s
+            ORDER BY n.id
+            """,
+            (id_institucion,),
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+
+        return {
+            row[0]: {
+                "id": row[0],
+                "id_tipo": row[1],
+                "titulo": row[2],
+                "estado": row[3],
+                "fecha_publicacion": row[4],
+                "fecha_promulgacion": row[5],
+                "fecha_version": row[6],
+            }
+            for row in rows
+        }
+
+    def update_estado_many(self, cambios: List[Dict]) -> int:
+        """
+        Actualiza en bloque estado, título, fechas y metadata EAV a partir de
+        parsed_data de metadatos, sin tocar XML/Markdown ni versionar.
+
+        Cada elemento: {"id_norma": int, "parsed_data": Dict}.
+        fecha_version solo se completa si estaba vacía: cambiarla corresponde
+        a la descarga completa que guarda el texto nuevo.
+        """
+        if not cambios:
+            return 0
+
+        cursor = self.conn.cursor()
+        try:
+            execute_batch(
+                cursor,
+                f"""
+                UPDATE {self.table_name} SET
+                    titulo              = %s,
+                    estado              = %s,
+                    fecha_publicacion   = %s,
+                    fecha_promulgacion  = %s,
+                    fecha_version       = COALESCE(fecha_version, %s),
+                    fecha_actualizacion = CURRENT_TIMESTAMP
+                WHERE id = %s
+                """,
+                [
+                    (
+                        c["parsed_data"].get("titulo"),
+                        c["parsed_data"].get("estado", "vigente"),
+                        c["parsed_data"].get("fecha_publicacion"),
+                        c["parsed_data"].get("fecha_promulgacion"),
+                        c["parsed_data"].get("fecha_version"),
+                        c["id_norma"],
+                    )
+                    for c in cambios
+                ],
+            )
+
+            # Título y materias también pesan en la búsqueda; el cuerpo no cambió
+            execute_batch(
+                cursor,
+                f"UPDATE {self.texto_table} SET titulo = %s, materias = %s WHERE id_norma = %s",
+                [
+                    (
+                        c["parsed_data"].get("titulo"),
+                        " ".join(c["parsed_data"].get("materias") or []) or None,
+                        c["id_norma"],
+                    )
+                    for c in cambios
+                ],
+            )
+
+            self.metadata.save_many(cursor, [(c["id_norma"], c["parsed_data"]) for c in cambios])
+
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        return len(cambios)
+
     def get_by_institucion(
         self, id_institucion: int, limit: int = 500, offset: int = 0
     ) -> List[Dict]:
@@ -483,18 +1269,43 @@ class NormsManager:
         return norms
 
     def search(self, query: str, limit: int = 20, offset: int = 0) -> List[Dict]:
-        """Búsqueda full-text en normas."""
+        """
+        Búsqueda full-text en título, materias y texto de las normas
+        (normas_texto.tsv, índice GIN), ordenada por ts_rank_cd. Acepta la
+        sintaxis de websearch_to_tsquery: "frase exacta", -excluir, OR.
+
+        Cada resultado trae un `fragmento` (ts_headline) con los términos
+        encontrados entre ** **. El fragmento se calcula solo para la página
+        pedida: ts_headline relee el texto completo de cada norma.
+        """
         cursor = self.conn.cursor()
         cursor.execute(
             f"""
-            SELECT id, id_tipo, titulo, numero, estado, fecha_publicacion
-            FROM {self.table_name}
-            WHERE to_tsvector('spanish', titulo) @@ plainto_tsquery('spanish', %s)
-               OR titulo ILIKE %s
-            ORDER BY fecha_publicacion DESC
-            LIMIT %s OFFSET %s
+            WITH consulta AS (
+                SELECT websearch_to_tsquery('spanish', %(q)s) AS q
+            ),
+            pagina AS (
+                SELECT t.id_norma, ts_rank_cd(t.tsv, consulta.q) AS rank
+                FROM {self.texto_table} t, consulta
+                WHERE t.tsv @@ consulta.q
+                ORDER BY rank DESC, t.id_norma DESC
+                LIMIT %(limit)s OFFSET %(offset)s
+            )
+            SELECT n.id, n.id_tipo, n.titulo, n.numero, n.estado, n.fecha_publicacion,
+                   p.rank,
+                   ts_headline(
+                       'spanish',
+                       left(coalesce(t.texto, t.titulo, ''), {self.MAX_TEXTO_INDEXADO}),
+                       consulta.q,
+                       'StartSel=**, StopSel=**, MaxFragments=2, MaxWords=30, MinWords=10'
+                   )
+            FROM pagina p
+            JOIN {self.table_name} n ON n.id = p.id_norma
+            JOIN {self.texto_table} t ON t.id_norma = p.id_norma
+            CROSS JOIN consulta
+            ORDER BY p.rank DESC, n.id DESC
             """,
-            (query, f"%{query}%", limit, offset),
+            {"q": query, "limit": limit, "offset": offset},
         )
 
         results = [
@@ -505,6 +1316,8 @@ class NormsManager:
                 "numero": row[3],
                 "estado": row[4],
                 "fecha_publicacion": row[5],
+                "rank": round(row[6], 4),
+                "fragmento": row[7],
             }
             for row in cursor.fetchall()
         ]
@@ -606,6 +1419,78 @@ class NormsManager:
             "detectado_en": row[6],
         }
 
+    def get_articulos(
+        self, id_norma: int, tipo_parte: Optional[str] = None
+    ) -> List[Dict]:
+        """Índice de estructuras de una norma en orden de documento, sin el texto."""
+        cursor = self.conn.cursor()
+        filtro = "AND tipo_parte = %s" if tipo_parte else ""
+        cursor.execute(
+            f"""
+            SELECT orden, tipo_parte, id_parte, nombre, titulo, nivel, ruta,
+                   derogado, transitorio, inicio, fin
+            FROM {self.articulos_table}
+            WHERE id_norma = %s {filtro}
+            ORDER BY orden
+            """,
+            (id_norma, tipo_parte) if tipo_parte else (id_norma,),
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+
+        return [self._row_to_articulo(row) for row in rows]
+
+    def get_articulo(self, id_norma: int, articulo: str) -> Optional[Dict]:
+        """
+        Busca un artículo por nombre ("14", "Artículo 14 bis", "primero") y
+        retorna su entrada del índice con el texto leído del Markdown por offset,
+        sin cargar el documento completo.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"""
+            SELECT a.orden, a.tipo_parte, a.id_parte, a.nombre, a.titulo, a.nivel, a.ruta,
+                   a.derogado, a.transitorio, a.inicio, a.fin, n.md_path
+            FROM {self.articulos_table} a
+            JOIN {self.table_name} n ON n.id = a.id_norma
+            WHERE a.id_norma = %s AND a.tipo_parte = 'Artículo' AND a.clave = %s
+            ORDER BY a.orden
+            LIMIT 1
+            """,
+            (id_norma, clave_articulo(articulo)),
+        )
+        row = cursor.fetchone()
+        cursor.close()
+
+        if not row:
+            return None
+
+        resultado = self._row_to_articulo(row)
+        resultado["texto"] = None
+        md_path = row[11]
+        if md_path and Path(md_path).exists():
+            with open(md_path, "rb") as f:
+                f.seek(resultado["inicio"])
+                contenido = f.read(resultado["fin"] - resultado["inicio"])
+            resultado["texto"] = contenido.decode("utf-8").strip()
+        return resultado
+
+    @staticmethod
+    def _row_to_articulo(row: tuple) -> Dict:
+        return {
+            "orden": row[0],
+            "tipo_parte": row[1],
+            "id_parte": row[2],
+            "nombre": row[3],
+            "titulo": row[4],
+            "nivel": row[5],
+            "ruta": row[6],
+            "derogado": row[7],
+            "transitorio": row[8],
+            "inicio": row[9],
+            "fin": row[10],
+        }
+
     def get_stats(self) -> Dict:
         """Estadísticas de normas."""
         cursor = self.conn.cursor()
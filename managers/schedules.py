@@ -82,7 +82,13 @@ class SchedulesManager:
         limite: int,
         pid: Optional[int] = None,
     ) -> None:
-        """Inserta o actualiza la configuración del job para una institución."""
+        """
+        Inserta o actualiza la configuración del job para una institución.
+
+        Hay un solo job por institución, sea de sync o de estado: el llamador
+        verifica antes que no haya otro proceso vivo en la fila (se pisaría
+        su pid y quedaría huérfano).
+        """
         cursor = self.conn.cursor()
         cursor.execute(
             f"""
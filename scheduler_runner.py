@@ -11,7 +11,9 @@ Recibe un único JSON con los parámetros del job:
         "limite": 200,
         "dia": "mon-fri",      # opcional
         "timezone": "UTC",     # opcional, default UTC
-        "ahora": false         # opcional, ejecutar inmediatamente al arrancar
+        "ahora": false,        # opcional, ejecutar inmediatamente al arrancar
+        "modo": "sync"         # opcional: "sync" (descarga completa) o
+                               # "estado" (refresco barato vía metadatos)
     }
 """
 
@@ -22,6 +24,7 @@ import signal
 import sys
 from typing import Optional
 
+import psutil
 from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.cron import CronTrigger
@@ -29,6 +32,7 @@ from dotenv import load_dotenv
 
 from managers.downloads import DownloadManager
 from managers.institutions import InstitutionManager
+from managers.listados import ListadosManager
 from managers.metadata import MetadataManager
 from managers.norms import NormsManager
 from managers.norms_types import TiposNormasManager
@@ -62,6 +66,7 @@ def _build_managers() -> dict:
         "normas":        NormsManager(db_connection=conn),
         "metadata":      MetadataManager(db_connection=conn),
         "logger":        DownloadManager(conn),
+        "listados":      ListadosManager(db_connection=conn),
     }
 
 
@@ -91,6 +96,41 @@ def _make_sync_job(inst_id: int, limite: int, managers: dict, schedules_mgr: Sch
 
         job_logger.info(f"Sync finalizado: {stats.resumen()}")
 
+        # El listener registra la excepción como last_error del job
+        if stats.error:
+            raise RuntimeError(f"{stats.error} (circuito {stats.circuito})")
+
+    return job
+
+
+def _make_refresh_job(inst_id: int, managers: dict, schedules_mgr: SchedulesManager):
+    """Devuelve la función de refresco de estado (solo metadatos) para un inst_id dado."""
+    from services.refresh import refresh_estado_institucion
+
+    nombre = f"estado_{inst_id}"
+
+    def job() -> None:
+        job_logger = logging.getLogger(f"scheduler_runner.{nombre}")
+        schedules_mgr.update_status(inst_id, "running")
+
+        def on_log(msg: str) -> None:
+            clean = (
+                msg.replace("[/]", "").replace("[red]", "").replace("[green]", "")
+                .replace("[cyan]", "").replace("[yellow]", "").replace("[dim]", "")
+            )
+            job_logger.info(clean)
+
+        stats = refresh_estado_institucion(
+            inst_id=inst_id,
+            managers=managers,
+            on_log=on_log,
+        )
+
+        job_logger.info(f"Refresco finalizado: {stats.resumen()}")
+
+        if stats.error:
+            raise RuntimeError(f"{stats.error} (circuito {stats.circuito})")
+
     return job
 
 
@@ -102,10 +142,23 @@ def main(
     dia: Optional[str] = None,
     timezone: str = "UTC",
     ahora: bool = False,
+    modo: str = "sync",
 ) -> None:
     managers = _build_managers()
     schedules_mgr = SchedulesManager(managers["conn"])
-    nombre = f"sync_{inst_id}"
+    nombre = f"{modo}_{inst_id}"
+
+    # Un solo job por institución (sync o estado): pisar la fila de otro
+    # proceso vivo lo dejaría huérfano, fuera del alcance de 'scheduler stop'
+    existente = schedules_mgr.get_by_inst_id(inst_id)
+    pid_existente = existente["pid"] if existente else None
+    if pid_existente and pid_existente != os.getpid() and psutil.pid_exists(pid_existente):
+        logger.error(
+            f"La institución #{inst_id} ya tiene el job {existente['nombre']} activo "
+            f"(PID {pid_existente}); no se inicia {nombre}."
+        )
+        managers["conn"].close()
+        sys.exit(1)
 
     # Registrar el job en DB al arrancar con estado "scheduled"
     schedules_mgr.upsert_job(
@@ -131,7 +184,10 @@ def main(
 
     scheduler.add_listener(listener, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
 
-    sync_fn = _make_sync_job(inst_id, limite, managers, schedules_mgr)
+    if modo == "estado":
+        sync_fn = _make_refresh_job(inst_id, managers, schedules_mgr)
+    else:
+        sync_fn = _make_sync_job(inst_id, limite, managers, schedules_mgr)
 
     # Ejecución inmediata al arrancar — útil para testing
     if ahora:
@@ -193,4 +249,5 @@ if __name__ == "__main__":
         dia=args.get("dia"),
         timezone=args.get("timezone", "UTC"),
         ahora=args.get("ahora", False),
+        modo=args.get("modo", "sync"),
     )
\ No newline at end of file
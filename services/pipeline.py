@@ -0,0 +1,372 @@
+"""
+Pipeline por etapas del sync: descarga → parseo → escritura.
+
+sync_institucion procesaba norma a norma (descargar → parsear → guardar →
+log): mientras se esperaba a la BCN la CPU quedaba ociosa, y mientras se
+parseaba o se hacía commit no había requests en vuelo. Ahora cada etapa
+corre por su cuenta y se comunican por colas acotadas:
+
+    descarga   thread "sync-descarga". Recorre el listado con BCNClient
+               (concurrencia=1) o con iter_normas_completas (concurrencia > 1).
+               Resuelve acá lo que no necesita parseo: 304 o md5 igual al
+               guardado → "sin_cambios"; sin respuesta → "error". Si el
+               circuit breaker se abre, pausa y retoma desde la primera norma
+               no entregada, o aborta tras `pausas_circuito` pausas seguidas.
+    parseo     thread "sync-parseo". Alimenta BCNXMLParser.parse_many con
+               `procesos` workers (1 = en este mismo thread). Los XML grandes
+               se renderizan en streaming a un temporal en md_dir, fuera del
+               pool.
+    escritura  el thread que llamó a sync_institucion: recorre lotes() y
+               guarda lo que haya listo, de a `lote` normas. Los callbacks
+               on_progress/on_log se siguen llamando solo desde ese thread.
+
+Cada cola tiene capacidad `capacidad`: si la DB se atrasa el parseo se
+bloquea, y si el parseo se atrasa se dejan de pedir normas a la BCN. Así la
+memoria queda acotada a unas 2 * capacidad normas en vuelo más los lotes del
+pool de parseo.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import queue
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Desde este tamaño de XML el Markdown se escribe en streaming directo a
+# disco (BCNXMLParser.render_markdown) en vez de armarlo en memoria
+UMBRAL_MARKDOWN_STREAMING = 4 * 1024 * 1024
+
+# Fin de una etapa
+_FIN = object()
+
+# Cada cuánto las etapas bloqueadas revisan si hay que detenerse
+_ESPERA = 0.2
+
+
+@dataclass
+class NormaEnCurso:
+    """Una norma del listado a medida que avanza por las etapas."""
+
+    nid: int
+    norma_info: Dict
+    resultado: Optional[str] = None  # "sin_cambios" | "error" si se resolvió antes de guardar
+    motivo: str = ""  # "304" / "hash", o el mensaje de error
+    xml: Optional[Union[str, bytes]] = None
+    hash_xml: Optional[str] = None
+    markdown: Optional[str] = None
+    markdown_file: Optional[Path] = None  # temporal en md_dir (XML grandes)
+    metadata: Optional[object] = None  # NormRecord
+    articulos: List = field(default_factory=list)
+    contenido: Optional[str] = None  # texto plano para normas_texto
+
+    def descartar(self) -> None:
+        """Borra el Markdown temporal si la norma no llegó a guardarse."""
+        if self.markdown_file:
+            self.markdown_file.unlink(missing_ok=True)
+
+
+def parsear_norma(norma: NormaEnCurso, parser, md_dir: Path) -> NormaEnCurso:
+    """
+    Parsea en el thread actual. Desde UMBRAL_MARKDOWN_STREAMING el Markdown
+    se escribe a un temporal en md_dir (NormsManager.save lo mueve) y el
+    texto plano se lee de ese archivo por líneas.
+    """
+    from utils.norm_parser import texto_plano
+
+    xml = norma.xml
+    if len(xml) < UMBRAL_MARKDOWN_STREAMING:
+        norma.markdown, norma.metadata, norma.articulos = parser.parse_con_indice(xml)
+        norma.contenido = texto_plano(norma.markdown)
+        return norma
+
+    fd, tmp = tempfile.mkstemp(prefix=f".{norma.nid}-", suffix=".md.tmp", dir=md_dir)
+    norma.markdown_file = Path(tmp)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            norma.metadata = parser.render_markdown(xml, f, indice=norma.articulos)
+        with open(norma.markdown_file, encoding="utf-8") as f:
+            norma.contenido = texto_plano(f)
+    except Exception:
+        norma.descartar()
+        raise
+    return norma
+
+
+class SyncPipeline:
+    """Etapas de descarga y parseo en threads; la escritura la hace quien recorre lotes()."""
+
+    def __init__(
+        self,
+        normas: List[Dict],
+        client,
+        limiter,
+        parser,
+        md_dir: Path,
+        hashes: Dict[int, str],
+        revalidar: bool,
+        concurrencia: int = 1,
+        procesos: int = 1,
+        lote: int = 50,
+        capacidad: int = 32,
+        pausas_circuito: int = 3,
+    ):
+        self.normas = normas
+        self.client = client
+        self.limiter = limiter
+        self.parser = parser
+        self.md_dir = Path(md_dir)
+        self.hashes = hashes
+        self.revalidar = revalidar
+        self.concurrencia = concurrencia
+        self.procesos = procesos
+        self.lote = lote
+        self.pausas_circuito = pausas_circuito
+
+        self.error: Optional[str] = None  # motivo si una etapa abortó el sync
+        self._detener = threading.Event()
+        self._cola_parseo: queue.Queue = queue.Queue(maxsize=capacidad)
+        self._cola_escritura: queue.Queue = queue.Queue(maxsize=capacidad)
+        self._hilos: List[threading.Thread] = []
+        self._entregado: List = []
+
+    # ── Colas con backpressure que respetan detener() ─────────────────────────
+
+    def _poner(self, cola: queue.Queue, item) -> bool:
+        while not self._detener.is_set():
+            try:
+                cola.put(item, timeout=_ESPERA)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _tomar(self, cola: queue.Queue):
+        while not self._detener.is_set():
+            try:
+                return cola.get(timeout=_ESPERA)
+            except queue.Empty:
+                continue
+        return _FIN
+
+    def _log(self, msg: str) -> None:
+        self._poner(self._cola_escritura, msg)
+
+    # ── Consumo desde el thread que escribe ───────────────────────────────────
+
+    def lotes(self) -> Iterator[List[Union[str, NormaEnCurso]]]:
+        """
+        Inicia las etapas y entrega lo que está listo para escribir, de a
+        hasta `lote` elementos: NormaEnCurso o mensajes de log (str). Sin
+        nada listo entrega [] cada ~0.5s para que el llamador pueda revisar
+        si se canceló. Cerrar el generador detiene las etapas.
+        """
+        self._iniciar()
+        try:
+            while True:
+                try:
+                    primero = self._cola_escritura.get(timeout=0.5)
+                except queue.Empty:
+                    yield []
+                    continue
+
+                lote = [primero]
+                while len(lote) < self.lote and lote[-1] is not _FIN:
+                    try:
+                        lote.append(self._cola_escritura.get_nowait())
+                    except queue.Empty:
+                        break
+
+                terminado = lote[-1] is _FIN
+                self._entregado = [item for item in lote if item is not _FIN]
+                if self._entregado:
+                    yield self._entregado
+                if terminado:
+                    return
+        finally:
+            self.detener()
+
+    def detener(self) -> None:
+        """Detiene las etapas y borra los temporales de lo que no se guardó."""
+        self._detener.set()
+        for hilo in self._hilos:
+            hilo.join()
+        self._hilos = []
+
+        pendientes = list(self._entregado)
+        for cola in (self._cola_parseo, self._cola_escritura):
+            while True:
+                try:
+                    pendientes.append(cola.get_nowait())
+                except queue.Empty:
+                    break
+        for item in pendientes:
+            if isinstance(item, NormaEnCurso):
+                item.descartar()
+
+    def _iniciar(self) -> None:
+        for nombre, destino in (
+            ("sync-descarga", self._etapa_descarga),
+            ("sync-parseo", self._etapa_parseo),
+        ):
+            hilo = threading.Thread(target=destino, name=nombre, daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+
+    # ── Etapa 1: descarga ─────────────────────────────────────────────────────
+
+    def _abrir_descargas(self, desde: int):
+        from bcn_client import iter_normas_completas
+
+        pendientes = [n["id"] for n in self.normas[desde:]]
+        if self.concurrencia > 1:
+            return iter_normas_completas(
+                pendientes,
+                max_concurrencia=self.concurrencia,
+                revalidar=self.revalidar,
+                en_bytes=True,
+                rate_limiter=self.limiter,
+                circuit_breaker=self.client.breaker,
+                propagar_circuito=True,
+            )
+        return (
+            (nid, self.client.get_norma_completa(nid, revalidar=self.revalidar, en_bytes=True))
+            for nid in pendientes
+        )
+
+    def _clasificar(self, norma_info: Dict, nid: int, xml) -> NormaEnCurso:
+        """Resuelve sin parsear las normas que no cambiaron o no llegaron."""
+        from bcn_client import NO_MODIFICADA
+
+        norma = NormaEnCurso(nid=nid, norma_info=norma_info)
+        if xml is NO_MODIFICADA and nid in self.hashes:
+            norma.resultado, norma.motivo = "sin_cambios", "304"
+            return norma
+        if xml is NO_MODIFICADA:
+            # 304 pero la norma no está en la DB: se procesa la copia en caché
+            xml = self.client.get_norma_completa(nid, en_bytes=True)
+        if not xml:
+            norma.resultado, norma.motivo = "error", "Sin respuesta XML"
+            return norma
+
+        hash_xml = self.client.hash_norma(nid)
+        if hash_xml is None:
+            hash_xml = hashlib.md5(
+                xml if isinstance(xml, bytes) else xml.encode("utf-8")
+            ).hexdigest()
+        if self.hashes.get(nid) == hash_xml:
+            norma.resultado, norma.motivo = "sin_cambios", "hash"
+            return norma
+
+        norma.xml, norma.hash_xml = xml, hash_xml
+        return norma
+
+    def _etapa_descarga(self) -> None:
+        from utils.circuit_breaker import CircuitoAbierto
+
+        total = len(self.normas)
+        entregadas = 0
+        pausas = 0
+        ultima_pausa_en = -1
+        try:
+            while entregadas < total and not self._detener.is_set():
+                descargas = self._abrir_descargas(entregadas)
+                try:
+                    for norma_info, (nid, xml) in zip(self.normas[entregadas:], descargas):
+                        norma = self._clasificar(norma_info, nid, xml)
+                        cola = self._cola_escritura if norma.resultado else self._cola_parseo
+                        if not self._poner(cola, norma):
+                            return
+                        entregadas += 1
+
+                except CircuitoAbierto as e:
+                    # Las pausas se cuentan seguidas: si hubo avance desde la última, se reinicia
+                    pausas = pausas + 1 if entregadas == ultima_pausa_en else 1
+                    ultima_pausa_en = entregadas
+                    if pausas > self.pausas_circuito:
+                        self.error = str(e)
+                        self._log(f"[red]{e} — sync abortado en {entregadas}/{total}.[/red]")
+                        return
+                    espera = self.client.breaker.reintentar_en() or 0.0
+                    self._log(
+                        f"[yellow]BCN no responde — pausa {pausas}: "
+                        f"reintento en {espera:.0f}s[/yellow]"
+                    )
+                    self._detener.wait(espera)
+                finally:
+                    # Detiene las descargas adelantadas si el loop terminó antes
+                    descargas.close()
+
+        except Exception as e:
+            logger.exception("Error en la etapa de descarga")
+            self.error = str(e)
+            self._log(f"[red]Error descargando normas: {e}[/red]")
+        finally:
+            self._poner(self._cola_parseo, _FIN)
+
+    # ── Etapa 2: parseo ───────────────────────────────────────────────────────
+
+    def _etapa_parseo(self) -> None:
+        from utils.norm_parser import texto_plano
+
+        # parse_many con ordenado=False devuelve en cualquier orden: se
+        # identifica cada norma por su posición de llegada, no por el id
+        en_curso: Dict[int, NormaEnCurso] = {}
+
+        def entradas():
+            secuencia = 0
+            while True:
+                norma = self._tomar(self._cola_parseo)
+                if norma is _FIN:
+                    return
+                if len(norma.xml) >= UMBRAL_MARKDOWN_STREAMING:
+                    # Fuera del pool: el Markdown va en streaming a md_dir
+                    if not self._poner(self._cola_escritura, self._parsear_aca(norma)):
+                        norma.descartar()
+                        return
+                    continue
+                secuencia += 1
+                en_curso[secuencia] = norma
+                yield secuencia, norma.xml
+
+        try:
+            resultados = self.parser.parse_many(
+                entradas(),
+                procesos=self.procesos,
+                chunksize=4,
+                ordenado=False,
+                con_indice=True,
+            )
+            try:
+                for secuencia, markdown, metadata, articulos in resultados:
+                    norma = en_curso.pop(secuencia)
+                    if markdown is None:
+                        norma.resultado, norma.motivo = "error", str(metadata)
+                    else:
+                        norma.markdown, norma.metadata, norma.articulos = markdown, metadata, articulos
+                        norma.contenido = texto_plano(markdown)
+                    if not self._poner(self._cola_escritura, norma):
+                        return
+            finally:
+                resultados.close()
+
+        except Exception as e:
+            logger.exception("Error en la etapa de parseo")
+            self.error = str(e)
+            self._log(f"[red]Error parseando normas: {e}[/red]")
+        finally:
+            self._poner(self._cola_escritura, _FIN)
+
+    def _parsear_aca(self, norma: NormaEnCurso) -> NormaEnCurso:
+        try:
+            return parsear_norma(norma, self.parser, self.md_dir)
+        except Exception as e:
+            norma.resultado, norma.motivo = "error", str(e)
+            return norma
@@ -0,0 +1,297 @@
+"""
+Refresco de estado de normas usando solo el endpoint de metadatos.
+
+Un sync completo descarga y hashea el XML de cada norma aunque casi ninguna
+haya cambiado. Este modo consulta los metadatos (opt=4546, unos pocos KB por
+norma) de todas las normas ya guardadas de una institución y:
+
+    1. Actualiza en bloque estado (vigente/derogada), título, fechas y
+       metadata EAV (materias, organismos) de las que cambiaron, incluidas
+       las que además se descargan.
+    2. Encola la descarga completa solo de las normas cuya metadata indica un
+       cambio real del texto o de la vigencia:
+           - fechaVersion distinta a la guardada (nueva versión del texto)
+           - cambio de estado (derogación o restitución)
+       Cambios de título/fechas/materias se resuelven sin bajar el XML.
+
+Los metadatos se piden con GET condicional: las normas para las que la BCN
+responde 304 cuentan como "sin_cambios" sin parsear nada. Por eso, las normas
+con cambio real cuyo XML no se llegó a guardar pierden sus metadatos en caché.
+
+Como services.sync, la función no abre ni cierra conexiones.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.sync import LogCallback, ProgressCallback, _procesar_norma
+
+logger = logging.getLogger(__name__)
+
+# Campos de la tabla normas que el refresco compara contra los metadatos
+CAMPOS_ESTADO = ("titulo", "estado", "fecha_publicacion", "fecha_promulgacion")
+
+
+@dataclass
+class RefreshStats:
+    """Resultado de un refresco de estado."""
+
+    revisadas: int = 0
+    sin_cambios: int = 0
+    actualizadas: int = 0  # solo cambió metadata: actualizada sin descargar el XML
+    descargadas: int = 0  # cambio real → XML completo nuevo guardado
+    errores: int = 0
+    cancelada: bool = False
+    circuito: str = "cerrado"  # estado del circuit breaker al terminar
+    aperturas_circuito: int = 0
+    error: Optional[str] = None  # motivo si el refresco se abortó
+
+    def as_dict(self) -> Dict:
+        return {
+            "revisadas": self.revisadas,
+            "sin_cambios": self.sin_cambios,
+            "actualizadas": self.actualizadas,
+            "descargadas": self.descargadas,
+            "errores": self.errores,
+            "cancelada": self.cancelada,
+            "circuito": self.circuito,
+            "aperturas_circuito": self.aperturas_circuito,
+            "error": self.error,
+        }
+
+    def resumen(self) -> str:
+        sufijo = " (cancelada)" if self.cancelada else ""
+        if self.error:
+            sufijo = f" (abortado: {self.error})"
+        return (
+            f"{self.revisadas} revisadas: {self.sin_cambios} sin cambios, "
+            f"{self.actualizadas} actualizadas, {self.descargadas} descargadas, "
+            f"{self.errores} errores{sufijo}"
+        )
+
+
+def refresh_estado_institucion(
+    inst_id: int,
+    managers: dict,
+    on_progress: Optional[ProgressCallback] = None,
+    on_log: Optional[LogCallback] = None,
+    cancelado: Optional[Callable[[], bool]] = None,
+    concurrencia: int = 1,
+    descargar: bool = True,
+) -> RefreshStats:
+    """
+    Refresca el estado de todas las normas guardadas de una institución.
+
+    Args:
+        inst_id:      ID de la institución en BCN.
+        managers:     Dict con keys: conn, normas, metadata, logger.
+        on_progress:  (procesadas, total, id_norma, resultado) -> None, con
+                      resultado "sin_cambios" | "actualizada" | "cambio" | "error".
+        on_log:       Callback para mensajes de texto.
+        cancelado:    Callable que devuelve True si el llamador quiere abortar.
+        concurrencia: Requests simultáneas de metadatos a la BCN.
+        descargar:    Si es False solo se informan los cambios reales, sin
+                      descargar el XML completo.
+
+    Si la BCN se cae (circuit breaker abierto) el refresco se aborta: se
+    guardan los cambios de metadata ya detectados, no se descarga nada y el
+    motivo queda en RefreshStats.error.
+
+    Returns:
+        RefreshStats con el resultado de la operación.
+    """
+    from bcn_client import NO_MODIFICADA, BCNClient, iter_normas_metadatos
+    from utils.circuit_breaker import CircuitoAbierto
+    from utils.norm_parser import BCNXMLParser
+    from utils.rate_limit import AIMDRateLimiter
+
+    def log(msg: str) -> None:
+        logger.info(msg)
+        if on_log:
+            on_log(msg)
+
+    stats = RefreshStats()
+    limiter = AIMDRateLimiter()
+    client = BCNClient(rate_limiter=limiter, propagar_circuito=True)
+    parser = BCNXMLParser()
+    con_cambio: List[int] = []
+    reprocesadas: set = set()
+
+    try:
+        guardadas = managers["normas"].get_estado_by_institucion(inst_id)
+        if not guardadas:
+            log("[yellow]La institución no tiene normas guardadas.[/yellow]")
+            return stats
+
+        ids = list(guardadas)
+        total = len(ids)
+        materias = managers["metadata"].get_valores_by_normas(ids, "materia")
+        log(f"Revisando metadatos de {total} normas...")
+
+        if concurrencia > 1:
+            descargas = iter_normas_metadatos(
+                ids,
+                max_concurrencia=concurrencia,
+                revalidar=True,
+                en_bytes=True,
+                rate_limiter=limiter,
+                circuit_breaker=client.breaker,
+                propagar_circuito=True,
+            )
+        else:
+            descargas = (
+                (nid, client.get_norma_metadatos(nid, revalidar=True, en_bytes=True))
+                for nid in ids
+            )
+
+        actualizar: List[Dict] = []
+        # (id_norma, estado, tipo_descarga, error) para un solo log_many
+        registros: List[Tuple] = []
+
+        try:
+            for i, (nid, xml) in enumerate(descargas, 1):
+                if cancelado and cancelado():
+                    log("[yellow]Refresco cancelado por el usuario.[/yellow]")
+                    stats.cancelada = True
+                    break
+
+                stats.revisadas += 1
+                resultado = "sin_cambios"
+
+                if xml is NO_MODIFICADA:
+                    stats.sin_cambios += 1
+                elif not xml:
+                    registros.append((nid, "error", "metadatos", "Sin respuesta XML"))
+                    log(f"[red]✗ #{nid} sin respuesta de metadatos[/red]")
+                    stats.errores += 1
+                    resultado = "error"
+                else:
+                    try:
+                        parsed = parser.parse_metadata(xml).to_parsed_data()
+                    except Exception as e:
+                        registros.append((nid, "error", "metadatos", str(e)))
+                        log(f"[red]✗ #{nid} {str(e)[:72]}[/red]")
+                        stats.errores += 1
+                        resultado = "error"
+                    else:
+                        guardada = guardadas[nid]
+                        if _cambio_real(guardada, parsed):
+                            # El estado se actualiza ya, aunque la descarga
+                            # falle o no se pida; fecha_version no se toca
+                            # y el cambio se vuelve a detectar hasta bajar el
+                            # XML (ver la invalidación del caché al final)
+                            actualizar.append({"id_norma": nid, "parsed_data": parsed})
+                            con_cambio.append(nid)
+                            resultado = "cambio"
+                        elif _cambio_metadata(guardada, materias.get(nid, []), parsed):
+                            actualizar.append({"id_norma": nid, "parsed_data": parsed})
+                            stats.actualizadas += 1
+                            resultado = "actualizada"
+                        else:
+                            stats.sin_cambios += 1
+
+                if on_progress:
+                    on_progress(i, total, nid, resultado)
+        except CircuitoAbierto as e:
+            stats.error = str(e)
+            log(f"[red]{e} — refresco abortado en {stats.revisadas}/{total}.[/red]")
+        finally:
+            descargas.close()
+
+        # ── Cambios solo de metadata: un UPDATE en bloque y un INSERT de log ───
+        try:
+            if actualizar:
+                actualizadas = managers["normas"].update_estado_many(actualizar)
+                registros.extend(
+                    (cambio["id_norma"], "exitosa", "metadatos", None) for cambio in actualizar
+                )
+                log(f"{actualizadas} normas actualizadas desde metadatos")
+        finally:
+            managers["logger"].log_many(registros)
+
+        # ── Cambios reales: descarga completa solo de esas normas ──────────────
+        if con_cambio and (not descargar or stats.error):
+            log(
+                f"[yellow]{len(con_cambio)} normas con cambios reales "
+                f"(sin descargar): {', '.join(map(str, con_cambio[:20]))}[/yellow]"
+            )
+        elif con_cambio:
+            log(f"Descargando {len(con_cambio)} normas con cambios reales...")
+            for nid in con_cambio:
+                if cancelado and cancelado():
+                    stats.cancelada = True
+                    break
+
+                try:
+                    xml = client.get_norma_completa(nid, revalidar=True, en_bytes=True)
+                    if xml is NO_MODIFICADA:
+                        # El caché del XML ya estaba al día: se reprocesa esa copia
+                        xml = client.get_norma_completa(nid, en_bytes=True)
+                except CircuitoAbierto as e:
+                    stats.error = str(e)
+                    log(f"[red]{e} — descargas abortadas.[/red]")
+                    break
+
+                resultado = _procesar_norma(
+                    nid=nid,
+                    norma_info={"id_tipo": guardadas[nid]["id_tipo"]},
+                    xml=xml,
+                    inst_id=inst_id,
+                    managers=managers,
+                    parser=parser,
+                    force=False,
+                    log=log,
+                    hash_xml=client.hash_norma(nid),
+                )
+                if resultado == "error":
+                    stats.errores += 1
+                    continue
+                reprocesadas.add(nid)
+                if resultado == "sin_cambios":
+                    # La metadata cambió pero el XML es el mismo ya guardado
+                    stats.sin_cambios += 1
+                else:
+                    stats.descargadas += 1
+
+        log(f"Completado: {stats.resumen()}")
+
+    finally:
+        # Los metadatos de las normas con cambio real quedaron en caché con
+        # su ETag: si el XML no se guardó, el próximo refresco recibiría un
+        # 304 y las contaría como "sin_cambios" para siempre
+        pendientes = [nid for nid in con_cambio if nid not in reprocesadas]
+        if pendientes:
+            client.invalidar_metadatos(pendientes)
+        client.close()
+        circuito = client.breaker.estado()
+        stats.circuito = circuito["estado"]
+        stats.aperturas_circuito = circuito["aperturas"]
+
+    return stats
+
+
+def _cambio_real(guardada: Dict, parsed: Dict) -> bool:
+    """
+    True si la metadata indica que cambió el texto o la vigencia de la norma.
+
+    Una fecha_version NULL en la DB (normas guardadas antes de registrarla)
+    no cuenta como cambio: update_estado_many() solo la completa.
+    """
+    version_guardada = guardada.get("fecha_version")
+    version_nueva = parsed.get("fecha_version")
+    if version_guardada and version_nueva and version_nueva != version_guardada:
+        return True
+
+    return guardada.get("estado") != parsed.get("estado")
+
+
+def _cambio_metadata(guardada: Dict, materias: List[str], parsed: Dict) -> bool:
+    """True si cambió algún campo que se puede actualizar sin descargar el XML."""
+    if any(guardada.get(campo) != parsed.get(campo) for campo in CAMPOS_ESTADO):
+        return True
+    if guardada.get("fecha_version") is None and parsed.get("fecha_version"):
+        return True
+    return sorted(materias) != sorted(parsed.get("materias") or [])
@@ -0,0 +1,196 @@
+"""
+Reprocesamiento offline de normas ya guardadas.
+
+Cuando cambia BCNXMLParser o Norm.to_parsed_data, el Markdown en data/md, la
+metadata EAV, el índice de artículos, el texto de búsqueda (normas_texto) y
+las columnas derivadas (título, estado, fechas) quedan desactualizados
+aunque el XML sea el mismo. Este modo los regenera sin ir a la BCN:
+
+    1. Selecciona las normas guardadas (filtros por institución, tipo y
+       rango de fecha_publicacion).
+    2. Lee el XML de xml_dir (normas.xml_path) o, si ya no está en disco,
+       del caché del BCNClient.
+    3. Parsea en un ProcessPoolExecutor (BCNXMLParser.parse_many); las rutas
+       las leen los propios workers.
+    4. Reescribe el Markdown y guarda las filas en bloques de `lote` normas,
+       una transacción por bloque (NormsManager.update_reprocesadas).
+
+No se archivan versiones ni cambia hash_xml: el XML es el mismo.
+Como services.sync, la función no abre ni cierra conexiones.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from services.sync import LogCallback, ProgressCallback
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReprocessStats:
+    """Resultado de un reprocesamiento."""
+
+    reprocesadas: int = 0
+    sin_xml: int = 0  # ni en xml_dir ni en caché
+    errores: int = 0
+    segundos: float = 0.0
+    cancelada: bool = False
+
+    @property
+    def docs_por_segundo(self) -> float:
+        return self.reprocesadas / self.segundos if self.segundos else 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            "reprocesadas": self.reprocesadas,
+            "sin_xml": self.sin_xml,
+            "errores": self.errores,
+            "segundos": round(self.segundos, 2),
+            "docs_por_segundo": round(self.docs_por_segundo, 1),
+            "cancelada": self.cancelada,
+        }
+
+    def resumen(self) -> str:
+        sufijo = " (cancelada)" if self.cancelada else ""
+        return (
+            f"{self.reprocesadas} reprocesadas, {self.sin_xml} sin XML, "
+            f"{self.errores} errores en {self.segundos:.1f}s "
+            f"({self.docs_por_segundo:.1f} docs/s){sufijo}"
+        )
+
+
+def reprocesar_normas(
+    managers: dict,
+    id_institucion: Optional[int] = None,
+    tipo: Optional[str] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    limit: Optional[int] = None,
+    procesos: Optional[int] = None,
+    lote: int = 200,
+    on_progress: Optional[ProgressCallback] = None,
+    on_log: Optional[LogCallback] = None,
+    cancelado: Optional[Callable[[], bool]] = None,
+) -> ReprocessStats:
+    """
+    Regenera Markdown, metadata e índice de artículos desde el XML guardado.
+
+    Args:
+        managers:       Dict con keys: conn, normas, logger.
+        id_institucion: Solo normas asociadas a esta institución.
+        tipo:           Nombre o abreviatura del tipo (ILIKE, como get_by_type).
+        desde, hasta:   Rango de fecha_publicacion.
+        limit:          Máximo de normas a reprocesar.
+        procesos:       Workers del pool de parseo. None = todos los núcleos.
+        lote:           Normas por transacción.
+        on_progress:    (procesadas, total, id_norma, resultado) -> None, con
+                        resultado "reprocesada" | "sin_xml" | "error".
+        on_log:         Callback para mensajes de texto.
+        cancelado:      Callable que devuelve True si el llamador quiere abortar.
+
+    Returns:
+        ReprocessStats con el resultado y el throughput en docs/s.
+    """
+    from bcn_client import BCNClient
+    from utils.norm_parser import BCNXMLParser, texto_plano
+
+    def log(msg: str) -> None:
+        logger.info(msg)
+        if on_log:
+            on_log(msg)
+
+    stats = ReprocessStats()
+    normas = managers["normas"].get_para_reprocesar(
+        id_institucion=id_institucion, tipo=tipo, desde=desde, hasta=hasta, limit=limit
+    )
+    if not normas:
+        log("[yellow]No hay normas guardadas que cumplan los filtros.[/yellow]")
+        return stats
+
+    total = len(normas)
+    md_dir: Path = managers["normas"].md_dir
+    parser = BCNXMLParser()
+    client: Optional[BCNClient] = None
+    procesadas = 0
+
+    def avanzar(nid: int, resultado: str) -> None:
+        nonlocal procesadas
+        procesadas += 1
+        if on_progress:
+            on_progress(procesadas, total, nid, resultado)
+
+    def con_xml() -> Iterator:
+        # Las rutas las abre el worker; del caché se leen acá solo las que faltan
+        nonlocal client
+        for norma in normas:
+            ruta = Path(norma["xml_path"]) if norma["xml_path"] else None
+            if ruta is not None and ruta.exists():
+                yield norma["id"], ruta
+                continue
+
+            if client is None:
+                client = BCNClient()
+            xml = client.get_norma_en_cache(norma["id"], en_bytes=True)
+            if xml is None:
+                stats.sin_xml += 1
+                avanzar(norma["id"], "sin_xml")
+                continue
+            yield norma["id"], xml
+
+    log(f"Reprocesando {total} normas desde el XML guardado...")
+    inicio = time.perf_counter()
+    pendientes: List[Dict] = []
+
+    try:
+        parseadas = parser.parse_many(con_xml(), procesos=procesos, con_indice=True)
+        try:
+            for nid, markdown, metadata, articulos in parseadas:
+                if cancelado and cancelado():
+                    log("[yellow]Reprocesamiento cancelado por el usuario.[/yellow]")
+                    stats.cancelada = True
+                    break
+
+                if markdown is None:
+                    managers["logger"].log(nid, "error", "reproceso", str(metadata))
+                    log(f"[red]✗ #{nid} {str(metadata)[:72]}[/red]")
+                    stats.errores += 1
+                    avanzar(nid, "error")
+                    continue
+
+                md_path = md_dir / f"{nid}.md"
+                tmp = md_path.with_suffix(".md.tmp")
+                tmp.write_text(markdown, encoding="utf-8")
+                os.replace(tmp, md_path)
+
+                pendientes.append(
+                    {
+                        "id_norma": nid,
+                        "parsed_data": metadata.to_parsed_data(texto_plano(markdown)),
+                        "md_path": md_path,
+                        "articulos": articulos,
+                    }
+                )
+                if len(pendientes) >= lote:
+                    stats.reprocesadas += managers["normas"].update_reprocesadas(pendientes)
+                    pendientes = []
+                avanzar(nid, "reprocesada")
+        finally:
+            parseadas.close()
+
+        stats.reprocesadas += managers["normas"].update_reprocesadas(pendientes)
+
+    finally:
+        stats.segundos = time.perf_counter() - inicio
+        if client is not None:
+            client.close()
+
+    log(f"Completado: {stats.resumen()}")
+    return stats
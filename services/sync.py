@@ -9,10 +9,30 @@ Consumidores:
 
 Flujo:
     1. Obtener lista de normas de la BCN para la institución
-    2. Registrar tipos en batch
-    3. Por cada norma: descargar XML → parsear → save + metadata EAV → log DB
-    4. Emitir eventos de progreso vía callbacks opcionales
-    5. Devolver SyncStats
+    2. Sync incremental: comparar el listado con el snapshot del último sync
+       (managers["listados"]) y dejar en cola solo las entradas nuevas, las
+       cambiadas y una muestra rotativa de las demás
+    3. Registrar tipos en batch
+    4. Pipeline por etapas (services.pipeline), unidas por colas acotadas:
+         descarga  → thread con BCNClient, o AsyncBCNClient con
+                     concurrencia > 1. Las normas ya guardadas se revalidan
+                     con un GET condicional: un 304, o un 200 cuyo md5
+                     coincide con los hashes precargados (una consulta por
+                     sync), cuentan como "sin_cambios" sin parsear nada.
+                     La tasa la regula un AIMDRateLimiter compartido, y si
+                     la BCN se cae el circuit breaker pausa la etapa hasta
+                     el próximo sondeo, o aborta tras `pausas_circuito`.
+         parseo    → BCNXMLParser.parse_many con `procesos` workers.
+         escritura → este thread: NormsManager.save_many, una
+                     transacción por lote de hasta `lote` normas (filas,
+                     metadata EAV, texto, artículos y registro de
+                     descargas). Mientras se escribe ya se descargan y
+                     parsean las siguientes.
+    5. Emitir eventos de progreso vía callbacks opcionales (siempre desde el
+       thread que llamó a sync_institucion)
+    6. Guardar en el snapshot las entradas sincronizadas y, si el sync
+       terminó, la marca del último sync
+    7. Devolver SyncStats
 
 La función no abre ni cierra conexiones — recibe los managers ya construidos
 para que cada interfaz controle el ciclo de vida de su conexión.
@@ -21,8 +41,13 @@ para que cada interfaz controle el ciclo de vida de su conexión.
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass, field
-from typing import Callable, Dict, List, Optional
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+
+from services.pipeline import NormaEnCurso, SyncPipeline, parsear_norma
 
 logger = logging.getLogger(__name__)
 
@@ -44,7 +69,14 @@ class SyncStats:
     actualizadas: int = 0
     sin_cambios: int = 0
     errores: int = 0
+    omitidas: int = 0  # sin cambios en el listado: no se descargaron
     cancelada: bool = False
+    tasa_bcn: Optional[float] = None  # req/s del rate limiter al terminar
+    reducciones_tasa: int = 0
+    circuito: str = "cerrado"  # estado del circuit breaker al terminar
+    aperturas_circuito: int = 0
+    error: Optional[str] = None  # motivo si el sync se abortó
+    listado_incompleto: bool = False  # el listado de la BCN se cortó a mitad
 
     @property
     def total_procesadas(self) -> int:
@@ -56,18 +88,73 @@ class SyncStats:
             "actualizadas": self.actualizadas,
             "sin_cambios": self.sin_cambios,
             "errores": self.errores,
+            "omitidas": self.omitidas,
             "total_procesadas": self.total_procesadas,
             "cancelada": self.cancelada,
+            "tasa_bcn": self.tasa_bcn,
+            "reducciones_tasa": self.reducciones_tasa,
+            "circuito": self.circuito,
+            "aperturas_circuito": self.aperturas_circuito,
+            "error": self.error,
+            "listado_incompleto": self.listado_incompleto,
         }
 
     def resumen(self) -> str:
         sufijo = " (cancelada)" if self.cancelada else ""
+        if self.listado_incompleto:
+            sufijo += " (listado incompleto)"
+        if self.error:
+            sufijo = f" (abortada: {self.error})"
+        omitidas = f", {self.omitidas} omitidas" if self.omitidas else ""
         return (
             f"{self.nuevas} nuevas, {self.actualizadas} actualizadas, "
-            f"{self.sin_cambios} sin cambios, {self.errores} errores{sufijo}"
+            f"{self.sin_cambios} sin cambios, {self.errores} errores{omitidas}{sufijo}"
         )
 
 
+@dataclass
+class PlanListado:
+    """Diff del listado de la BCN contra el snapshot del último sync."""
+
+    nuevas: List[Dict]
+    cambiadas: List[Dict]
+    muestra: List[Dict]
+    cola: List[Dict]  # las tres anteriores, en el orden del listado
+    omitidas: int
+
+
+def planificar_listado(
+    normas: List[Dict], snapshot: Dict[int, Dict], muestra: int
+) -> PlanListado:
+    """
+    Decide qué normas del listado hay que descargar: las que no están en el
+    snapshot, las cuyo <NORMA> cambió (hash_entrada) y `muestra` de las
+    demás, empezando por las verificadas hace más tiempo. Como cada sync
+    actualiza verificado_en, la muestra rota por todo el listado.
+    """
+    nuevas, cambiadas, iguales = [], [], []
+    for norma in normas:
+        previa = snapshot.get(norma["id"])
+        if previa is None:
+            nuevas.append(norma)
+        elif previa["hash_entrada"] != norma.get("hash_entrada"):
+            cambiadas.append(norma)
+        else:
+            iguales.append(norma)
+
+    iguales.sort(key=lambda n: (snapshot[n["id"]]["verificado_en"] or datetime.min, n["id"]))
+    elegidas = iguales[: max(muestra, 0)]
+
+    en_cola = {n["id"] for n in nuevas + cambiadas + elegidas}
+    return PlanListado(
+        nuevas=nuevas,
+        cambiadas=cambiadas,
+        muestra=elegidas,
+        cola=[n for n in normas if n["id"] in en_cola],
+        omitidas=len(iguales) - len(elegidas),
+    )
+
+
 def sync_institucion(
     inst_id: int,
     managers: dict,
@@ -76,13 +163,21 @@ def sync_institucion(
     on_progress: Optional[ProgressCallback] = None,
     on_log: Optional[LogCallback] = None,
     cancelado: Optional[Callable[[], bool]] = None,
+    concurrencia: Optional[int] = None,
+    pausas_circuito: int = 3,
+    procesos: Optional[int] = None,
+    lote: int = 50,
+    capacidad: int = 32,
+    incremental: bool = True,
+    muestra: Optional[int] = None,
 ) -> SyncStats:
     """
     Sincroniza todas las normas de una institución a la base de datos.
 
     Args:
         inst_id:     ID de la institución en BCN.
-        managers:    Dict con keys: conn, normas, tipos, metadata, logger.
+        managers:    Dict con keys: conn, normas, tipos, metadata, logger y,
+                     opcional, listados (sin él no hay sync incremental).
                      La función no abre ni cierra la conexión.
         limit:       Máximo de normas a procesar. None = todas.
         force:       Re-guardar aunque el XML no haya cambiado.
@@ -91,33 +186,100 @@ def sync_institucion(
         on_log:      Callback para mensajes de texto durante el proceso.
                      Firma: (msg: str) -> None
         cancelado:   Callable que devuelve True si el llamador quiere abortar.
-                     La función lo consulta antes de cada norma.
+                     La función lo consulta antes de guardar cada lote.
+        concurrencia: Requests simultáneas a la BCN (etapa de descarga). Con 1
+                     se descarga norma a norma; con más, vía AsyncBCNClient.
+                     None = BCN_SYNC_CONCURRENCIA, o 1.
+        pausas_circuito: Veces que se espera a que la BCN vuelva cuando el
+                     circuit breaker se abre, antes de abortar. 0 = abortar
+                     al primer corte.
+        procesos:    Workers de la etapa de parseo. Con 1 se parsea en un
+                     thread, sin pool. None = BCN_SYNC_PROCESOS, o 1.
+        lote:        Máximo de normas que la etapa de escritura toma por vuelta
+                     y guarda en una misma transacción.
+        capacidad:   Tamaño de cada cola entre etapas (backpressure).
+        incremental: Comparar el listado contra el snapshot del último sync
+                     y descargar solo las entradas nuevas o cambiadas, más
+                     una muestra rotativa. Sin efecto con force.
+        muestra:     Entradas sin cambios que se revalidan igual en cada sync,
+                     las verificadas hace más tiempo (detecta cambios que el
+                     listado no refleja). None = BCN_SYNC_MUESTRA, o 20.
 
     Returns:
         SyncStats con el resultado de la operación.
     """
-    from bcn_client import BCNClient
+    from bcn_client import BCNClient, ListadoIncompleto
+    from utils.circuit_breaker import CircuitoAbierto
     from utils.norm_parser import BCNXMLParser
+    from utils.rate_limit import AIMDRateLimiter
 
     def log(msg: str) -> None:
         logger.info(msg)
         if on_log:
             on_log(msg)
 
+    if concurrencia is None:
+        concurrencia = int(os.getenv("BCN_SYNC_CONCURRENCIA", 1))
+    if procesos is None:
+        procesos = int(os.getenv("BCN_SYNC_PROCESOS", 1))
+    if muestra is None:
+        muestra = int(os.getenv("BCN_SYNC_MUESTRA", 20))
+
     stats = SyncStats()
-    client = BCNClient()
+    # Un único limitador para el listado y todas las descargas (sync o async)
+    limiter = AIMDRateLimiter()
+    client = BCNClient(rate_limiter=limiter, propagar_circuito=True)
     parser = BCNXMLParser()
 
     try:
+        if limiter.presupuesto is not None:
+            info = limiter.presupuesto.info()
+            log(
+                f"[dim]Presupuesto BCN compartido: {info['tasa_total']:.1f} req/s "
+                f"({info['consumidores']} procesos activos)[/dim]"
+            )
+
         log(f"Consultando normas de institución #{inst_id} en BCN...")
-        normas = client.get_normas_por_institucion(inst_id)
+        # El listado se lee en streaming: con limit se deja de descargar apenas
+        # se tienen las primeras `limit` normas.
+        normas: List[Dict] = []
+        try:
+            normas.extend(islice(client.iter_normas_institucion(inst_id), limit))
+        except CircuitoAbierto as e:
+            stats.error = str(e)
+            log(f"[red]{e}[/red]")
+            return stats
+        except ListadoIncompleto as e:
+            # Se sincroniza lo leído, pero sin podar el snapshot ni mover la marca
+            stats.listado_incompleto = True
+            log(f"[yellow]{e}[/yellow]")
 
         if not normas:
             log("[red]Sin normas disponibles en BCN para esta institución.[/red]")
             return stats
 
-        if limit:
-            normas = normas[:limit]
+        # ── Diff contra el listado del último sync ─────────────────────────────
+        listados = managers.get("listados")
+        listado = normas
+        muestreadas: Set[int] = set()
+        if listados is not None and incremental and not force:
+            marca = listados.get_marca(inst_id)
+            plan = planificar_listado(normas, listados.get_snapshot(inst_id), muestra)
+            normas = plan.cola
+            muestreadas = {n["id"] for n in plan.muestra}
+            stats.omitidas = plan.omitidas
+            desde = f"sync del {marca['ultimo_sync']:%Y-%m-%d %H:%M}" if marca else "snapshot"
+            log(
+                f"Listado vs. último {desde}: {len(plan.nuevas)} nuevas, "
+                f"{len(plan.cambiadas)} cambiadas, {len(plan.muestra)} de muestra, "
+                f"{plan.omitidas} sin cambios"
+            )
+
+        if not normas:
+            if not stats.listado_incompleto:
+                listados.cerrar_sync(inst_id, listado, completo=limit is None)
+            log(f"Completado: {stats.resumen()}")
+            return stats
 
         total = len(normas)
         log(f"{total} normas en cola")
@@ -135,97 +297,295 @@ def sync_institucion(
         if tipos:
             managers["tipos"].add_batch(list(tipos.values()))
 
-        # ── Loop principal ─────────────────────────────────────────────────────
-        for i, norma_info in enumerate(normas, 1):
-            if cancelado and cancelado():
-                log("[yellow]Sync cancelado por el usuario.[/yellow]")
-                stats.cancelada = True
-                break
-
-            nid = norma_info["id"]
-            resultado = _procesar_norma(
-                nid=nid,
-                norma_info=norma_info,
-                inst_id=inst_id,
-                managers=managers,
-                client=client,
-                parser=parser,
-                force=force,
-                log=log,
-            )
+        # ── Pipeline: descarga → parseo → escritura ────────────────────────────
+        # Sin force se revalida contra la BCN en vez de confiar en el caché;
+        # con force se reprocesa la copia local como antes.
+        revalidar = not force
+        # id → md5 del XML guardado; con force no se descarta nada
+        hashes = managers["normas"].get_hashes([n["id"] for n in normas]) if revalidar else {}
+
+        pipeline = SyncPipeline(
+            normas,
+            client=client,
+            limiter=limiter,
+            parser=parser,
+            md_dir=managers["normas"].md_dir,
+            hashes=hashes,
+            revalidar=revalidar,
+            concurrencia=concurrencia,
+            procesos=procesos,
+            lote=lote,
+            capacidad=capacidad,
+            pausas_circuito=pausas_circuito,
+        )
 
-            # Acumular stats
-            if resultado == "nueva":
-                stats.nuevas += 1
-            elif resultado == "actualizada":
-                stats.actualizadas += 1
-            elif resultado == "sin_cambios":
-                stats.sin_cambios += 1
-            else:
-                stats.errores += 1
+        # ── Escritura: en este thread, con lo que las etapas tengan listo ─────
+        en_backoff = False
+        procesadas = 0
+        por_id = {n["id"]: n for n in normas}
 
-            if on_progress:
-                on_progress(i, total, nid, resultado)
+        def fue_cancelado() -> bool:
+            if not stats.cancelada and cancelado and cancelado():
+                log("[yellow]Sync cancelado por el usuario.[/yellow]")
+                stats.cancelada = True
+            return stats.cancelada
+
+        lotes = pipeline.lotes()
+        try:
+            for listos in lotes:
+                if fue_cancelado():
+                    break
+
+                normas_lote = []
+                for item in listos:
+                    if isinstance(item, str):
+                        log(item)
+                    else:
+                        normas_lote.append(item)
+
+                escritas = _escribir_lote(normas_lote, inst_id, managers, force, lote, log)
+                if listados is not None:
+                    # Al snapshot solo lo guardado: los errores se reintentan
+                    listados.save_entradas(
+                        inst_id, [por_id[nid] for nid, r in escritas if r != "error"]
+                    )
+
+                for nid, resultado in escritas:
+                    if nid in muestreadas and resultado == "actualizada":
+                        log(f"[yellow]#{nid} cambió sin cambios en el listado (muestra)[/yellow]")
+
+                    # Acumular stats
+                    if resultado == "nueva":
+                        stats.nuevas += 1
+                    elif resultado == "actualizada":
+                        stats.actualizadas += 1
+                    elif resultado == "sin_cambios":
+                        stats.sin_cambios += 1
+                    else:
+                        stats.errores += 1
+
+                    procesadas += 1
+                    if on_progress:
+                        on_progress(procesadas, total, nid, resultado)
+
+                    en_backoff = _log_estado_tasa(limiter.estado(), en_backoff, procesadas, log)
+        finally:
+            # Detiene las etapas y borra los temporales de lo que no se guardó
+            lotes.close()
+
+        stats.error = pipeline.error
+        cerrar = not (stats.cancelada or stats.error or stats.listado_incompleto)
+        if listados is not None and cerrar:
+            listados.cerrar_sync(inst_id, listado, completo=limit is None)
 
         log(f"Completado: {stats.resumen()}")
 
     finally:
         client.close()
+        estado = limiter.estado()
+        stats.tasa_bcn = round(estado["tasa"], 2)
+        stats.reducciones_tasa = estado["reducciones"]
+        circuito = client.breaker.estado()
+        stats.circuito = circuito["estado"]
+        stats.aperturas_circuito = circuito["aperturas"]
 
     return stats
 
 
+def _log_estado_tasa(
+    estado: Dict, en_backoff: bool, procesadas: int, log: Callable[[str], None]
+) -> bool:
+    """
+    Informa la tasa del rate limiter cuando entra o sale de backoff, y cada
+    50 normas como referencia. Devuelve el nuevo valor de en_backoff.
+    """
+    if estado["en_backoff"] and not en_backoff:
+        log(
+            f"[yellow]BCN saturada — backoff {estado['backoff_restante']:.1f}s, "
+            f"tasa {estado['tasa']:.2f} req/s[/yellow]"
+        )
+    elif en_backoff and not estado["en_backoff"]:
+        log(f"[dim]Backoff terminado — tasa {estado['tasa']:.2f} req/s[/dim]")
+    elif procesadas % 50 == 0:
+        log(f"[dim]Tasa BCN: {estado['tasa']:.2f} req/s[/dim]")
+
+    return estado["en_backoff"]
+
+
+def _escribir_lote(
+    normas: List[NormaEnCurso],
+    inst_id: int,
+    managers: dict,
+    force: bool,
+    lote: int,
+    log: Callable[[str], None],
+) -> List[Tuple[int, str]]:
+    """
+    Etapa de escritura de un lote: las normas parseadas van a
+    NormsManager.save_many y el registro de descargas de todas (incluidas
+    las resueltas antes de parsear) entra en la misma transacción.
+
+    Devuelve [(id_norma, resultado)] en el orden de `normas`.
+    """
+    filas = []
+    registros = []
+    for norma in normas:
+        if norma.resultado == "sin_cambios":
+            registros.append((norma.nid, "sin_cambios", "sincronizacion", None))
+        elif norma.resultado == "error":
+            registros.append((norma.nid, "error", "sincronizacion", norma.motivo))
+        else:
+            try:
+                filas.append(_fila_norma(norma, inst_id, force))
+                continue
+            except Exception as e:
+                norma.resultado, norma.motivo = "error", str(e)
+            registros.append((norma.nid, "error", "sincronizacion", norma.motivo))
+
+    try:
+        guardadas = iter(
+            managers["normas"].save_many(
+                filas,
+                lote=lote,
+                descargas=managers["logger"],
+                tipo_descarga="sincronizacion",
+                registros=registros,
+            )
+        )
+    finally:
+        # save_many mueve los Markdown temporales a md_dir; si falló quedan acá
+        for norma in normas:
+            norma.descartar()
+
+    resultados = []
+    for norma in normas:
+        if norma.resultado == "sin_cambios":
+            log(f"[dim]✓ #{norma.nid} sin_cambios ({norma.motivo})[/]")
+            resultado = "sin_cambios"
+        elif norma.resultado == "error":
+            log(f"[red]✗ #{norma.nid} {norma.motivo[:72]}[/red]")
+            resultado = "error"
+        else:
+            resultado, error = next(guardadas)
+            _log_guardada(norma.nid, resultado, error, log)
+        resultados.append((norma.nid, resultado))
+
+    return resultados
+
+
+def _fila_norma(norma: NormaEnCurso, inst_id: int, force: bool) -> Dict:
+    """Argumentos de NormsManager.save (y fila de save_many) para una norma parseada."""
+    return {
+        "id_norma": norma.nid,
+        "xml_content": norma.xml,
+        # to_parsed_data() es la fuente de verdad — evita construir el dict a mano
+        "parsed_data": norma.metadata.to_parsed_data(norma.contenido),
+        "id_tipo": norma.norma_info.get("id_tipo"),
+        "id_institucion": inst_id,
+        "markdown": norma.markdown,
+        "force": force,
+        "hash_xml": norma.hash_xml,
+        "markdown_file": norma.markdown_file,
+        "articulos": norma.articulos,
+    }
+
+
+def _log_guardada(
+    nid: int, resultado: str, error: Optional[str], log: Callable[[str], None]
+) -> None:
+    if error:
+        log(f"[red]✗ #{nid} {error[:72]}[/red]")
+    else:
+        color = "green" if resultado == "nueva" else "cyan" if resultado == "actualizada" else "dim"
+        log(f"[{color}]✓ #{nid} {resultado}[/]")
+
+
+def _registrar_no_modificada(
+    nid: int, managers: dict, log: Callable[[str], None], motivo: str = "304"
+) -> str:
+    """
+    Norma ya guardada sin cambios: la BCN respondió 304 o el md5 del XML
+    coincide con el guardado. Nada que parsear ni escribir.
+    """
+    managers["logger"].log(nid, "sin_cambios", "sincronizacion")
+    log(f"[dim]✓ #{nid} sin_cambios ({motivo})[/]")
+    return "sin_cambios"
+
+
+def _escribir_norma(
+    norma: NormaEnCurso,
+    inst_id: int,
+    managers: dict,
+    force: bool,
+    log: Callable[[str], None],
+) -> str:
+    """Etapa de escritura: registra lo resuelto antes de parsear o guarda la norma."""
+    if norma.resultado == "sin_cambios":
+        return _registrar_no_modificada(norma.nid, managers, log, norma.motivo)
+    if norma.resultado == "error":
+        managers["logger"].log(norma.nid, "error", "sincronizacion", norma.motivo)
+        log(f"[red]✗ #{norma.nid} {norma.motivo[:72]}[/red]")
+        return "error"
+    return _guardar_norma(norma, inst_id, managers, force, log)
+
+
 def _procesar_norma(
     nid: int,
     norma_info: dict,
+    xml: Optional[Union[str, bytes]],
     inst_id: int,
     managers: dict,
-    client,
     parser,
     force: bool,
     log: Callable[[str], None],
+    hash_xml: Optional[str] = None,
 ) -> str:
     """
-    Descarga, parsea y guarda una norma individual.
+    Parsea y guarda una norma individual ya descargada, sin pipeline (lo usa
+    services.refresh para las pocas normas con cambios reales). `xml` puede
+    llegar como bytes del caché y `hash_xml` con el md5 calculado al
+    descargarlo: así el XML no se decodifica ni se hashea de nuevo.
 
     Devuelve el resultado: "nueva" | "actualizada" | "sin_cambios" | "error"
     """
-    try:
-        xml = client.get_norma_completa(nid)
+    norma = NormaEnCurso(nid=nid, norma_info=norma_info, xml=xml, hash_xml=hash_xml)
+    if not xml:
+        norma.resultado, norma.motivo = "error", "Sin respuesta XML"
+        return _escribir_norma(norma, inst_id, managers, force, log)
 
-        if not xml:
-            managers["logger"].log(nid, "error", "sincronizacion", "Sin respuesta XML")
-            log(f"[red]✗ #{nid} sin respuesta XML[/red]")
-            return "error"
+    try:
+        parsear_norma(norma, parser, managers["normas"].md_dir)
+    except Exception as e:
+        norma.resultado, norma.motivo = "error", str(e)
+    return _escribir_norma(norma, inst_id, managers, force, log)
 
-        markdown, metadata = parser.parse_from_string(xml)
 
-        # to_parsed_data() es la fuente de verdad — evita construir el dict a mano
-        parsed = metadata.to_parsed_data()
-
-        result = managers["normas"].save(
-            id_norma=nid,
-            xml_content=xml,
-            parsed_data=parsed,
-            id_tipo=norma_info.get("id_tipo"),
-            id_institucion=inst_id,
-            markdown=markdown,
-            force=force,
-        )
+def _guardar_norma(
+    norma: NormaEnCurso,
+    inst_id: int,
+    managers: dict,
+    force: bool,
+    log: Callable[[str], None],
+) -> str:
+    """
+    Guarda una norma ya parseada: fila, Markdown, índice de artículos, texto
+    de búsqueda y metadata EAV.
 
-        # Metadata EAV — solo cuando hay algo que escribir
-        if result in ("nueva", "actualizada"):
-            cursor = managers["conn"].cursor()
-            managers["metadata"].save(cursor, nid, parsed)
-            managers["conn"].commit()
-            cursor.close()
+    Devuelve el resultado: "nueva" | "actualizada" | "sin_cambios" | "error"
+    """
+    nid = norma.nid
+    try:
+        try:
+            result = managers["normas"].save(**_fila_norma(norma, inst_id, force))
+        finally:
+            # save() lo mueve a md_dir; si falló antes queda el temporal
+            norma.descartar()
 
         managers["logger"].log(nid, "exitosa", "sincronizacion")
-        log(f"[{'green' if result == 'nueva' else 'cyan' if result == 'actualizada' else 'dim'}]"
-            f"✓ #{nid} {result}[/]")
+        _log_guardada(nid, result, None, log)
         return result
 
     except Exception as e:
         managers["logger"].log(nid, "error", "sincronizacion", str(e))
         log(f"[red]✗ #{nid} {str(e)[:72]}[/red]")
-        return "error"
\ No newline at end of file
+        return "error"
@@ -0,0 +1,413 @@
+"""
+Servidor local que imita los endpoints de la BCN para benchmarks offline.
+
+Sirve un directorio de corpus con las mismas rutas que BCNClient.ENDPOINTS
+(opt=7 norma completa, opt=4546 metadatos, opt=6 listado por institución) y
+permite inyectar latencia, límite de ancho de banda, límite de requests por
+segundo y fallas (429, 5xx, timeouts, XML truncado) de forma
+reproducible con una semilla.
+
+Layout del corpus (todo opcional):
+    normas/<id>.xml         XML completo (también se aceptan <id>.xml en la raíz)
+    metadatos/<id>.xml      Metadatos; si falta se recorta el XML completo
+    instituciones/<id>.xml  Listado; si falta se arma con todas las normas
+    norma_completa.xml      Plantilla para cualquier id (formato de data/sample)
+    normas_institucion.xml  Listado para cualquier institución (data/sample)
+
+Uso desde tests:
+    with BCNStubServer("data/sample", fallas=Fallas(latencia=0.05)) as stub:
+        client = BCNClient(base_url=stub.url, cache_dir=tmp_path)
+
+Uso manual (para apuntar la CLI o el scheduler con BCN_BASE_URL):
+    python -m tests.bcn_stub data/sample --puerto 8765 --latencia 0.05 --prob-429 0.02
+    BCN_BASE_URL=http://127.0.0.1:8765 python bcn_cli.py normas sync 17
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+NS = {"bcn": "http://www.leychile.cl/esquemas"}
+
+
+@dataclass
+class Fallas:
+    """Comportamiento inyectado en cada request."""
+
+    latencia: float = 0.0  # segundos antes de responder
+    jitter: float = 0.0  # ± segundos aleatorios sobre la latencia
+    bytes_por_segundo: Optional[float] = None  # ancho de banda total del servidor
+    max_rps: Optional[float] = None  # sobre esta tasa se responde 429
+    prob_429: float = 0.0
+    prob_5xx: float = 0.0
+    prob_timeout: float = 0.0  # la request queda colgada y se corta sin respuesta
+    duracion_timeout: float = 35.0  # cuánto se cuelga (mayor al timeout del cliente)
+    retry_after: Optional[int] = None  # header Retry-After en los 429 inyectados
+    corte: Optional[float] = None  # fracción del cuerpo de un 200 que se envía (XML truncado)
+    seed: Optional[int] = None
+
+
+class Corpus:
+    """Resuelve el XML que corresponde a cada endpoint desde un directorio."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._listado_generado: Optional[bytes] = None
+        self._lock = threading.Lock()
+
+    def _leer(self, *candidatos: Path) -> Optional[bytes]:
+        for candidato in candidatos:
+            if candidato.is_file():
+                return candidato.read_bytes()
+        return None
+
+    def ids(self) -> List[int]:
+        ids = set()
+        for carpeta in (self.path / "normas", self.path):
+            if carpeta.is_dir():
+                ids.update(int(p.stem) for p in carpeta.glob("*.xml") if p.stem.isdigit())
+        return sorted(ids)
+
+    def norma(self, id_norma: int) -> Optional[bytes]:
+        xml = self._leer(self.path / "normas" / f"{id_norma}.xml", self.path / f"{id_norma}.xml")
+        if xml is not None:
+            return xml
+
+        plantilla = self._leer(self.path / "norma_completa.xml")
+        if plantilla is None:
+            return None
+        return re.sub(rb'normaId="\d+"', f'normaId="{id_norma}"'.encode(), plantilla, count=1)
+
+    def metadatos(self, id_norma: int) -> Optional[bytes]:
+        xml = self._leer(self.path / "metadatos" / f"{id_norma}.xml")
+        if xml is not None:
+            return xml
+
+        completa = self.norma(id_norma)
+        if completa is None:
+            return None
+        # Como opt=4546: raíz, Identificador y Metadatos, sin el articulado
+        fin = completa.find(b"</Metadatos>")
+        if fin < 0:
+            return completa
+        return completa[: fin + len(b"</Metadatos>")] + b"\n</Norma>\n"
+
+    def listado(self, id_institucion: int) -> Optional[bytes]:
+        xml = self._leer(
+            self.path / "instituciones" / f"{id_institucion}.xml",
+            self.path / "normas_institucion.xml",
+        )
+        if xml is not None:
+            return xml
+
+        # Sin listado propio todas las instituciones comparten el del corpus
+        with self._lock:
+            if self._listado_generado is None:
+                self._listado_generado = self._generar_listado(id_institucion)
+            return self._listado_generado
+
+    def _generar_listado(self, id_institucion: int) -> bytes:
+        partes = [
+            '<?xml version="1.0" encoding="utf-8" ?>\n',
+            f'<NORMAS_CONVENIO id_categoria="{id_institucion}">\n',
+        ]
+        for id_norma in self.ids():
+            root = ET.fromstring(self.norma(id_norma))
+            ident = root.find("bcn:Identificador", NS)
+            tipo = ident.findtext(".//bcn:Tipo", "", NS)
+            titulo = escape(root.findtext("bcn:Metadatos/bcn:TituloNorma", "", NS))
+            organismos = "".join(
+                f"<ORGANISMO>{escape(o.text or '')}</ORGANISMO>"
+                for o in ident.findall(".//bcn:Organismo", NS)
+            )
+            partes.append(
+                "<NORMA>"
+                f"<MATERIA>{titulo}</MATERIA>"
+                "<TIPOS_NUMEROS><TIPO_NUMERO>"
+                f"<TIPO>{zlib.crc32(tipo.encode()) % 1000}</TIPO>"
+                f"<NUMERO>{escape(ident.findtext('.//bcn:Numero', '', NS))}</NUMERO>"
+                f"<DESCRIPCION>{escape(tipo)}</DESCRIPCION>"
+                f"<ABREVIACION>{escape(tipo[:3].upper())}</ABREVIACION>"
+                "</TIPO_NUMERO></TIPOS_NUMEROS>"
+                f"<FECHA_PUBLICACION>{_fecha_listado(ident.get('fechaPublicacion'))}</FECHA_PUBLICACION>"
+                f"<FECHA_PROMULGACION>{_fecha_listado(ident.get('fechaPromulgacion'))}</FECHA_PROMULGACION>"
+                f"<TITULO>{titulo}</TITULO>"
+                f"<ORGANISMOS>{organismos}</ORGANISMOS>"
+                f"<URL>http://www.leychile.cl/Navegar?idNorma={id_norma}</URL>"
+                "</NORMA>\n"
+            )
+        partes.append("</NORMAS_CONVENIO>\n")
+        return "".join(partes).encode("utf-8")
+
+
+def _fecha_listado(fecha: Optional[str]) -> str:
+    """El listado usa DD-MM-YYYY; el XML de la norma, YYYY-MM-DD."""
+    if not fecha:
+        return ""
+    anio, mes, dia = fecha.split("-")
+    return f"{dia}-{mes}-{anio}"
+
+
+class _Presupuesto:
+    """GCRA compartido entre threads: devuelve cuánto esperar para consumir `n` unidades."""
+
+    def __init__(self, tasa: float):
+        self.tasa = tasa
+        self._proximo = 0.0
+        self._lock = threading.Lock()
+
+    def reservar(self, n: float = 1.0) -> float:
+        with self._lock:
+            ahora = time.monotonic()
+            inicio = max(ahora, self._proximo)
+            self._proximo = inicio + n / self.tasa
+            return inicio - ahora
+
+    def excede(self) -> bool:
+        """Como reservar(1) pero sin esperar: True si la request llega antes de su turno."""
+        with self._lock:
+            ahora = time.monotonic()
+            if self._proximo > ahora + 1 / self.tasa:
+                return True
+            self._proximo = max(ahora, self._proximo) + 1 / self.tasa
+            return False
+
+
+class BCNStubServer:
+    """Servidor HTTP en un thread de fondo. `url` sirve como base_url de BCNClient."""
+
+    CHUNK = 16 * 1024
+
+    def __init__(
+        self,
+        corpus: str | Path,
+        host: str = "127.0.0.1",
+        puerto: int = 0,
+        fallas: Optional[Fallas] = None,
+    ):
+        self.corpus = Corpus(corpus)
+        self.fallas = fallas or Fallas()
+        self._random = random.Random(self.fallas.seed)
+        self._random_lock = threading.Lock()
+        self._ancho_banda = (
+            _Presupuesto(self.fallas.bytes_por_segundo) if self.fallas.bytes_por_segundo else None
+        )
+        self._rps = _Presupuesto(self.fallas.max_rps) if self.fallas.max_rps else None
+
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+        self._httpd = ThreadingHTTPServer((host, puerto), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, puerto = self._httpd.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def start(self) -> "BCNStubServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="bcn-stub", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "BCNStubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ── Estadísticas ──────────────────────────────────────────────────────────
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self._stats = {"requests": 0, "bytes_enviados": 0, "por_status": {}, "por_endpoint": {}}
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            return json.loads(json.dumps(self._stats))
+
+    def _registrar(self, endpoint: str, status: Optional[int], enviados: int = 0) -> None:
+        with self._stats_lock:
+            self._stats["requests"] += 1
+            self._stats["bytes_enviados"] += enviados
+            clave = str(status) if status is not None else "timeout"
+            self._stats["por_status"][clave] = self._stats["por_status"].get(clave, 0) + 1
+            self._stats["por_endpoint"][endpoint] = self._stats["por_endpoint"].get(endpoint, 0) + 1
+
+    # ── Manejo de requests ────────────────────────────────────────────────────
+
+    def _azar(self) -> float:
+        with self._random_lock:
+            return self._random.random()
+
+    def _resolver(self, query: Dict[str, List[str]]):
+        """Devuelve (endpoint, contenido | None) según los parámetros de obtxml."""
+        opt = query.get("opt", [""])[0]
+        try:
+            if opt == "7":
+                return "norma_completa", self.corpus.norma(int(query["idNorma"][0]))
+            if opt == "4546":
+                return "metadatos", self.corpus.metadatos(int(query["idNorma"][0]))
+            if opt == "6":
+                return "normas_institucion", self.corpus.listado(int(query["idCategoria"][0]))
+        except (KeyError, ValueError):
+            pass
+        return "desconocido", None
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                if url.path == "/__stats":
+                    self._responder(200, json.dumps(stub.stats()).encode(), "application/json")
+                    return
+
+                endpoint, contenido = stub._resolver(parse_qs(url.query))
+                fallas = stub.fallas
+
+                if fallas.prob_timeout and stub._azar() < fallas.prob_timeout:
+                    stub._registrar(endpoint, None)
+                    time.sleep(fallas.duracion_timeout)
+                    self.close_connection = True
+                    return
+
+                if stub._rps and stub._rps.excede():
+                    stub._registrar(endpoint, 429)
+                    self._responder(429, b"", headers={"Retry-After": "1"})
+                    return
+
+                if fallas.prob_429 and stub._azar() < fallas.prob_429:
+                    stub._registrar(endpoint, 429)
+                    headers = {}
+                    if fallas.retry_after is not None:
+                        headers["Retry-After"] = str(fallas.retry_after)
+                    self._responder(429, b"", headers=headers)
+                    return
+
+                if fallas.prob_5xx and stub._azar() < fallas.prob_5xx:
+                    stub._registrar(endpoint, 503)
+                    self._responder(503, b"")
+                    return
+
+                espera = fallas.latencia
+                if fallas.jitter:
+                    espera += (stub._azar() * 2 - 1) * fallas.jitter
+                if espera > 0:
+                    time.sleep(espera)
+
+                if contenido is None:
+                    stub._registrar(endpoint, 404)
+                    self._responder(404, b"")
+                    return
+
+                etag = '"' + hashlib.md5(contenido).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    stub._registrar(endpoint, 304)
+                    self._responder(304, None, headers={"ETag": etag})
+                    return
+
+                stub._registrar(endpoint, 200, len(contenido))
+                self._responder(200, contenido, headers={"ETag": etag})
+
+            def _responder(
+                self,
+                status: int,
+                cuerpo: Optional[bytes],
+                tipo: str = "text/xml; charset=utf-8",
+                headers: Optional[Dict[str, str]] = None,
+            ) -> None:
+                if status == 200 and cuerpo and stub.fallas.corte is not None:
+                    cuerpo = cuerpo[: int(len(cuerpo) * stub.fallas.corte)]
+
+                self.send_response(status)
+                for nombre, valor in (headers or {}).items():
+                    self.send_header(nombre, valor)
+                if cuerpo is not None:
+                    self.send_header("Content-Type", tipo)
+                    self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                if not cuerpo:
+                    return
+
+                for i in range(0, len(cuerpo), stub.CHUNK):
+                    bloque = cuerpo[i : i + stub.CHUNK]
+                    if stub._ancho_banda:
+                        espera = stub._ancho_banda.reservar(len(bloque))
+                        if espera > 0:
+                            time.sleep(espera)
+                    self.wfile.write(bloque)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import typer
+
+    def main(
+        corpus: Path = typer.Argument(..., help="Directorio del corpus (p. ej. data/sample)"),
+        host: str = typer.Option("127.0.0.1", "--host"),
+        puerto: int = typer.Option(8765, "--puerto", "-p"),
+        latencia: float = typer.Option(0.0, "--latencia", help="Segundos por request"),
+        jitter: float = typer.Option(0.0, "--jitter"),
+        bytes_por_segundo: Optional[float] = typer.Option(None, "--ancho-banda", help="Bytes/s totales"),
+        max_rps: Optional[float] = typer.Option(None, "--max-rps", help="Sobre esta tasa responde 429"),
+        prob_429: float = typer.Option(0.0, "--prob-429"),
+        prob_5xx: float = typer.Option(0.0, "--prob-5xx"),
+        prob_timeout: float = typer.Option(0.0, "--prob-timeout"),
+        retry_after: Optional[int] = typer.Option(None, "--retry-after"),
+        corte: Optional[float] = typer.Option(None, "--corte", help="Trunca el XML de los 200 a esta fracción"),
+        seed: Optional[int] = typer.Option(None, "--seed"),
+    ):
+        """Levanta el servidor hasta Ctrl+C. Estadísticas en /__stats."""
+        fallas = Fallas(
+            latencia=latencia,
+            jitter=jitter,
+            bytes_por_segundo=bytes_por_segundo,
+            max_rps=max_rps,
+            prob_429=prob_429,
+            prob_5xx=prob_5xx,
+            prob_timeout=prob_timeout,
+            retry_after=retry_after,
+            corte=corte,
+            seed=seed,
+        )
+        stub = BCNStubServer(corpus, host=host, puerto=puerto, fallas=fallas)
+        print(f"BCN stub sirviendo {corpus} en {stub.url} — BCN_BASE_URL={stub.url}")
+        try:
+            stub._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            print(json.dumps(stub.stats(), indent=2))
+            stub._httpd.server_close()
+
+    typer.run(main)
@@ -0,0 +1,874 @@
+"""
+Generador de un corpus sintético de normas BCN para benchmarks a escala.
+
+data/sample trae una sola norma y un listado; con eso no se puede medir el
+caché en packs, el parseo en paralelo, la búsqueda ni el NLP con volúmenes
+reales. Este módulo genera N normas y los listados de M instituciones que
+validan contra data/bcn_schema.xml, con distribuciones parecidas a las de
+leychile.cl:
+
+    - Tipos: mayoría de decretos y resoluciones, leyes, algunos DFL/DL y
+      pocos códigos (que concentran miles de artículos).
+    - Artículos por norma: log-normal por tipo (mediana ~6 en una
+      resolución, ~20 en una ley, cientos en un código).
+    - Anidamiento según el tamaño: articulado plano, Títulos/Párrafos, o
+      Libro > Título > Párrafo en los códigos.
+    - Cuerpo: incisos de largo log-normal; ~1 de cada 4 cita otra norma
+      ("Ley N° 19.300", "DFL N° 1, de 2006") o un artículo de la misma.
+    - Materias y organismos con distribución de Zipf: pocas materias y
+      ministerios concentran la mayoría de las normas, como en la BCN.
+    - Artículos transitorios, derogaciones, anexos y fechas de versión.
+
+Todo sale de random.Random(seed): la misma semilla produce byte a byte el
+mismo corpus.
+
+Salida, con el layout que sirve tests/bcn_stub.py:
+    normas/<id>.xml         XML completo (opt=7)
+    metadatos/<id>.xml      Hasta el Encabezado, sin articulado (opt=4546)
+    instituciones/<id>.xml  Listado NORMAS_CONVENIO (opt=6)
+
+y opcionalmente como entradas de caché de BCNClient (para las URLs de
+`base_url`), así un sync o un benchmark arranca con el caché precargado sin
+pasar por el servidor.
+
+Uso desde tests:
+    resumen = generar_corpus(tmp_path / "corpus", n_normas=200, seed=7)
+    with BCNStubServer(tmp_path / "corpus") as stub: ...
+
+Uso manual:
+    python -m tests.corpus_sintetico data/sintetico -n 10000 -i 20 --seed 1 \\
+        --cache data/cache --validar
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import random
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+NS_BCN = "http://www.leychile.cl/esquemas"
+ESQUEMA = Path(__file__).resolve().parent.parent / "data" / "bcn_schema.xml"
+
+# Fecha "actual" del corpus: fija para que la salida no dependa del día
+FECHA_CORTE = date(2025, 6, 30)
+
+# (Tipo en el esquema, abreviación, código del listado, grupo, id_grupo,
+#  peso, mediana de artículos, años posibles)
+TIPOS = [
+    ("Decreto", "DTO", "XX2", "Decretos", 153, 0.42, 8, (1930, 2025)),
+    ("Resolución", "RES", "XX6", "Resoluciones", 155, 0.22, 6, (1960, 2025)),
+    ("Ley", "LEY", "XX1", "Leyes", 151, 0.20, 20, (1925, 2025)),
+    ("Decreto con Fuerza de Ley", "DFL", "XX13", "Decretos con Fuerza de Ley ", 152, 0.07, 30, (1930, 2025)),
+    ("Decreto Ley", "DL", "XX15", "Decretos Leyes", 154, 0.04, 15, (1973, 1990)),
+    ("Circular", "CIR", "XX8", "Circulares", 156, 0.03, 4, (1980, 2025)),
+    ("Acuerdo", "ACU", "XX9", "Acuerdos", 157, 0.015, 5, (1990, 2025)),
+    ("Código", "COD", "XX3", "Códigos", 150, 0.005, 600, (1855, 2010)),
+]
+
+MINISTERIOS = [
+    "MINISTERIO DE HACIENDA",
+    "MINISTERIO DEL INTERIOR Y SEGURIDAD PÚBLICA",
+    "MINISTERIO DE EDUCACIÓN",
+    "MINISTERIO DE SALUD",
+    "MINISTERIO DE ECONOMÍA, FOMENTO Y TURISMO",
+    "MINISTERIO DEL TRABAJO Y PREVISIÓN SOCIAL",
+    "MINISTERIO DE OBRAS PÚBLICAS",
+    "MINISTERIO DE JUSTICIA Y DERECHOS HUMANOS",
+    "MINISTERIO DE AGRICULTURA",
+    "MINISTERIO DE TRANSPORTES Y TELECOMUNICACIONES",
+    "MINISTERIO DE VIVIENDA Y URBANISMO",
+    "MINISTERIO DEL MEDIO AMBIENTE",
+    "MINISTERIO DE DEFENSA NACIONAL",
+    "MINISTERIO DE RELACIONES EXTERIORES",
+    "MINISTERIO SECRETARÍA GENERAL DE LA PRESIDENCIA",
+    "MINISTERIO SECRETARÍA GENERAL DE GOBIERNO",
+    "MINISTERIO DE ENERGÍA",
+    "MINISTERIO DE MINERÍA",
+    "MINISTERIO DE BIENES NACIONALES",
+    "MINISTERIO DE DESARROLLO SOCIAL Y FAMILIA",
+    "MINISTERIO DE LAS CULTURAS, LAS ARTES Y EL PATRIMONIO",
+    "MINISTERIO DEL DEPORTE",
+    "MINISTERIO DE LA MUJER Y LA EQUIDAD DE GÉNERO",
+    "MINISTERIO DE CIENCIA, TECNOLOGÍA, CONOCIMIENTO E INNOVACIÓN",
+]
+
+MATERIAS = [
+    "Presupuesto",
+    "Remuneraciones",
+    "Medio Ambiente",
+    "Educación Superior",
+    "Salud Pública",
+    "Municipalidades",
+    "Impuestos",
+    "Previsión Social",
+    "Contratación Pública",
+    "Tránsito",
+    "Aguas",
+    "Pesca y Acuicultura",
+    "Urbanismo y Construcciones",
+    "Energía Eléctrica",
+    "Telecomunicaciones",
+    "Riego",
+    "Fuerzas Armadas",
+    "Procedimiento Administrativo",
+    "Transparencia",
+    "Protección de Datos Personales",
+    "Consumidor",
+    "Mercado de Valores",
+    "Bancos",
+    "Cooperativas",
+    "Asociaciones Gremiales",
+    "Patrimonio Cultural",
+    "Bosques",
+    "Minería",
+    "Concesiones",
+    "Vivienda",
+    "Subsidios",
+    "Discapacidad",
+    "Infancia",
+    "Registro Civil",
+    "Notarios",
+    "Aduanas",
+    "Comercio Exterior",
+    "Turismo",
+    "Deportes",
+    "Calificación Cinematográfica",
+]
+
+# Vocabulario del relleno; las primeras palabras salen más seguido (Zipf)
+PALABRAS = (
+    "de la el que en los las se del por a con para su al o una un no como "
+    "sus lo este esta dicha dicho ley artículo presente reglamento servicio "
+    "ministerio plazo días resolución decreto norma disposiciones conformidad "
+    "establecido señalado inciso letra número podrá deberá corresponderá "
+    "respectivo respectiva funcionarios personas naturales jurídicas registro "
+    "procedimiento solicitud autoridad competente director nacional regional "
+    "municipalidad fiscalización sanciones multa unidades tributarias "
+    "mensuales infracción requisitos antecedentes información pública "
+    "establecimientos contrato concesión obras proyecto evaluación ambiental "
+    "recursos financieros presupuesto fondo aporte beneficio beneficiarios "
+    "trabajadores empleador remuneración cotización previsional salud "
+    "educación estudiantes docentes comisión consejo superintendencia "
+    "tribunal juez reclamo recurso notificación publicación diario oficial "
+    "vigencia entrada transitorio reemplázase agrégase suprímese modifícase "
+    "derógase intercálase sustitúyese expresión frase punto seguido coma"
+).split()
+
+# Normas reales que suelen citarse; se mezclan con citas dentro del corpus
+CITAS_FRECUENTES = [
+    ("Ley", "19300", 1994),
+    ("Ley", "18695", 1988),
+    ("Ley", "19880", 2003),
+    ("Ley", "20285", 2008),
+    ("Ley", "18575", 1986),
+    ("Ley", "19628", 1999),
+    ("Ley", "21180", 2019),
+    ("Decreto con Fuerza de Ley", "1", 2006),
+    ("Decreto con Fuerza de Ley", "29", 2005),
+    ("Decreto con Fuerza de Ley", "458", 1976),
+    ("Decreto Ley", "2757", 1979),
+    ("Decreto Ley", "824", 1974),
+    ("Decreto", "40", 2012),
+]
+
+ROMANOS = [
+    (1000, "M"), (900, "CM"), (500, "D"), (400, "CD"), (100, "C"), (90, "XC"),
+    (50, "L"), (40, "XL"), (10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I"),
+]  # fmt: skip
+
+ORDINALES = [
+    "primero", "segundo", "tercero", "cuarto", "quinto", "sexto", "séptimo",
+    "octavo", "noveno", "décimo",
+]  # fmt: skip
+
+PROMULGACION = {
+    "Ley": (
+        "     Y por cuanto he tenido a bien aprobarlo y sancionarlo; por tanto "
+        "promúlguese y llévese a efecto como Ley de la República."
+    ),
+    "default": "     Anótese, tómese razón, comuníquese y publíquese.",
+}
+
+
+# ==================== MODELO ====================
+
+
+@dataclass
+class NormaSintetica:
+    """Lo que el listado necesita de cada norma generada."""
+
+    id: int
+    tipo: str
+    numero: str
+    titulo: str
+    fecha_publicacion: date
+    fecha_promulgacion: date
+    organismos: List[str]
+    materias: List[str]
+    instituciones: List[int] = field(default_factory=list)
+    articulos: int = 0
+    xml: bytes = b""
+    metadatos: bytes = b""
+
+
+@dataclass
+class ResumenCorpus:
+    normas: int = 0
+    instituciones: int = 0
+    articulos: int = 0
+    bytes_xml: int = 0
+    entradas_cache: int = 0
+    invalidas: int = 0  # solo con validar=True
+
+    def as_dict(self) -> Dict:
+        return {
+            "normas": self.normas,
+            "instituciones": self.instituciones,
+            "articulos": self.articulos,
+            "bytes_xml": self.bytes_xml,
+            "entradas_cache": self.entradas_cache,
+            "invalidas": self.invalidas,
+        }
+
+
+# ==================== DISTRIBUCIONES ====================
+
+
+def _zipf(rng: random.Random, n: int, s: float = 1.1) -> int:
+    """Índice en [0, n) con P(k) ∝ 1/(k+1)^s."""
+    pesos = _pesos_zipf(n, s)
+    return rng.choices(range(n), cum_weights=pesos)[0]
+
+
+_cache_zipf: Dict[Tuple[int, float], List[float]] = {}
+
+
+def _pesos_zipf(n: int, s: float) -> List[float]:
+    clave = (n, s)
+    if clave not in _cache_zipf:
+        acumulado, pesos = 0.0, []
+        for k in range(n):
+            acumulado += 1 / (k + 1) ** s
+            pesos.append(acumulado)
+        _cache_zipf[clave] = pesos
+    return _cache_zipf[clave]
+
+
+def _muestra_zipf(rng: random.Random, pool: Sequence[str], k: int) -> List[str]:
+    """k elementos distintos del pool, sesgados a los primeros."""
+    elegidos: List[str] = []
+    while len(elegidos) < min(k, len(pool)):
+        valor = pool[_zipf(rng, len(pool))]
+        if valor not in elegidos:
+            elegidos.append(valor)
+    return elegidos
+
+
+def _lognormal(rng: random.Random, mediana: float, sigma: float, minimo: int, maximo: int) -> int:
+    return max(minimo, min(maximo, int(rng.lognormvariate(math.log(mediana), sigma))))
+
+
+def _romano(n: int) -> str:
+    salida = ""
+    for valor, letras in ROMANOS:
+        while n >= valor:
+            salida += letras
+            n -= valor
+    return salida
+
+
+def _miles(numero: str) -> str:
+    """19300 → 19.300, como se citan las leyes."""
+    return f"{int(numero):,}".replace(",", ".") if numero.isdigit() else numero
+
+
+def _ordinal(n: int) -> str:
+    return f"{n}º" if n < 10 else str(n)
+
+
+# ==================== TEXTO ====================
+
+
+class _Redactor:
+    """Genera incisos con citas a otras normas del corpus y a la propia."""
+
+    def __init__(self, rng: random.Random, citables: List[Tuple[str, str, int]]):
+        self.rng = rng
+        self.citables = citables
+        # Año de la norma que se está redactando: no cita normas posteriores
+        self.anio = FECHA_CORTE.year
+
+    def _palabras(self, n: int) -> str:
+        return " ".join(
+            PALABRAS[_zipf(self.rng, len(PALABRAS), 0.9)] for _ in range(n)
+        )
+
+    def cita(self, n_articulos: int) -> str:
+        rng = self.rng
+        if n_articulos > 1 and rng.random() < 0.3:
+            return f"el artículo {_ordinal(rng.randint(1, n_articulos))} de la presente norma"
+
+        tipo, numero, anio = rng.choice(CITAS_FRECUENTES)
+        if self.citables and rng.random() < 0.6:
+            candidata = rng.choice(self.citables)
+            if candidata[2] <= self.anio:
+                tipo, numero, anio = candidata
+
+        if tipo == "Ley":
+            return f"la Ley N° {_miles(numero)}"
+        if tipo == "Decreto con Fuerza de Ley":
+            return f"el DFL N° {numero}, de {anio}" if rng.random() < 0.7 else f"el DFL {numero}"
+        if tipo == "Decreto Ley":
+            return f"el decreto ley N° {_miles(numero)}, de {anio}"
+        if tipo == "Decreto":
+            return f"el decreto supremo N° {numero}, de {anio}"
+        return f"la {tipo.lower()} N° {numero}, de {anio}"
+
+    def inciso(self, n_articulos: int) -> str:
+        largo = _lognormal(self.rng, 40, 0.7, 6, 600)
+        texto = self._palabras(largo)
+        if self.rng.random() < 0.25:
+            corte = self.rng.randint(0, len(texto))
+            corte = texto.find(" ", corte)
+            corte = len(texto) if corte < 0 else corte
+            texto = f"{texto[:corte]}, de acuerdo con {self.cita(n_articulos)},{texto[corte:]}"
+        return texto[0].upper() + texto[1:] + "."
+
+    def titulo(self, materia: str) -> str:
+        plantillas = [
+            "APRUEBA REGLAMENTO DE {m}",
+            "MODIFICA {c}, EN MATERIA DE {m}",
+            "ESTABLECE NORMAS SOBRE {m}",
+            "FIJA TEXTO REFUNDIDO, COORDINADO Y SISTEMATIZADO DE {c}",
+            "CREA EL FONDO DE {m}",
+            "DETERMINA PROCEDIMIENTO PARA {m}",
+        ]
+        plantilla = self.rng.choice(plantillas)
+        return plantilla.format(m=materia.upper(), c=self.cita(0).upper())[:2000]
+
+
+# ==================== XML ====================
+
+
+class _Escritor:
+    """Arma el XML de una norma: idParte únicos y estructura según el esquema."""
+
+    def __init__(self, rng: random.Random, redactor: _Redactor, fecha_version: date):
+        self.rng = rng
+        self.redactor = redactor
+        self.fecha_version = fecha_version.isoformat()
+        self.partes: List[str] = []
+        self.id_parte = rng.randint(1_000_000, 9_000_000)
+        self.articulos = 0
+
+    def _siguiente_id(self) -> int:
+        self.id_parte += self.rng.randint(1, 3)
+        return self.id_parte
+
+    def _abrir(self, tipo_parte: str, derogado: bool = False, transitorio: bool = False) -> None:
+        self.partes.append(
+            "<EstructuraFuncional"
+            f' idParte="{self._siguiente_id()}"'
+            f" tipoParte={quoteattr(tipo_parte)}"
+            f' fechaVersion="{self.fecha_version}"'
+            f' derogado="{"derogado" if derogado else "no derogado"}"'
+            f' transitorio="{"transitorio" if transitorio else "no transitorio"}">'
+        )
+
+    def _metadatos(self, nombre: Optional[str], titulo: Optional[str]) -> str:
+        # NombreParte/TituloParte son obligatorios y de largo >= 1: la BCN
+        # manda un espacio con presente="no" cuando no existen
+        def parte(tag: str, valor: Optional[str]) -> str:
+            if valor:
+                return f'<{tag} presente="si">{escape(valor[:200])}</{tag}>'
+            return f'<{tag} presente="no"> </{tag}>'
+
+        return f"<Metadatos>{parte('NombreParte', nombre)}{parte('TituloParte', titulo)}</Metadatos>"
+
+    def articulo(self, n: int, total: int, transitorio: bool = False) -> None:
+        rng = self.rng
+        self.articulos += 1
+        derogado = rng.random() < 0.02
+        if transitorio:
+            nombre = f"Artículo {ORDINALES[n - 1] if n <= 10 else n} transitorio"
+        else:
+            sufijo = " bis" if rng.random() < 0.02 else ""
+            nombre = f"Artículo {n}{sufijo}"
+        encabezado = nombre.replace(f"Artículo {n}", f"Artículo {_ordinal(n)}", 1)
+
+        if derogado:
+            cuerpo = f"     {encabezado}.- Derogado."
+        else:
+            incisos = 1 + min(12, int(rng.expovariate(1 / 1.3)))
+            cuerpo = "\n".join(
+                f"     {encabezado}.- {self.redactor.inciso(total)}" if i == 0
+                else f"     {self.redactor.inciso(total)}"
+                for i in range(incisos)
+            )  # fmt: skip
+
+        self._abrir("Artículo", derogado=derogado, transitorio=transitorio)
+        self.partes.append(f"<Texto>{escape(cuerpo)}</Texto>")
+        self.partes.append(self._metadatos(nombre, None))
+        self.partes.append("</EstructuraFuncional>")
+
+    def agrupador(self, tipo_parte: str, n: int, materia: str) -> None:
+        """Abre un Libro/Título/Párrafo; el llamador agrega hijos y cierra."""
+        etiqueta = f"{tipo_parte} {_romano(n) if tipo_parte != 'Párrafo' else _ordinal(n)}"
+        titulo = f"De {materia.lower()}" if self.rng.random() < 0.8 else None
+        texto = f"     {etiqueta}" + (f"\n     {titulo}" if titulo else "")
+
+        self._abrir(tipo_parte)
+        self.partes.append(f"<Texto>{escape(texto)}</Texto>")
+        self.partes.append(
+            self._metadatos(None, f"{etiqueta} {titulo}" if titulo else etiqueta)
+        )
+        self.partes.append("<EstructurasFuncionales>")
+
+    def cerrar_agrupador(self) -> None:
+        self.partes.append("</EstructurasFuncionales></EstructuraFuncional>")
+
+
+def _repartir(rng: random.Random, total: int, grupos: int) -> List[int]:
+    """Reparte `total` artículos en `grupos` tamaños >= 1 y desparejos."""
+    grupos = max(1, min(grupos, total))
+    pesos = [rng.lognormvariate(0, 0.6) for _ in range(grupos)]
+    suma = sum(pesos)
+    tamanos = [max(1, int(total * p / suma)) for p in pesos]
+    tamanos[-1] += total - sum(tamanos)
+    while tamanos[-1] < 1:
+        i = tamanos.index(max(tamanos))
+        tamanos[i] -= 1
+        tamanos[-1] += 1
+    return tamanos
+
+
+def _articulado(
+    escritor: _Escritor, rng: random.Random, total: int, es_codigo: bool, materias: List[str]
+) -> None:
+    """Articulado permanente con el anidamiento que corresponde al tamaño."""
+    contador = iter(range(1, total + 1))
+
+    def articulos(n: int) -> None:
+        for _ in range(n):
+            escritor.articulo(next(contador), total)
+
+    def materia() -> str:
+        return rng.choice(materias + MATERIAS[:10])
+
+    if es_codigo:
+        niveles = ["Libro", "Título", "Párrafo"]
+    elif total >= 80:
+        niveles = ["Título", "Párrafo"] if rng.random() < 0.6 else ["Capítulo"]
+    elif total >= 12 and rng.random() < 0.6:
+        niveles = [rng.choice(["Título", "Párrafo", "Capítulo"])]
+    else:
+        niveles = []
+
+    def nivel(profundidad: int, n: int) -> None:
+        if profundidad == len(niveles):
+            articulos(n)
+            return
+        # ~6-15 artículos por agrupador del último nivel, menos grupos arriba
+        por_grupo = 10 if profundidad == len(niveles) - 1 else 40
+        grupos = max(1, round(n / (por_grupo * rng.uniform(0.6, 1.5))))
+        for i, tamano in enumerate(_repartir(rng, n, grupos), 1):
+            escritor.agrupador(niveles[profundidad], i, materia())
+            nivel(profundidad + 1, tamano)
+            escritor.cerrar_agrupador()
+
+    nivel(0, total)
+
+
+def _xml_norma(
+    rng: random.Random,
+    norma: NormaSintetica,
+    n_articulos: int,
+    redactor: _Redactor,
+) -> Tuple[bytes, bytes]:
+    """(XML completo, XML de metadatos) de una norma."""
+    derogada = rng.random() < 0.07
+    if rng.random() < 0.3:
+        dias = max(1, (FECHA_CORTE - norma.fecha_publicacion).days)
+        fecha_version = norma.fecha_publicacion + timedelta(days=rng.randint(1, dias))
+    else:
+        fecha_version = norma.fecha_publicacion
+    estado = "derogado" if derogada else "no derogado"
+
+    materias = "".join(f"<Materia>{escape(m)}</Materia>" for m in norma.materias)
+    organismos = "".join(f"<Organismo>{escape(o)}</Organismo>" for o in norma.organismos)
+    uso_comun = ""
+    if norma.tipo in ("Ley", "Código") and rng.random() < 0.15:
+        uso_comun = (
+            f"<NombresUsoComun><NombreUsoComun>{escape(norma.materias[0].upper())}"
+            "</NombreUsoComun></NombresUsoComun>"
+        )
+
+    cabecera = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<Norma xmlns="{NS_BCN}" normaId="{norma.id}" esTratado="no tratado" '
+        f'fechaVersion="{fecha_version.isoformat()}" SchemaVersion="1.0" derogado="{estado}">\n'
+        f'  <Identificador fechaPromulgacion="{norma.fecha_promulgacion.isoformat()}" '
+        f'fechaPublicacion="{norma.fecha_publicacion.isoformat()}">\n'
+        f"    <TiposNumeros><TipoNumero><Tipo>{escape(norma.tipo)}</Tipo>"
+        f"<Numero>{escape(norma.numero)}</Numero></TipoNumero></TiposNumeros>\n"
+        f"    <Organismos>{organismos}</Organismos>\n"
+        "  </Identificador>\n"
+        "  <Metadatos>\n"
+        f"    <TituloNorma>{escape(norma.titulo)}</TituloNorma>\n"
+        f"    <Materias>{materias}</Materias>\n"
+        f"    {uso_comun}\n"
+        "    <IdentificacionFuente>Diario Oficial</IdentificacionFuente>\n"
+        f"    <NumeroFuente>{rng.randint(30000, 44000)}</NumeroFuente>\n"
+        "  </Metadatos>\n"
+    )
+
+    escritor = _Escritor(rng, redactor, fecha_version)
+    es_codigo = norma.tipo == "Código"
+    _articulado(escritor, rng, n_articulos, es_codigo, norma.materias)
+
+    if norma.tipo in ("Ley", "Decreto con Fuerza de Ley", "Código") and rng.random() < 0.4:
+        transitorios = 1 + min(9, int(rng.expovariate(1 / 1.5)))
+        for n in range(1, transitorios + 1):
+            escritor.articulo(n, n_articulos, transitorio=True)
+
+    encabezado = (
+        f"{norma.titulo}\n     Teniendo presente lo dispuesto en "
+        f"{redactor.cita(0)}, y en uso de las facultades que me confiere la ley,\n"
+    )
+    promulgacion = PROMULGACION.get(norma.tipo, PROMULGACION["default"])
+    anexos = ""
+    if rng.random() < 0.05:
+        anexos = "<Anexos>" + "".join(
+            f'<Anexo idParte="{escritor._siguiente_id()}" derogado="no derogado" '
+            f'transitorio="no transitorio"><Metadatos><Titulo>ANEXO {_romano(i)}</Titulo>'
+            f"</Metadatos><Texto>{escape(redactor.inciso(0))}</Texto></Anexo>"
+            for i in range(1, rng.randint(1, 3) + 1)
+        ) + "</Anexos>\n"
+
+    cabecera += (
+        f'  <Encabezado fechaVersion="{norma.fecha_publicacion.isoformat()}" derogado="{estado}">'
+        f"<Texto>{escape(encabezado)}</Texto></Encabezado>\n"
+    )
+    # opt=4546 entrega la norma hasta el Encabezado, sin el articulado
+    metadatos = (cabecera + "</Norma>\n").encode("utf-8")
+
+    completa = (
+        cabecera
+        + "  <EstructurasFuncionales>"
+        + "".join(escritor.partes)
+        + "</EstructurasFuncionales>\n"
+        + f'  <Promulgacion fechaVersion="{norma.fecha_publicacion.isoformat()}" derogado="{estado}">'
+        f"<Texto>{escape(promulgacion)}</Texto></Promulgacion>\n"
+        + anexos
+        + "</Norma>\n"
+    )
+    norma.articulos = escritor.articulos
+    return completa.encode("utf-8"), metadatos
+
+
+def _numero(rng: random.Random, tipo: str, anio: int, usados: set) -> str:
+    """Número plausible para el tipo y el año, sin repetir dentro del tipo."""
+    for _ in range(100):
+        if tipo == "Ley":
+            # La numeración de leyes avanza ~75 por año (19.300 en 1994)
+            numero = max(1, 19300 + (anio - 1994) * 75 + rng.randint(-40, 40))
+        elif tipo == "Decreto Ley":
+            numero = max(1, (anio - 1973) * 215 + rng.randint(1, 215))
+        elif tipo in ("Decreto con Fuerza de Ley", "Código"):
+            numero = _zipf(rng, 60, 1.3) + 1
+        else:
+            numero = rng.randint(1, 2500)
+        if (tipo, numero) not in usados:
+            break
+    usados.add((tipo, numero))
+    return str(numero)
+
+
+def _norma(
+    rng: random.Random,
+    id_norma: int,
+    usados: set,
+    redactor: _Redactor,
+) -> Tuple[NormaSintetica, int]:
+    tipo, _abrev, _codigo, _grupo, _id_grupo, _peso, mediana, (desde, hasta) = rng.choices(
+        TIPOS, weights=[t[5] for t in TIPOS]
+    )[0]
+
+    # Más normas recientes que antiguas, como el volumen de la BCN
+    anio = FECHA_CORTE.year - int(rng.expovariate(1 / 15))
+    anio = max(desde, min(hasta, anio))
+    publicacion = date(anio, 1, 1) + timedelta(days=rng.randint(0, 364))
+    publicacion = min(publicacion, FECHA_CORTE)
+    promulgacion = publicacion - timedelta(days=rng.randint(3, 90))
+
+    materias = _muestra_zipf(rng, MATERIAS, 1 + min(5, int(rng.expovariate(1 / 1.2))))
+    organismos = _muestra_zipf(rng, MINISTERIOS, 1 if rng.random() < 0.85 else rng.randint(2, 3))
+    n_articulos = _lognormal(rng, mediana, 1.0, 1, 3000)
+
+    numero = _numero(rng, tipo, anio, usados)
+    norma = NormaSintetica(
+        id=id_norma,
+        tipo=tipo,
+        numero=numero,
+        titulo="",
+        fecha_publicacion=publicacion,
+        fecha_promulgacion=promulgacion,
+        organismos=organismos,
+        materias=materias,
+    )
+    if tipo == "Ley" and rng.random() < 0.5:
+        norma.materias.append(f"Ley no. {_miles(numero)}")
+    redactor.anio = anio
+    norma.titulo = redactor.titulo(materias[0])
+    redactor.citables.append((tipo, numero, anio))
+    return norma, n_articulos
+
+
+# ==================== LISTADOS ====================
+
+
+def _fecha_listado(fecha: date) -> str:
+    return fecha.strftime("%d-%m-%Y")
+
+
+def xml_listado(id_institucion: int, normas: List[NormaSintetica]) -> bytes:
+    """Listado NORMAS_CONVENIO (opt=6) con el formato de data/sample."""
+    por_tipo = {t[0]: t for t in TIPOS}
+    partes = [
+        '<?xml version="1.0" encoding="utf-8" ?>\n',
+        f'<NORMAS_CONVENIO id_usuario="1" id_categoria="{id_institucion}" '
+        f'fecha_generacion="{FECHA_CORTE.isoformat()}" nombre_agrupador="INST{id_institucion}">\n',
+    ]
+    for norma in sorted(normas, key=lambda n: (n.fecha_publicacion, n.id), reverse=True):
+        _tipo, abrev, codigo, grupo, id_grupo, *_ = por_tipo[norma.tipo]
+        titulo = escape(norma.titulo)
+        organismos = "".join(f"<ORGANISMO>{escape(o)}</ORGANISMO>" for o in norma.organismos)
+        partes.append(
+            "\t<NORMA>"
+            f'<GRUPO id_grupo="{id_grupo}">{escape(grupo)}</GRUPO>'
+            f"<MATERIA>{titulo}</MATERIA>"
+            "<TIPOS_NUMEROS><TIPO_NUMERO>"
+            f"<TIPO>{codigo}</TIPO>"
+            f"<NUMERO>{escape(norma.numero)}</NUMERO>"
+            f"<DESCRIPCION>{escape(norma.tipo)}</DESCRIPCION>"
+            f"<ABREVIACION>{abrev}</ABREVIACION>"
+            f"<COMPUESTO>{abrev}-{escape(norma.numero)}</COMPUESTO>"
+            "</TIPO_NUMERO></TIPOS_NUMEROS>"
+            f"<FECHA_PUBLICACION>{_fecha_listado(norma.fecha_publicacion)}</FECHA_PUBLICACION>"
+            f"<FECHA_PROMULGACION>{_fecha_listado(norma.fecha_promulgacion)}</FECHA_PROMULGACION>"
+            f"<TITULO>{titulo}</TITULO>"
+            f"<ORGANISMOS>{organismos}</ORGANISMOS>"
+            "<TITULO_PARTE/>"
+            f"<URL>http://www.leychile.cl/Navegar?idNorma={norma.id}</URL>"
+            "</NORMA>\n"
+        )
+    partes.append("</NORMAS_CONVENIO>\n")
+    return "".join(partes).encode("utf-8")
+
+
+# ==================== VALIDACIÓN ====================
+
+# data/bcn_schema.xml viene sin las declaraciones de namespace y los tipos
+# aem: (adjuntos binarios, fechas) se importan desde leychile.cl. Para validar
+# offline se agregan las declaraciones y se resuelven los imports con un
+# esquema mínimo; el generador no emite ninguno de esos elementos opcionales.
+_AEM_LOCAL = b"""<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema"
+    targetNamespace="http://valida.aem.gob.cl">
+  <xsd:complexType name="AdjuntosBinariosType">
+    <xsd:sequence><xsd:any processContents="skip" minOccurs="0" maxOccurs="unbounded"/></xsd:sequence>
+  </xsd:complexType>
+  <xsd:complexType name="ArchivoBinarioType" mixed="true">
+    <xsd:sequence><xsd:any processContents="skip" minOccurs="0" maxOccurs="unbounded"/></xsd:sequence>
+    <xsd:anyAttribute processContents="skip"/>
+  </xsd:complexType>
+  <xsd:simpleType name="FechaValidaType"><xsd:restriction base="xsd:date"/></xsd:simpleType>
+</xsd:schema>"""
+
+_esquema = None
+
+
+def esquema_bcn():
+    """XMLSchema de lxml para data/bcn_schema.xml (requiere lxml)."""
+    global _esquema
+    if _esquema is None:
+        from lxml import etree
+
+        class _ResolverAEM(etree.Resolver):
+            def resolve(self, url, pubid, context):
+                if "aem_" in url:
+                    return self.resolve_string(_AEM_LOCAL, context)
+                return None
+
+        texto = ESQUEMA.read_text(encoding="utf-8").replace(
+            "<xsd:schema",
+            '<xsd:schema xmlns:xsd="http://www.w3.org/2001/XMLSchema" '
+            f'xmlns:aem="http://valida.aem.gob.cl" xmlns="{NS_BCN}"',
+            1,
+        )
+        parser = etree.XMLParser()
+        parser.resolvers.add(_ResolverAEM())
+        doc = etree.fromstring(texto.encode("utf-8"), parser, base_url=str(ESQUEMA))
+        _esquema = etree.XMLSchema(doc)
+    return _esquema
+
+
+def validar(xml: bytes) -> List[str]:
+    """Errores de validación contra bcn_schema.xml; lista vacía si es válido."""
+    from lxml import etree
+
+    esquema = esquema_bcn()
+    if esquema.validate(etree.fromstring(xml)):
+        return []
+    return [f"línea {e.line}: {e.message}" for e in esquema.error_log]
+
+
+# ==================== CORPUS ====================
+
+
+def generar_normas(
+    n_normas: int,
+    n_instituciones: int = 10,
+    seed: int = 0,
+    id_inicial: int = 1_000_000,
+) -> Tuple[List[NormaSintetica], Dict[int, List[NormaSintetica]]]:
+    """
+    Genera las normas en memoria y las reparte entre instituciones.
+
+    Returns:
+        (normas, {id_institucion: normas}) con ids de institución 1..n.
+    """
+    rng = random.Random(seed)
+    usados: set = set()
+    # Las citas apuntan a normas ya generadas (o a CITAS_FRECUENTES)
+    redactor = _Redactor(rng, [])
+    normas: List[NormaSintetica] = []
+    por_institucion: Dict[int, List[NormaSintetica]] = {
+        i: [] for i in range(1, n_instituciones + 1)
+    }
+
+    id_norma = id_inicial
+    for _ in range(n_normas):
+        # Los idNorma de la BCN no son contiguos
+        id_norma += rng.randint(1, 40)
+        norma, n_articulos = _norma(rng, id_norma, usados, redactor)
+        norma.xml, norma.metadatos = _xml_norma(rng, norma, n_articulos, redactor)
+
+        # Pocas instituciones concentran la mayoría; ~15% de las normas
+        # aparecen en el listado de dos
+        instituciones = {_zipf(rng, n_instituciones, 0.8) + 1}
+        if n_instituciones > 1 and rng.random() < 0.15:
+            instituciones.add(rng.randint(1, n_instituciones))
+        norma.instituciones = sorted(instituciones)
+        for id_inst in norma.instituciones:
+            por_institucion[id_inst].append(norma)
+        normas.append(norma)
+
+    return normas, por_institucion
+
+
+def generar_corpus(
+    destino: str | Path,
+    n_normas: int = 1000,
+    n_instituciones: int = 10,
+    seed: int = 0,
+    id_inicial: int = 1_000_000,
+    cache_dir: Optional[str | Path] = None,
+    base_url: Optional[str] = None,
+    validar_esquema: bool = False,
+) -> ResumenCorpus:
+    """
+    Escribe un corpus sintético con el layout de tests/bcn_stub.Corpus.
+
+    Args:
+        destino:         Directorio de salida (se crea si no existe).
+        n_normas:        Normas a generar.
+        n_instituciones: Instituciones con listado propio (ids 1..n).
+        seed:            Semilla; la misma semilla produce el mismo corpus.
+        id_inicial:      Base de los idNorma generados.
+        cache_dir:       Si se indica, además se precarga el caché de
+                         BCNClient (norma completa, metadatos y listados).
+        base_url:        URL base de las claves del caché (por defecto la de
+                         BCNClient / BCN_BASE_URL).
+        validar_esquema: Valida cada norma contra bcn_schema.xml (lxml).
+
+    Returns:
+        ResumenCorpus con conteos y bytes generados.
+    """
+    destino = Path(destino)
+    for carpeta in ("normas", "metadatos", "instituciones"):
+        (destino / carpeta).mkdir(parents=True, exist_ok=True)
+
+    normas, por_institucion = generar_normas(n_normas, n_instituciones, seed, id_inicial)
+    resumen = ResumenCorpus(normas=len(normas), instituciones=n_instituciones)
+
+    client = None
+    if cache_dir is not None:
+        from bcn_client import BCNClient
+
+        # Sin límite de tamaño: precargar no debe desalojar lo recién escrito
+        client = BCNClient(cache_dir=str(cache_dir), base_url=base_url, cache_max_bytes=0)
+
+    try:
+        for norma in normas:
+            if validar_esquema and validar(norma.xml):
+                resumen.invalidas += 1
+            (destino / "normas" / f"{norma.id}.xml").write_bytes(norma.xml)
+            (destino / "metadatos" / f"{norma.id}.xml").write_bytes(norma.metadatos)
+            resumen.articulos += norma.articulos
+            resumen.bytes_xml += len(norma.xml)
+
+            if client is not None:
+                for endpoint, contenido in (
+                    ("norma_completa", norma.xml),
+                    ("metadatos", norma.metadatos),
+                ):
+                    url = client.BASE_URL + client.ENDPOINTS[endpoint].format(norma.id)
+                    client._write_cache(url, contenido, endpoint=endpoint)
+                    resumen.entradas_cache += 1
+
+        for id_inst, normas_inst in por_institucion.items():
+            listado = xml_listado(id_inst, normas_inst)
+            (destino / "instituciones" / f"{id_inst}.xml").write_bytes(listado)
+            if client is not None:
+                url = client.BASE_URL + client.ENDPOINTS["normas_institucion"].format(id_inst)
+                client._write_cache(url, listado, endpoint="normas_institucion")
+                resumen.entradas_cache += 1
+    finally:
+        if client is not None:
+            client.close()
+
+    return resumen
+
+
+if __name__ == "__main__":
+    import typer
+
+    def main(
+        destino: Path = typer.Argument(..., help="Directorio de salida del corpus"),
+        normas: int = typer.Option(1000, "--normas", "-n"),
+        instituciones: int = typer.Option(10, "--instituciones", "-i"),
+        seed: int = typer.Option(0, "--seed"),
+        id_inicial: int = typer.Option(1_000_000, "--id-inicial"),
+        cache: Optional[Path] = typer.Option(None, "--cache", help="Precarga este caché de BCNClient"),
+        base_url: Optional[str] = typer.Option(None, "--base-url", help="URL base de las claves del caché"),
+        validar_esquema: bool = typer.Option(False, "--validar", help="Valida contra bcn_schema.xml"),
+    ):
+        """Genera un corpus sintético para tests/bcn_stub.py y benchmarks."""
+        resumen = generar_corpus(
+            destino,
+            n_normas=normas,
+            n_instituciones=instituciones,
+            seed=seed,
+            id_inicial=id_inicial,
+            cache_dir=cache,
+            base_url=base_url,
+            validar_esquema=validar_esquema,
+        )
+        print(json.dumps(resumen.as_dict(), indent=2))
+
+    typer.run(main)
@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from bcn_client import NO_MODIFICADA, BCNClient
+from tests.bcn_stub import BCNStubServer, Fallas
+from utils.rate_limit import RateLimiter
+
+
+@pytest.fixture
+def client_factory(tmp_path):
+    clientes = []
+
+    def crear(stub, **kwargs):
+        kwargs.setdefault("rate_limiter", RateLimiter(delay=0, backoff_base=0.01))
+        client = BCNClient(base_url=stub.url, cache_dir=str(tmp_path / "cache"), **kwargs)
+        clientes.append(client)
+        return client
+
+    yield crear
+    for client in clientes:
+        client.close()
+
+
+def test_stub_sirve_los_tres_endpoints(client_factory):
+    with BCNStubServer("data/sample") as stub:
+        client = client_factory(stub)
+
+        normas = client.get_normas_por_institucion(17)
+        assert normas and normas[0]["id"]
+
+        xml = client.get_norma_completa(normas[0]["id"])
+        assert f'normaId="{normas[0]["id"]}"' in xml
+
+        metadatos = client.get_norma_metadatos(normas[0]["id"])
+        assert "<Metadatos>" in metadatos
+        assert "EstructurasFuncionales" not in metadatos
+
+        assert stub.stats()["por_endpoint"] == {
+            "normas_institucion": 1,
+            "norma_completa": 1,
+            "metadatos": 1,
+        }
+
+
+def test_stub_revalidacion_responde_304(client_factory):
+    with BCNStubServer("data/sample") as stub:
+        client = client_factory(stub)
+        assert client.get_norma_completa(10542)
+        assert client.get_norma_completa(10542, revalidar=True) is NO_MODIFICADA
+        assert stub.stats()["por_status"] == {"200": 1, "304": 1}
+
+
+def test_stub_fallas_inyectadas_se_reintentan(client_factory):
+    fallas = Fallas(prob_5xx=0.5, prob_429=0.2, seed=7)
+    with BCNStubServer("data/sample", fallas=fallas) as stub:
+        client = client_factory(stub, max_retries=8)
+        for id_norma in range(1, 11):
+            assert client.get_norma_completa(id_norma, use_cache=False)
+
+        por_status = stub.stats()["por_status"]
+        assert por_status["200"] == 10
+        assert por_status.get("503", 0) + por_status.get("429", 0) > 0
+
+
+def test_stub_limita_ancho_de_banda(client_factory):
+    with BCNStubServer("data/sample", fallas=Fallas(bytes_por_segundo=200_000)) as stub:
+        client = client_factory(stub)
+
+        inicio = time.monotonic()
+        xml = client.get_norma_completa(1, use_cache=False)
+        # ~46 KB a 200 KB/s: al menos ~0.15 s (el primer bloque sale sin esperar)
+        assert time.monotonic() - inicio >= 0.1
+        assert len(xml.encode()) > 40_000
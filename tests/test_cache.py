@@ -0,0 +1,150 @@
+import os
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from utils import cache as cache_module
+from utils.cache import CacheIndex, PackCacheBackend
+
+
+def test_cache_index_guarda_validadores(tmp_path):
+    index = CacheIndex(tmp_path)
+    index.save("norma-1", etag='"abc"', last_modified="Wed, 01 Jan 2025 00:00:00 GMT")
+
+    entrada = index.get("norma-1")
+    assert entrada["etag"] == '"abc"'
+    assert entrada["last_modified"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+    index.close()
+
+
+def test_cache_index_touch_y_clear(tmp_path):
+    index = CacheIndex(tmp_path)
+    index.save("norma-1")
+    antes = index.get("norma-1")["validado_en"]
+
+    index.touch("norma-1")
+    assert index.get("norma-1")["validado_en"] >= antes
+
+    index.clear()
+    assert index.get("norma-1") is None
+    index.close()
+
+
+def test_cache_index_lru_y_stats(tmp_path):
+    index = CacheIndex(tmp_path)
+    for i in range(3):
+        index.save(f"norma-{i}", tipo="norma_completa", tamano=100)
+    index.mark_access("norma-0")
+
+    assert index.total_bytes() == 300
+    assert index.lru_candidates(150) == ["norma-1", "norma-2"]
+
+    index.delete(["norma-1"])
+    stats = index.stats()
+    assert stats["total_archivos"] == 2
+    assert stats["por_tipo"]["norma_completa"]["bytes"] == 200
+    index.close()
+
+
+def test_pack_backend_put_get_y_compact(tmp_path):
+    backend = PackCacheBackend(tmp_path, compresion="zlib")
+    for i in range(5):
+        backend.put(f"norma-{i}", f"<Norma>{i}</Norma>" * 50)
+    backend.put("norma-1", "<Norma>reemplazada</Norma>")
+    backend.delete(["norma-2"])
+
+    assert backend.get("norma-1") == "<Norma>reemplazada</Norma>"
+    assert backend.get("norma-2") is None
+    assert backend.stats()["bytes_muertos"] > 0
+
+    resultado = backend.compact()
+    assert resultado["entradas"] == 4
+    assert backend.stats()["bytes_muertos"] == 0
+    assert dict(backend.iter_items(["norma-0", "norma-1"]))["norma-0"].startswith("<Norma>0")
+    backend.close()
+
+
+def test_backends_guardan_bytes_y_hash(tmp_path):
+    xml = "<Norma>Artículo 1º</Norma>".encode("utf-8")
+    backend = PackCacheBackend(tmp_path, compresion="zlib")
+    backend.put("norma-1", xml)
+
+    assert backend.get_bytes("norma-1") == xml
+    assert backend.get("norma-1") == "<Norma>Artículo 1º</Norma>"
+    assert dict(backend.iter_items(["norma-1"], en_bytes=True))["norma-1"] == xml
+    backend.close()
+
+    index = CacheIndex(tmp_path)
+    index.save("norma-1", hash="abc123")
+    assert index.get("norma-1")["hash"] == "abc123"
+    index.close()
+
+
+def test_pack_backend_delete_fallido_no_deja_la_transaccion_abierta(tmp_path):
+    backend = PackCacheBackend(tmp_path, compresion="zlib")
+    backend.put("norma-1", "<Norma>1</Norma>")
+
+    with pytest.raises(sqlite3.Error):
+        backend.delete(["norma-1", object()])
+
+    # Sin ROLLBACK el siguiente BEGIN IMMEDIATE fallaría
+    assert backend.get("norma-1") == "<Norma>1</Norma>"
+    backend.put("norma-2", "<Norma>2</Norma>")
+    backend.delete(["norma-1"])
+    assert backend.get("norma-1") is None and backend.get("norma-2") == "<Norma>2</Norma>"
+    backend.close()
+
+
+def test_pack_backend_fsync_por_tandas(tmp_path, monkeypatch):
+    fsyncs = []
+    monkeypatch.setattr(cache_module.os, "fsync", lambda fd: fsyncs.append(fd))
+    backend = PackCacheBackend(tmp_path, compresion="zlib")
+    backend.FSYNC_CADA = 4
+
+    for i in range(10):
+        backend.put(f"norma-{i}", f"<Norma>{i}</Norma>")
+    assert len(fsyncs) == 2
+
+    backend.close()  # lo pendiente se sincroniza al cerrar
+    assert len(fsyncs) == 3
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="usa /proc para nombrar los fd")
+def test_pack_backend_compact_hace_fsync_de_cada_pack_nuevo(tmp_path, monkeypatch):
+    backend = PackCacheBackend(tmp_path, compresion="zlib")
+    for i in range(6):
+        backend.put(f"norma-{i}", os.urandom(200))
+    viejos = sorted((tmp_path / "packs").glob("pack-*.bin"))
+
+    fsyncs = []
+    monkeypatch.setattr(
+        cache_module.os,
+        "fsync",
+        lambda fd: fsyncs.append((Path(os.readlink(f"/proc/self/fd/{fd}")), viejos[0].exists())),
+    )
+    backend.PACK_MAX_BYTES = 500
+    backend.compact()
+
+    nuevos = sorted((tmp_path / "packs").glob("pack-*.bin"))
+    assert len(nuevos) == 3
+    # Cada pack nuevo y el directorio, todo antes de borrar los packs viejos
+    assert fsyncs == [(p, True) for p in nuevos] + [(tmp_path / "packs", True)]
+    assert backend.get_bytes("norma-5") is not None
+    backend.close()
+
+
+def test_pack_backend_entrada_truncada_es_un_miss(tmp_path):
+    backend = PackCacheBackend(tmp_path, compresion="zlib")
+    backend.put("norma-1", "<Norma>1</Norma>" * 20)
+    backend.put("norma-2", "<Norma>2</Norma>" * 20)
+
+    # Corte de luz antes del fsync: el índice quedó, los bytes no
+    pack = next((tmp_path / "packs").glob("pack-*.bin"))
+    with open(pack, "r+b") as f:
+        f.truncate(pack.stat().st_size - 5)
+
+    assert backend.get("norma-1").startswith("<Norma>1")
+    assert backend.get("norma-2") is None
+    assert [clave for clave, _ in backend.iter_items(["norma-1", "norma-2"])] == ["norma-1"]
+    backend.close()
@@ -0,0 +1,101 @@
+import hashlib
+
+import pytest
+
+from bcn_client import BCNClient
+from tests.bcn_stub import BCNStubServer
+from tests.corpus_sintetico import generar_corpus, generar_normas, validar, xml_listado
+from utils import norm_parser
+from utils.norm_parser import BCNXMLParser
+from utils.rate_limit import RateLimiter
+
+
+def test_misma_semilla_mismo_corpus():
+    normas_a, inst_a = generar_normas(40, n_instituciones=3, seed=11)
+    normas_b, inst_b = generar_normas(40, n_instituciones=3, seed=11)
+    normas_c, _ = generar_normas(40, n_instituciones=3, seed=12)
+
+    assert [n.xml for n in normas_a] == [n.xml for n in normas_b]
+    assert {i: [n.id for n in ns] for i, ns in inst_a.items()} == {
+        i: [n.id for n in ns] for i, ns in inst_b.items()
+    }
+    assert [n.xml for n in normas_a] != [n.xml for n in normas_c]
+
+
+@pytest.mark.skipif(norm_parser.lxml_etree is None, reason="lxml no instalado")
+def test_normas_validan_contra_esquema():
+    normas, _ = generar_normas(60, seed=3)
+    for norma in normas:
+        assert validar(norma.xml) == [], norma.id
+        assert validar(norma.metadatos) == [], norma.id
+
+
+def test_normas_se_parsean_con_su_articulado():
+    normas, _ = generar_normas(30, seed=5)
+    parser = BCNXMLParser()
+    for norma in normas:
+        markdown, metadata, articulos = parser.parse_con_indice(norma.xml)
+        assert metadata.norma_id == norma.id
+        assert metadata.titulo == norma.titulo
+        assert len([a for a in articulos if a.tipo_parte == "Artículo"]) == norma.articulos
+        assert "## " in markdown or norma.articulos == 0
+
+
+def test_corpus_servido_por_stub_y_cache_precargado(tmp_path):
+    corpus = tmp_path / "corpus"
+    cache = tmp_path / "cache"
+    base_url = "http://bcn.invalid"
+    resumen = generar_corpus(
+        corpus, n_normas=25, n_instituciones=3, seed=1, cache_dir=cache, base_url=base_url
+    )
+    assert resumen.normas == 25
+    assert resumen.entradas_cache == 25 * 2 + 3
+
+    # El caché precargado responde sin red (la URL base no existe)
+    client = BCNClient(cache_dir=str(cache), base_url=base_url)
+    try:
+        ids = sorted(int(p.stem) for p in (corpus / "normas").glob("*.xml"))
+        xml = client.get_norma_completa(ids[0], en_bytes=True)
+        assert xml == (corpus / "normas" / f"{ids[0]}.xml").read_bytes()
+        assert client.hash_norma(ids[0]) == hashlib.md5(xml).hexdigest()
+        listadas = sum(len(client.get_normas_por_institucion(i)) for i in (1, 2, 3))
+        assert listadas >= 25
+    finally:
+        client.close()
+
+    with BCNStubServer(corpus) as stub:
+        client = BCNClient(
+            base_url=stub.url,
+            cache_dir=str(tmp_path / "cache_stub"),
+            rate_limiter=RateLimiter(delay=0),
+        )
+        try:
+            normas = client.get_normas_por_institucion(1)
+            assert normas and all(n["id"] in ids for n in normas)
+            metadatos = client.get_norma_metadatos(normas[0]["id"])
+            assert "<Metadatos>" in metadatos
+            assert "EstructurasFuncionales" not in metadatos
+        finally:
+            client.close()
+
+
+def test_hash_entrada_del_listado(tmp_path):
+    normas, _ = generar_normas(12, seed=9)
+    listado = xml_listado(1, normas)
+    client = BCNClient(cache_dir=str(tmp_path / "cache"))
+    try:
+        enteras = list(client._iter_normas_xml([listado]))
+        # En streaming el <NORMA> puede cerrarse en cualquier trozo: mismo hash
+        trozos = [listado[i : i + 7] for i in range(0, len(listado), 7)]
+        assert [n["hash_entrada"] for n in client._iter_normas_xml(trozos)] == [
+            n["hash_entrada"] for n in enteras
+        ]
+
+        normas[0].titulo += " (rectificada)"
+        cambiadas = list(client._iter_normas_xml([xml_listado(1, normas)]))
+        distintas = [
+            a["id"] for a, b in zip(enteras, cambiadas) if a["hash_entrada"] != b["hash_entrada"]
+        ]
+        assert distintas == [normas[0].id]
+    finally:
+        client.close()
@@ -0,0 +1,15 @@
+from utils.file_lock import FileLock
+
+
+def test_file_lock_exclusivo(tmp_path):
+    path = tmp_path / "locks" / "abc.lock"
+
+    with FileLock(path) as lock:
+        assert lock.locked
+        # Un segundo lock sobre el mismo archivo no se obtiene mientras el primero siga tomado
+        assert not FileLock(path, timeout=0.1).acquire()
+
+    otro = FileLock(path, timeout=0.1)
+    assert otro.acquire()
+    otro.release()
+    assert not otro.locked
@@ -0,0 +1,198 @@
+import io
+import threading
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+from utils import norm_parser
+from utils.norm_parser import BCNXMLParser
+
+SAMPLE = "data/sample/norma_completa.xml"
+
+
+def test_parse_acepta_str_y_bytes():
+    parser = BCNXMLParser(backend="etree")
+    with open(SAMPLE, "rb") as f:
+        xml = f.read()
+
+    desde_bytes = parser.parse_from_string(xml)
+    desde_str = parser.parse_from_string(xml.decode("utf-8"))
+
+    assert desde_bytes == desde_str
+    assert desde_bytes[1].norma_id == 206396
+    assert desde_bytes[1].materias[0].startswith("Calificación")
+
+
+def test_backend_lxml_genera_el_mismo_markdown():
+    pytest.importorskip("lxml")
+    with open(SAMPLE, "rb") as f:
+        xml = f.read()
+
+    esperado = BCNXMLParser(backend="etree").parse_from_string(xml)
+    lxml_parser = BCNXMLParser(backend="lxml")
+
+    assert lxml_parser.parse_from_string(xml) == esperado
+    assert lxml_parser.parse_from_string(xml.decode("utf-8")) == esperado
+    assert lxml_parser.parse_from_file(SAMPLE) == esperado
+    assert lxml_parser.parse_metadata(xml) == esperado[1]
+
+
+def test_sin_lxml_se_usa_etree(monkeypatch):
+    monkeypatch.setattr(norm_parser, "lxml_etree", None)
+
+    assert BCNXMLParser().backend == "etree"
+    with pytest.raises(ValueError):
+        BCNXMLParser(backend="lxml")
+
+
+@pytest.mark.parametrize("backend", ["etree", "lxml"])
+def test_render_markdown_identico_al_arbol(backend):
+    if backend == "lxml":
+        pytest.importorskip("lxml")
+    parser = BCNXMLParser(backend=backend)
+    with open(SAMPLE, "rb") as f:
+        xml = f.read()
+    markdown, metadata = parser.parse_from_string(xml)
+
+    for fuente in (xml, xml.decode("utf-8"), io.BytesIO(xml), Path(SAMPLE)):
+        destino = io.StringIO()
+        assert parser.render_markdown(fuente, destino) == metadata
+        assert destino.getvalue() == markdown
+
+
+class _SinRebobinar(io.BytesIO):
+    def seekable(self):
+        return False
+
+
+def _fuera_de_orden(xml: bytes) -> bytes:
+    """La muestra con Metadatos después del contenido, en la raíz y en una estructura."""
+    ns = "{http://www.leychile.cl/esquemas}"
+    ET.register_namespace("", ns[1:-1])
+    raiz = ET.fromstring(xml)
+    metadatos = raiz.find(f"{ns}Metadatos")
+    raiz.remove(metadatos)
+    raiz.insert(list(raiz).index(raiz.find(f"{ns}Encabezado")) + 1, metadatos)
+
+    estructura = next(
+        e for e in raiz.iter(f"{ns}EstructuraFuncional") if e.find(f"{ns}EstructurasFuncionales") is not None
+    )
+    metadatos = estructura.find(f"{ns}Metadatos")
+    estructura.remove(metadatos)
+    estructura.append(metadatos)
+    return ET.tostring(raiz, encoding="utf-8")
+
+
+@pytest.mark.parametrize("backend", ["etree", "lxml"])
+def test_render_markdown_fuera_de_esquema_usa_el_arbol(backend):
+    if backend == "lxml":
+        pytest.importorskip("lxml")
+    parser = BCNXMLParser(backend=backend)
+    with open(SAMPLE, "rb") as f:
+        original = f.read()
+    xml = _fuera_de_orden(original)
+    esperado = parser.parse_con_indice(original)
+
+    assert parser.parse_from_string(xml) == esperado[:2]
+    for fuente in (xml, xml.decode("utf-8"), io.BytesIO(xml)):
+        assert parser.parse_con_indice(fuente) == esperado
+
+    # Un stream que no se puede rebobinar no tiene vuelta atrás
+    with pytest.raises(ValueError):
+        parser.render_markdown(_SinRebobinar(xml), io.StringIO())
+
+
+@pytest.mark.parametrize("procesos", [1, 2])
+def test_parse_many_mantiene_orden_y_reporta_errores(procesos):
+    with open(SAMPLE, "rb") as f:
+        xml = f.read()
+    items = [(i, xml) for i in range(5)] + [(99, b"<Norma")] + [Path(SAMPLE)]
+
+    resultados = list(
+        BCNXMLParser(backend="etree").parse_many(items, procesos=procesos, chunksize=2)
+    )
+
+    assert [r[0] for r in resultados] == [0, 1, 2, 3, 4, 99, SAMPLE]
+    assert all(r[2].norma_id == 206396 for r in resultados if r[0] != 99)
+    assert resultados[5][1] is None and isinstance(resultados[5][2], Exception)
+
+
+@pytest.mark.parametrize("ordenado", [True, False])
+def test_parse_many_entrega_sin_esperar_la_entrada_siguiente(ordenado):
+    with open(SAMPLE, "rb") as f:
+        xml = f.read()
+    primer_resultado = threading.Event()
+    esperas = []
+
+    def items():
+        # Como las descargas del pipeline: el resto de la entrada no llega
+        # hasta que se consume lo ya parseado
+        for i in range(2):
+            yield i, xml
+        esperas.append(primer_resultado.wait(timeout=5))
+        yield 2, xml
+
+    resultados = []
+    for resultado in BCNXMLParser(backend="etree").parse_many(
+        items(), procesos=2, chunksize=1, ordenado=ordenado
+    ):
+        primer_resultado.set()
+        resultados.append(resultado[0])
+
+    assert esperas == [True]
+    assert sorted(resultados) == [0, 1, 2]
+
+
+@pytest.mark.parametrize("backend", ["etree", "lxml"])
+def test_indice_de_articulos_apunta_al_markdown(backend):
+    if backend == "lxml":
+        pytest.importorskip("lxml")
+    parser = BCNXMLParser(backend=backend)
+    with open(SAMPLE, "rb") as f:
+        xml = f.read()
+
+    markdown, metadata, articulos = parser.parse_con_indice(xml)
+    assert (markdown, metadata) == parser.parse_from_string(xml)
+
+    contenido = markdown.encode("utf-8")
+    assert [a.orden for a in articulos] == list(range(len(articulos)))
+    for articulo in articulos:
+        bloque = contenido[articulo.inicio : articulo.fin].decode("utf-8")
+        assert bloque.lstrip("\n").startswith("#" * articulo.nivel + " ")
+
+    primero = next(a for a in articulos if a.tipo_parte == "Artículo")
+    assert primero.nombre == "1"
+    assert primero.ruta == "Párrafo 1º Normas generales"
+    assert "Artículo 1º.-" in contenido[primero.inicio : primero.fin].decode("utf-8")
+    assert any(a.transitorio for a in articulos)
+
+
+def test_texto_plano_solo_texto_de_la_norma():
+    with open(SAMPLE, "rb") as f:
+        markdown, _ = BCNXMLParser(backend="etree").parse_from_string(f.read())
+
+    texto = norm_parser.texto_plano(markdown)
+
+    assert texto.startswith("SOBRE CALIFICACION DE LA PRODUCCION CINEMATOGRAFICA")
+    assert "Artículo 1º.- Establécese un sistema" in texto
+    assert "Información Básica" not in texto and "**Tipo:**" not in texto
+    assert "#" not in texto and "*[TRANSITORIO]*" not in texto
+    assert norm_parser.texto_plano(io.StringIO(markdown)) == texto
+
+
+@pytest.mark.parametrize("backend", ["etree", "lxml"])
+def test_parse_metadata_no_lee_el_articulado(backend):
+    if backend == "lxml":
+        pytest.importorskip("lxml")
+    parser = BCNXMLParser(backend=backend)
+    with open(SAMPLE, "rb") as f:
+        xml = f.read()
+    esperado = parser.parse_from_string(xml)[1]
+
+    for fuente in (xml, xml.decode("utf-8"), io.BytesIO(xml), Path(SAMPLE)):
+        assert parser.parse_metadata(fuente) == esperado
+
+    # Cortado en medio del articulado: no se llega a tokenizar esa parte
+    truncado = xml[: xml.index(b"<EstructurasFuncionales") + 100]
+    assert parser.parse_metadata(truncado) == esperado
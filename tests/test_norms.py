@@ -155,3 +155,11 @@ def test_get_version(id_norma: int = test_norm_id, version_num: int = test_id_ve
     assert version.get("version_num")
     assert version.get("hash_xml")
     assert version.get("detectado_en")
+
+
+def test_get_hashes(id_norma: int = test_norm_id):
+    hashes = norm_manager.get_hashes([id_norma, -1])
+
+    assert isinstance(hashes, Dict)
+    assert -1 not in hashes
+    assert len(hashes[id_norma]) == 32
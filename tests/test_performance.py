@@ -1,8 +1,12 @@
 import pytest
 
-from bcn_client import BCNClient
+from bcn_client import BCNClient, iter_normas_completas
 from managers.norms import NormsManager
+from tests.bcn_stub import BCNStubServer, Fallas
+from utils import norm_parser
 from utils.norm_parser import BCNXMLParser
+from utils.norm_types import Norm, NormRecord
+from utils.rate_limit import AIMDRateLimiter, RateLimiter
 
 # ==================== FIXTURES ====================
 
@@ -36,6 +40,25 @@ def sample_xml(client):
     return xml
 
 
+@pytest.fixture(scope="module")
+def bcn_stub():
+    """BCN local con latencia realista: no depende de leychile.cl"""
+    with BCNStubServer("data/sample", fallas=Fallas(latencia=0.05, jitter=0.02, seed=1)) as stub:
+        yield stub
+
+
+@pytest.fixture
+def offline_client(bcn_stub, tmp_path):
+    """Cliente contra el stub, sin espaciado fijo y con caché vacío"""
+    client = BCNClient(
+        base_url=bcn_stub.url,
+        cache_dir=str(tmp_path / "cache"),
+        rate_limiter=RateLimiter(delay=0),
+    )
+    yield client
+    client.close()
+
+
 # ==================== BENCHMARKS ====================
 
 
@@ -85,3 +108,156 @@ def test_benchmark_db_get_norm(benchmark, norms_manager):
     """Benchmark: Obtener norma por ID"""
     # Ajusta este ID por uno que exista en tu DB
     result = benchmark(norms_manager.get_by_id, 12)
+
+
+# ==================== BENCHMARKS PARSER (backends) ====================
+
+BACKENDS_XML = [
+    "etree",
+    pytest.param("lxml", marks=pytest.mark.skipif(
+        norm_parser.lxml_etree is None, reason="lxml no instalado"
+    )),
+]
+
+
+def _codigo_sintetico(libros=10, titulos=10, articulos=50):
+    """Código de ~1.5MB: libros > títulos > artículos, como los códigos grandes de la BCN"""
+    ns = "http://www.leychile.cl/esquemas"
+    partes = []
+    for l in range(1, libros + 1):
+        tits = []
+        for t in range(1, titulos + 1):
+            arts = "".join(
+                f'<EstructuraFuncional idParte="{l}{t}{a}" tipoParte="Artículo">'
+                f"<Texto>Artículo {a}.- Texto del artículo {a} del título {t}.\n"
+                f"     Inciso segundo con más texto normativo de relleno.</Texto>"
+                f'<Metadatos><NombreParte presente="si">Artículo {a}</NombreParte>'
+                f'<TituloParte presente="no"/></Metadatos></EstructuraFuncional>'
+                for a in range(1, articulos + 1)
+            )
+            tits.append(
+                f'<EstructuraFuncional tipoParte="Título"><Metadatos>'
+                f'<NombreParte presente="si">Título {t}</NombreParte>'
+                f'<TituloParte presente="si">De las materias {t}</TituloParte></Metadatos>'
+                f"<EstructurasFuncionales>{arts}</EstructurasFuncionales></EstructuraFuncional>"
+            )
+        partes.append(
+            f'<EstructuraFuncional tipoParte="Libro"><Metadatos>'
+            f'<NombreParte presente="si">Libro {l}</NombreParte></Metadatos>'
+            f'<EstructurasFuncionales>{"".join(tits)}</EstructurasFuncionales></EstructuraFuncional>'
+        )
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?><Norma xmlns="{ns}" normaId="1" '
+        f'derogado="no derogado" esTratado="no tratado" fechaVersion="2024-01-01">'
+        f'<Identificador fechaPublicacion="2000-01-01"><TiposNumeros><TipoNumero>'
+        f"<Tipo>Código</Tipo><Numero>1</Numero></TipoNumero></TiposNumeros>"
+        f"<Organismos><Organismo>MINISTERIO</Organismo></Organismos></Identificador>"
+        f"<Metadatos><TituloNorma>CÓDIGO SINTÉTICO</TituloNorma><Materias>"
+        f"<Materia>Prueba</Materia></Materias></Metadatos>"
+        f'<EstructurasFuncionales>{"".join(partes)}</EstructurasFuncionales></Norma>'
+    ).encode("utf-8")
+
+
+@pytest.mark.parametrize("backend", BACKENDS_XML)
+def test_benchmark_parse_sample_backend(benchmark, backend):
+    """Benchmark: data/sample/norma_completa.xml con cada backend"""
+    with open("data/sample/norma_completa.xml", "rb") as f:
+        xml = f.read()
+
+    markdown, metadata = benchmark(BCNXMLParser(backend=backend).parse_from_string, xml)
+    assert metadata.norma_id == 206396
+
+
+@pytest.mark.parametrize("backend", BACKENDS_XML)
+def test_benchmark_parse_codigo_grande_backend(benchmark, backend):
+    """Benchmark: código sintético de 5.000 artículos con cada backend"""
+    xml = _codigo_sintetico()
+
+    markdown, metadata = benchmark.pedantic(
+        BCNXMLParser(backend=backend).parse_from_string, args=(xml,), rounds=5
+    )
+    assert markdown.count("\n#### Artículo ") == 5000
+
+
+@pytest.mark.parametrize("backend", BACKENDS_XML)
+def test_benchmark_parse_metadata_codigo_grande(benchmark, backend):
+    """Benchmark: solo metadatos de un código de 5.000 artículos (parseo incremental)"""
+    xml = _codigo_sintetico()
+
+    metadata = benchmark(BCNXMLParser(backend=backend).parse_metadata, xml)
+    assert metadata.norma_id == 1
+
+
+def test_benchmark_render_markdown_streaming(benchmark, tmp_path):
+    """Benchmark: código sintético renderizado en streaming directo a disco"""
+    xml = _codigo_sintetico()
+    parser = BCNXMLParser()
+
+    def renderizar():
+        with open(tmp_path / "codigo.md", "w", encoding="utf-8") as f:
+            return parser.render_markdown(xml, f)
+
+    metadata = benchmark.pedantic(renderizar, rounds=5)
+    assert metadata.norma_id == 1
+
+
+@pytest.mark.parametrize("registro", ["pydantic", "slots"])
+def test_benchmark_registro_norma_10k(benchmark, registro):
+    """Benchmark: construir 10.000 registros de norma y su parsed_data"""
+    with open("data/sample/norma_completa.xml", "rb") as f:
+        campos = BCNXMLParser().parse_metadata(f.read()).as_dict()
+    clase = Norm if registro == "pydantic" else NormRecord
+
+    def lote():
+        return [clase(**campos).to_parsed_data() for _ in range(10_000)]
+
+    parsed = benchmark(lote)
+    assert parsed[0]["titulo"] == campos["titulo"]
+
+
+# ==================== BENCHMARKS OFFLINE (stub BCN) ====================
+
+
+def test_benchmark_offline_download_uncached(benchmark, offline_client):
+    """Benchmark: Descarga real por HTTP (sin caché) contra el stub"""
+    result = benchmark(offline_client.get_norma_completa, 206396, use_cache=False)
+    assert result is not None
+
+
+def test_benchmark_offline_download_concurrente(benchmark, bcn_stub, tmp_path):
+    """Benchmark: 32 normas con 8 requests en vuelo (latencia 50ms por request)"""
+
+    def descargar():
+        return list(
+            iter_normas_completas(
+                range(1, 33),
+                max_concurrencia=8,
+                use_cache=False,
+                base_url=bcn_stub.url,
+                cache_dir=str(tmp_path / "cache"),
+                rate_limiter=RateLimiter(delay=0),
+            )
+        )
+
+    result = benchmark.pedantic(descargar, rounds=3)
+    assert all(xml for _, xml in result)
+
+
+def test_benchmark_offline_aimd_con_429(benchmark, tmp_path):
+    """Benchmark: Throughput del AIMD cuando la BCN limita a 20 req/s"""
+    with BCNStubServer("data/sample", fallas=Fallas(max_rps=20)) as stub:
+        client = BCNClient(
+            base_url=stub.url,
+            cache_dir=str(tmp_path / "cache"),
+            rate_limiter=AIMDRateLimiter(tasa_inicial=10, tasa_max=40, backoff_base=0.05),
+        )
+
+        def descargar():
+            return [client.get_norma_completa(i, use_cache=False) for i in range(1, 41)]
+
+        try:
+            result = benchmark.pedantic(descargar, rounds=1)
+        finally:
+            client.close()
+
+    assert all(result)
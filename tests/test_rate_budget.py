@@ -0,0 +1,45 @@
+import multiprocessing
+import time
+
+from utils.rate_budget import PresupuestoArchivo
+from utils.rate_limit import RateLimiter
+
+
+def _consumir(path, duracion, cola):
+    limiter = RateLimiter(delay=0, presupuesto=PresupuestoArchivo(path, tasa_total=30))
+    fin = time.time() + duracion
+    requests = 0
+    while True:
+        limiter.acquire()
+        if time.time() >= fin:
+            break
+        requests += 1
+    cola.put(requests)
+
+
+def test_presupuesto_reparte_la_tasa_total_entre_procesos(tmp_path):
+    path = tmp_path / "presupuesto.json"
+    cola = multiprocessing.Queue()
+    procesos = [
+        multiprocessing.Process(target=_consumir, args=(path, 2.0, cola)) for _ in range(3)
+    ]
+    for p in procesos:
+        p.start()
+    conteos = [cola.get(timeout=30) for _ in procesos]
+    for p in procesos:
+        p.join()
+
+    # 30 req/s totales durante 2 s, sin importar cuántos procesos haya
+    assert sum(conteos) <= 30 * 2 + 3
+    assert sum(conteos) >= 30 * 2 * 0.6
+    # Reparto justo: ningún proceso se queda con mucho más que su parte
+    assert max(conteos) - min(conteos) <= 6
+
+
+def test_backoff_de_un_consumidor_frena_a_todos(tmp_path):
+    path = tmp_path / "presupuesto.json"
+    a = RateLimiter(delay=0, presupuesto=PresupuestoArchivo(path, tasa_total=100))
+    b = RateLimiter(delay=0, presupuesto=PresupuestoArchivo(path, tasa_total=100))
+
+    a.feedback(429, 0.1, retry_after=1)
+    assert b._reservar() > 0.8
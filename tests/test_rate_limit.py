@@ -0,0 +1,44 @@
+from utils.rate_limit import AIMDRateLimiter, RateLimiter, parse_retry_after
+
+
+def test_parse_retry_after_segundos():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("no-es-fecha") is None
+
+
+def test_rate_limiter_backoff_ante_429():
+    limiter = RateLimiter(delay=0.01)
+    limiter.feedback(429, 0.1, retry_after=2)
+
+    estado = limiter.estado()
+    assert estado["en_backoff"]
+    assert estado["backoff_restante"] > 1.5
+    assert estado["rechazos_consecutivos"] == 1
+
+
+def test_aimd_sube_con_respuestas_ok():
+    limiter = AIMDRateLimiter(tasa_inicial=1.0, incremento=0.5)
+    for _ in range(4):
+        limiter.feedback(200, 0.1)
+
+    assert limiter.estado()["tasa"] == 3.0
+
+
+def test_aimd_reduce_a_la_mitad_ante_rechazo():
+    limiter = AIMDRateLimiter(tasa_inicial=4.0, tasa_min=0.5)
+    limiter.feedback(503, 0.1)
+    assert limiter.estado()["tasa"] == 2.0
+
+    limiter.feedback(None, 30.0)
+    assert limiter.estado()["tasa"] == 1.0
+    assert limiter.estado()["reducciones"] == 2
+
+
+def test_aimd_reduce_ante_latencia_creciente():
+    limiter = AIMDRateLimiter(tasa_inicial=4.0, incremento=0.0)
+    limiter.feedback(200, 0.1)
+    for _ in range(10):
+        limiter.feedback(200, 2.0)
+
+    assert limiter.estado()["tasa"] < 4.0
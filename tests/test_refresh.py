@@ -0,0 +1,204 @@
+from datetime import date
+
+import pytest
+
+from services.refresh import _cambio_metadata, _cambio_real, refresh_estado_institucion
+from tests.bcn_stub import BCNStubServer, Fallas
+from tests.corpus_sintetico import generar_corpus
+from utils import rate_limit
+from utils.norm_parser import BCNXMLParser
+
+METADATOS_XML = """<?xml version="1.0" encoding="utf-8"?>
+<Norma xmlns="http://www.leychile.cl/esquemas" normaId="206396"
+       derogado="derogado" esTratado="no tratado" fechaVersion="2024-03-01">
+  <Identificador fechaPromulgacion="2002-11-20" fechaPublicacion="2002-12-05">
+    <TiposNumeros><TipoNumero><Tipo>Decreto</Tipo><Numero>95</Numero></TipoNumero></TiposNumeros>
+    <Organismos><Organismo>MINISTERIO DE SALUD</Organismo></Organismos>
+  </Identificador>
+  <Metadatos>
+    <TituloNorma>REGLAMENTO DE PRUEBA</TituloNorma>
+    <Materias><Materia>Salud</Materia><Materia>Reglamento</Materia></Materias>
+  </Metadatos>
+</Norma>"""
+
+
+def _guardada(**cambios):
+    guardada = {
+        "id": 206396,
+        "id_tipo": 3,
+        "titulo": "REGLAMENTO DE PRUEBA",
+        "estado": "derogada",
+        "fecha_publicacion": date(2002, 12, 5),
+        "fecha_promulgacion": date(2002, 11, 20),
+        "fecha_version": date(2024, 3, 1),
+    }
+    guardada.update(cambios)
+    return guardada
+
+
+def test_parse_metadata_sin_markdown():
+    norma = BCNXMLParser().parse_metadata(METADATOS_XML)
+    assert norma.norma_id == 206396
+    assert norma.derogado
+    assert norma.fecha_version == date(2024, 3, 1)
+    assert norma.to_parsed_data()["estado"] == "derogada"
+
+
+def test_sin_cambios_no_descarga_ni_actualiza():
+    parsed = BCNXMLParser().parse_metadata(METADATOS_XML).to_parsed_data()
+    assert not _cambio_real(_guardada(), parsed)
+    assert not _cambio_metadata(_guardada(), ["Reglamento", "Salud"], parsed)
+
+
+def test_nueva_version_o_derogacion_es_cambio_real():
+    parsed = BCNXMLParser().parse_metadata(METADATOS_XML).to_parsed_data()
+    assert _cambio_real(_guardada(fecha_version=date(2020, 1, 1)), parsed)
+    assert _cambio_real(_guardada(estado="vigente"), parsed)
+
+
+def test_fecha_version_vacia_solo_se_completa():
+    parsed = BCNXMLParser().parse_metadata(METADATOS_XML).to_parsed_data()
+    guardada = _guardada(fecha_version=None)
+    assert not _cambio_real(guardada, parsed)
+    assert _cambio_metadata(guardada, ["Reglamento", "Salud"], parsed)
+
+
+def test_cambio_de_materias_se_actualiza_sin_descargar():
+    parsed = BCNXMLParser().parse_metadata(METADATOS_XML).to_parsed_data()
+    assert not _cambio_real(_guardada(), parsed)
+    assert _cambio_metadata(_guardada(), ["Salud"], parsed)
+
+
+class _Normas:
+    def __init__(self, md_dir, guardadas, resultado):
+        self.md_dir = md_dir
+        self.guardadas = guardadas
+        self.resultado = resultado  # id_norma -> lo que devuelve save()
+        self.actualizadas = []
+
+    def get_estado_by_institucion(self, id_institucion):
+        return self.guardadas
+
+    def update_estado_many(self, cambios):
+        self.actualizadas.extend(c["id_norma"] for c in cambios)
+        return len(cambios)
+
+    def save(self, id_norma, markdown_file=None, **kwargs):
+        resultado = self.resultado[id_norma]
+        if isinstance(resultado, Exception):
+            raise resultado
+        return resultado
+
+
+class _Registro:
+    def __init__(self, materias=None):
+        self.materias = materias or {}
+        self.llamadas = []
+
+    def get_valores_by_normas(self, ids, clave):
+        return self.materias
+
+    def log(self, id_norma, estado, tipo_descarga="completa", error=None):
+        self.llamadas.append((id_norma, estado, tipo_descarga))
+
+    def log_many(self, entradas):
+        self.llamadas.append([(nid, estado, tipo) for nid, estado, tipo, _ in entradas])
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    """Corpus sintético servido por el stub y estado guardado igual al de la BCN."""
+    generar_corpus(tmp_path / "corpus", n_normas=4, n_instituciones=1, seed=2)
+    monkeypatch.chdir(tmp_path)
+    aimd = rate_limit.AIMDRateLimiter
+    monkeypatch.setattr(
+        rate_limit,
+        "AIMDRateLimiter",
+        lambda: aimd(tasa_inicial=1000, tasa_max=1000, backoff_base=0.001),
+    )
+
+    parser = BCNXMLParser()
+    guardadas, materias = {}, {}
+    for xml in sorted((tmp_path / "corpus" / "metadatos").glob("*.xml")):
+        parsed = parser.parse_metadata(xml.read_bytes()).to_parsed_data()
+        nid = int(xml.stem)
+        guardadas[nid] = {"id": nid, "id_tipo": 1, **{c: parsed.get(c) for c in (
+            "titulo", "estado", "fecha_publicacion", "fecha_promulgacion", "fecha_version"
+        )}}
+        materias[nid] = parsed.get("materias") or []
+
+    with BCNStubServer(tmp_path / "corpus") as stub:
+        monkeypatch.setenv("BCN_BASE_URL", stub.url)
+        yield tmp_path, guardadas, materias, stub
+
+
+def test_refresh_actualiza_estado_y_cuenta_solo_descargas_reales(corpus):
+    tmp_path, guardadas, materias, _ = corpus
+    sin_cambios, nueva_version, mismo_xml, _ = sorted(guardadas)
+    for nid in (nueva_version, mismo_xml):
+        guardadas[nid]["estado"] = "derogada" if guardadas[nid]["estado"] == "vigente" else "vigente"
+
+    normas = _Normas(tmp_path, guardadas, {nueva_version: "actualizada", mismo_xml: "sin_cambios"})
+    managers = {"normas": normas, "metadata": _Registro(materias), "logger": _Registro()}
+
+    stats = refresh_estado_institucion(1, managers)
+
+    # El estado de las normas con cambio real se actualiza aunque se descarguen
+    assert sorted(normas.actualizadas) == sorted([nueva_version, mismo_xml])
+    assert stats.descargadas == 1
+    assert stats.sin_cambios == 3 and stats.actualizadas == 0 and stats.errores == 0
+
+
+@pytest.mark.parametrize("concurrencia", [1, 3])
+def test_refresh_aborta_con_el_circuito_abierto(corpus, concurrencia):
+    tmp_path, guardadas, materias, stub = corpus
+    stub.fallas = Fallas(prob_5xx=1.0)
+    normas = _Normas(tmp_path, guardadas, {})
+    managers = {"normas": normas, "metadata": _Registro(materias), "logger": _Registro()}
+
+    stats = refresh_estado_institucion(1, managers, concurrencia=concurrencia)
+
+    assert stats.error and "Circuito BCN abierto" in stats.error
+    assert stats.circuito == "abierto" and stats.aperturas_circuito == 1
+    assert stats.descargadas == 0 and not normas.actualizadas
+
+
+@pytest.mark.parametrize("falla", ["guardado", "sin_descargar"])
+def test_cambio_sin_guardar_se_vuelve_a_detectar(corpus, falla):
+    tmp_path, guardadas, materias, _ = corpus
+    nid = min(guardadas)
+    guardadas[nid]["fecha_version"] = date(1990, 1, 1)
+    normas = _Normas(tmp_path, guardadas, {nid: RuntimeError("disco lleno")})
+    managers = {"normas": normas, "metadata": _Registro(materias), "logger": _Registro()}
+
+    for _ in range(2):
+        resultados = {}
+        refresh_estado_institucion(
+            1,
+            managers,
+            on_progress=lambda i, total, n, r: resultados.__setitem__(n, r),
+            descargar=falla == "guardado",
+        )
+        # La segunda vuelta no recibe un 304 para la norma pendiente
+        assert resultados[nid] == "cambio"
+        assert set(resultados.values()) == {"cambio", "sin_cambios"}
+
+
+def test_refresh_registra_metadatos_en_un_solo_insert(corpus):
+    tmp_path, guardadas, materias, _ = corpus
+    con_titulo_nuevo = min(guardadas)
+    guardadas[con_titulo_nuevo]["titulo"] = "TÍTULO ANTERIOR"
+    guardadas[999999] = {**guardadas[max(guardadas)], "id": 999999}  # la BCN responde 404
+    registro = _Registro()
+    managers = {
+        "normas": _Normas(tmp_path, guardadas, {}),
+        "metadata": _Registro(materias),
+        "logger": registro,
+    }
+
+    stats = refresh_estado_institucion(1, managers)
+
+    assert stats.actualizadas == 1 and stats.errores == 1
+    assert registro.llamadas == [
+        [(999999, "error", "metadatos"), (con_titulo_nuevo, "exitosa", "metadatos")]
+    ]
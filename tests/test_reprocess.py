@@ -0,0 +1,65 @@
+import shutil
+from pathlib import Path
+
+from services.reprocess import reprocesar_normas
+
+SAMPLE = "data/sample/norma_completa.xml"
+
+
+class _Normas:
+    def __init__(self, normas, md_dir):
+        self.normas = normas
+        self.md_dir = md_dir
+        self.guardadas = []
+
+    def get_para_reprocesar(self, **filtros):
+        return self.normas
+
+    def update_reprocesadas(self, filas):
+        self.guardadas.extend(filas)
+        return len(filas)
+
+
+class _Logger:
+    def __init__(self):
+        self.errores = []
+
+    def log(self, id_norma, estado, tipo_descarga="completa", error=None):
+        self.errores.append((id_norma, estado, error))
+
+
+def test_reprocesa_desde_xml_local_sin_bcn(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    xml_dir = tmp_path / "xml"
+    xml_dir.mkdir()
+    md_dir = tmp_path / "md"
+    md_dir.mkdir()
+    for nid in (1, 2, 3):
+        shutil.copy(Path(__file__).parent.parent / SAMPLE, xml_dir / f"{nid}.xml")
+    (xml_dir / "4.xml").write_bytes(b"<Norma")
+
+    normas = _Normas(
+        [{"id": nid, "xml_path": str(xml_dir / f"{nid}.xml"), "md_path": None} for nid in (1, 2, 3, 4)]
+        + [{"id": 5, "xml_path": str(xml_dir / "5.xml"), "md_path": None}],
+        md_dir,
+    )
+    managers = {"normas": normas, "logger": _Logger()}
+    progreso = []
+
+    stats = reprocesar_normas(
+        managers,
+        procesos=1,
+        lote=2,
+        on_progress=lambda i, total, nid, resultado: progreso.append((nid, resultado)),
+    )
+
+    assert stats.reprocesadas == 3 and stats.errores == 1 and stats.sin_xml == 1
+    assert sorted(progreso) == [
+        (1, "reprocesada"), (2, "reprocesada"), (3, "reprocesada"), (4, "error"), (5, "sin_xml")
+    ]
+    assert [f["id_norma"] for f in normas.guardadas] == [1, 2, 3]
+    assert normas.guardadas[0]["parsed_data"]["titulo"]
+    assert "Artículo 1º" in normas.guardadas[0]["parsed_data"]["contenido_texto"]
+    assert normas.guardadas[0]["articulos"]
+    assert (md_dir / "1.md").read_text(encoding="utf-8").startswith("# ")
+    assert managers["logger"].errores[0][:2] == (4, "error")
@@ -0,0 +1,242 @@
+import hashlib
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from managers import norms as norms_module
+from managers.downloads import DownloadManager
+from managers.norms import NormsManager
+
+
+class _Conexion:
+    """Conexión que registra las sentencias; el SELECT de normas existentes lee `existentes`."""
+
+    encoding = "UTF8"
+
+    def __init__(self, existentes=None, falla=None):
+        self.existentes = existentes or {}
+        self.falla = falla  # predicado sobre el SQL: si da True, la sentencia falla
+        self.sentencias = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class _Cursor:
+    def __init__(self, conn):
+        self.connection = conn
+        self.filas = []
+
+    def mogrify(self, template, args):
+        return ("(" + ", ".join(repr(a) for a in args) + ")").encode()
+
+    def execute(self, sql, params=None):
+        texto = sql.decode() if isinstance(sql, bytes) else sql
+        conn = self.connection
+        if conn.falla and conn.falla(texto):
+            raise RuntimeError("fallo simulado")
+        conn.sentencias.append(texto if params is None else f"{texto} {params!r}")
+
+        if "SELECT to_regclass" in texto:
+            self.filas = [("normas_texto",)]
+        elif "SELECT id, hash_xml" in texto:
+            self.filas = [(i, *conn.existentes[i]) for i in params[0] if i in conn.existentes]
+        elif "SELECT hash_xml" in texto:
+            fila = conn.existentes.get(params[0])
+            self.filas = [fila] if fila else []
+
+    def executemany(self, sql, filas):
+        for params in filas:
+            self.execute(sql, params)
+
+    def fetchone(self):
+        return self.filas[0] if self.filas else None
+
+    def fetchall(self):
+        return self.filas
+
+    def close(self):
+        pass
+
+
+def _articulo(nombre):
+    return SimpleNamespace(
+        orden=0, tipo_parte="Artículo", id_parte="1", nombre=nombre, titulo=None,
+        nivel=1, ruta=None, derogado=False, transitorio=False, inicio=0, fin=10,
+    )
+
+
+def _fila(nid, xml=None, articulo="Artículo 1"):
+    xml = xml or f"<Norma normaId='{nid}'/>"
+    return {
+        "id_norma": nid,
+        "xml_content": xml.encode(),
+        "parsed_data": {"titulo": f"Norma {nid}", "materias": ["salud"], "derogado": False},
+        "id_tipo": 1,
+        "id_institucion": 7,
+        "markdown": f"# Norma {nid}",
+        "hash_xml": hashlib.md5(xml.encode()).hexdigest(),
+        "articulos": [_articulo(articulo)],
+    }
+
+
+def _managers(tmp_path, conn):
+    normas = NormsManager(
+        xml_dir=str(tmp_path / "xml"), md_dir=str(tmp_path / "md"), db_connection=conn
+    )
+    descargas = DownloadManager(db_connection=conn)
+    conn.sentencias.clear()
+    conn.commits = 0
+    return normas, descargas
+
+
+def test_save_many_una_sentencia_por_tabla_y_un_commit(tmp_path):
+    conn = _Conexion()
+    normas, descargas = _managers(tmp_path, conn)
+
+    (tmp_path / "xml" / "2.xml").write_text("<viejo/>")
+    sin_cambios = _fila(3)
+    conn.existentes = {
+        2: ("otro", str(tmp_path / "xml" / "2.xml"), None, "Norma 2", "vigente", 1),
+        3: (sin_cambios["hash_xml"], None, None, "Norma 3", "vigente", 1),
+    }
+    registros = [(9, "sin_cambios", "sincronizacion", None)]
+
+    resultados = normas.save_many(
+        [_fila(1), _fila(2), sin_cambios],
+        descargas=descargas,
+        tipo_descarga="sincronizacion",
+        registros=registros,
+    )
+
+    assert resultados == [("nueva", None), ("actualizada", None), ("sin_cambios", None)]
+    assert conn.commits == 1 and conn.rollbacks == 0
+    assert sum("INSERT INTO normas (" in s for s in conn.sentencias) == 1
+    assert sum("INSERT INTO descargas" in s for s in conn.sentencias) == 1
+    registradas = next(s for s in conn.sentencias if "INSERT INTO descargas" in s)
+    assert "(3, 'sin_cambios', 'sincronizacion', None)" in registradas
+    assert "(1, 'exitosa', 'sincronizacion', None)" in registradas
+    assert (tmp_path / "xml" / "2_v1.xml").read_text() == "<viejo/>"
+    assert (tmp_path / "md" / "1.md").read_text() == "# Norma 1"
+    assert not (tmp_path / "xml" / "3.xml").exists()
+    assert not list(tmp_path.glob("*/*.tmp"))
+
+    # La cantidad de sentencias no crece con el tamaño del lote
+    por_lote = len(conn.sentencias)
+    conn.sentencias.clear()
+    conn.existentes = {}
+    normas.save_many([_fila(nid) for nid in range(100, 160)], descargas=descargas)
+    assert len(conn.sentencias) == por_lote - 1  # sin versiones que archivar
+    assert conn.commits == 2
+
+
+def test_save_many_divide_en_lotes(tmp_path):
+    conn = _Conexion()
+    normas, descargas = _managers(tmp_path, conn)
+
+    resultados = normas.save_many([_fila(nid) for nid in range(1, 8)], lote=3)
+
+    assert [r for r, _ in resultados] == ["nueva"] * 7
+    assert conn.commits == 3
+
+
+@pytest.mark.parametrize("persistente", [False, True])
+def test_save_many_reintenta_norma_a_norma(tmp_path, persistente):
+    fallos = []
+
+    def falla(sql):
+        # El lote completo falla; norma a norma solo la que trae "ROMPE"
+        if "INSERT INTO normas_articulos" in sql and "ROMPE" in sql:
+            if persistente or not fallos:
+                fallos.append(sql)
+                return True
+        return False
+
+    conn = _Conexion(falla=falla)
+    normas, descargas = _managers(tmp_path, conn)
+    filas = [_fila(1), _fila(2, articulo="ROMPE"), _fila(3)]
+
+    resultados = normas.save_many(filas, descargas=descargas)
+
+    assert conn.rollbacks == (2 if persistente else 1)
+    if persistente:
+        assert resultados == [("nueva", None), ("error", "fallo simulado"), ("nueva", None)]
+    else:
+        assert [r for r, _ in resultados] == ["nueva"] * 3
+    assert (tmp_path / "xml" / "1.xml").exists() and (tmp_path / "xml" / "3.xml").exists()
+    assert not list(tmp_path.glob("*/*.tmp"))
+    registradas = [s for s in conn.sentencias if "INSERT INTO descargas" in s]
+    assert len(registradas) == 3
+    assert ("'error'" in registradas[1]) == persistente
+
+
+@pytest.mark.parametrize("falla_el_bloque", [False, True])
+def test_save_many_archiva_versiones_solo_tras_el_commit(tmp_path, monkeypatch, falla_el_bloque):
+    def falla(sql):
+        return falla_el_bloque and "INSERT INTO normas_articulos" in sql and "ROMPE" in sql
+
+    conn = _Conexion(falla=falla)
+    normas, descargas = _managers(tmp_path, conn)
+    (tmp_path / "xml" / "2.xml").write_text("<viejo/>")
+    conn.existentes = {2: ("otro", str(tmp_path / "xml" / "2.xml"), None, "Norma 2", "vigente", 1)}
+
+    copias = []
+    copiar = norms_module.shutil.copyfile
+    monkeypatch.setattr(
+        norms_module.shutil,
+        "copyfile",
+        lambda src, dst: copias.append((Path(dst).name, conn.commits)) or copiar(src, dst),
+    )
+
+    filas = [_fila(1), _fila(2), _fila(3, articulo="ROMPE" if falla_el_bloque else "Artículo 1")]
+    normas.save_many(filas, descargas=descargas)
+
+    # Una sola copia de la versión 1: tras el commit del bloque o, si el
+    # bloque se deshizo, la que hace save() al reintentar norma a norma
+    assert [nombre for nombre, _ in copias] == ["2_v1.xml"]
+    if not falla_el_bloque:
+        assert copias[0][1] == 1
+    assert (tmp_path / "xml" / "2_v1.xml").read_text() == "<viejo/>"
+    assert (tmp_path / "xml" / "2.xml").read_text() == filas[1]["xml_content"].decode()
+
+
+def test_update_estado_many_deshace_si_falla(tmp_path):
+    conn = _Conexion(falla=lambda sql: sql.startswith("DELETE FROM") and "ANY" in sql)
+    normas, _ = _managers(tmp_path, conn)
+
+    with pytest.raises(RuntimeError):
+        normas.update_estado_many([{"id_norma": 1, "parsed_data": _fila(1)["parsed_data"]}])
+
+    assert conn.rollbacks == 1 and conn.commits == 0
+
+
+def test_save_many_conserva_el_commit_si_falla_un_archivo(tmp_path, monkeypatch):
+    conn = _Conexion()
+    normas, descargas = _managers(tmp_path, conn)
+
+    reemplazar = norms_module.os.replace
+
+    def replace(origen, destino):
+        if Path(destino).name == "2.xml":
+            raise OSError(28, "No space left on device")
+        reemplazar(origen, destino)
+
+    monkeypatch.setattr(norms_module.os, "replace", replace)
+
+    resultados = normas.save_many([_fila(1), _fila(2), _fila(3)], descargas=descargas)
+
+    # El bloque ya se confirmó: no se deshace ni se reintenta norma a norma
+    assert resultados == [("nueva", None)] * 3
+    assert conn.commits == 1 and conn.rollbacks == 0
+    assert (tmp_path / "xml" / "1.xml").exists() and (tmp_path / "xml" / "3.xml").exists()
+    assert not (tmp_path / "xml" / "2.xml").exists()
+    assert not list(tmp_path.glob("*/*.tmp"))
@@ -0,0 +1,258 @@
+import shutil
+import threading
+from datetime import datetime
+
+import pytest
+
+from services.sync import planificar_listado, sync_institucion
+from tests.bcn_stub import BCNStubServer, Fallas
+from tests.corpus_sintetico import generar_corpus
+from utils import norm_parser, rate_limit
+
+
+class _Normas:
+    def __init__(self, md_dir):
+        self.md_dir = md_dir
+        self.guardadas = {}
+        self.lotes = []
+
+    def get_hashes(self, ids):
+        return {nid: fila["hash_xml"] for nid, fila in self.guardadas.items() if nid in ids}
+
+    def save(self, id_norma, hash_xml=None, markdown_file=None, articulos=None, **kwargs):
+        resultado = "actualizada" if id_norma in self.guardadas else "nueva"
+        if markdown_file:
+            markdown_file.replace(self.md_dir / f"{id_norma}.md")
+        self.guardadas[id_norma] = {"hash_xml": hash_xml, "articulos": articulos, **kwargs}
+        return resultado
+
+    def save_many(self, filas, lote=200, descargas=None, tipo_descarga="completa", registros=None):
+        self.lotes.append([fila["id_norma"] for fila in filas])
+        resultados = [(self.save(**fila), None) for fila in filas]
+        descargas.log_many(
+            list(registros or []) + [(f["id_norma"], "exitosa", tipo_descarga, None) for f in filas]
+        )
+        return resultados
+
+
+class _Conn:
+    def cursor(self):
+        return self
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _Registro:
+    def __init__(self):
+        self.llamadas = []
+
+    def add_batch(self, tipos):
+        self.llamadas.append(tipos)
+
+    def save(self, cursor, id_norma, parsed):
+        self.llamadas.append(id_norma)
+
+    def log(self, id_norma, estado, tipo_descarga="completa", error=None):
+        self.llamadas.append((id_norma, estado, error))
+
+    def log_many(self, entradas, cursor=None):
+        self.llamadas.append([(e[0], e[1]) for e in entradas])
+
+
+class _Listados:
+    def __init__(self):
+        self.snapshot = {}
+        self.marca = None
+        self.reloj = 0
+
+    def get_snapshot(self, id_institucion):
+        return dict(self.snapshot)
+
+    def get_marca(self, id_institucion):
+        return self.marca
+
+    def save_entradas(self, id_institucion, normas):
+        self.reloj += 1
+        for n in normas:
+            self.snapshot[n["id"]] = {"hash_entrada": n["hash_entrada"], "verificado_en": self.reloj}
+        return len(normas)
+
+    def cerrar_sync(self, id_institucion, normas, completo=True):
+        if completo:
+            ids = {n["id"] for n in normas}
+            self.snapshot = {nid: e for nid, e in self.snapshot.items() if nid in ids}
+        self.marca = {"ultimo_sync": datetime(2026, 1, 1), "normas_listadas": len(normas)}
+
+
+@pytest.fixture
+def entorno(tmp_path, monkeypatch):
+    """Corpus sintético servido por el stub, caché vacío y managers en memoria."""
+    generar_corpus(tmp_path / "corpus", n_normas=24, n_instituciones=1, seed=4)
+    monkeypatch.chdir(tmp_path)
+    aimd = rate_limit.AIMDRateLimiter
+    monkeypatch.setattr(
+        rate_limit, "AIMDRateLimiter", lambda: aimd(tasa_inicial=1000, tasa_max=1000, capacidad=50)
+    )
+    (tmp_path / "md").mkdir()
+    managers = {
+        "conn": _Conn(),
+        "normas": _Normas(tmp_path / "md"),
+        "tipos": _Registro(),
+        "metadata": _Registro(),
+        "logger": _Registro(),
+    }
+    with BCNStubServer(tmp_path / "corpus") as stub:
+        monkeypatch.setenv("BCN_BASE_URL", stub.url)
+        yield managers, stub
+
+
+@pytest.mark.parametrize("procesos", [1, 2])
+def test_pipeline_guarda_todo_y_luego_revalida(entorno, procesos, monkeypatch):
+    managers, stub = entorno
+    hilos = set()
+    eventos = []
+
+    # Los workers del parseo no se crean con fork: el pipeline corre con threads
+    inicios = []
+    pool = norm_parser.ProcessPoolExecutor
+
+    def pool_registrado(*args, **kwargs):
+        inicios.append(kwargs["mp_context"].get_start_method())
+        return pool(*args, **kwargs)
+
+    monkeypatch.setattr(norm_parser, "ProcessPoolExecutor", pool_registrado)
+
+    def on_progress(procesadas, total, id_norma, resultado):
+        hilos.add(threading.current_thread())
+        eventos.append((procesadas, total, resultado))
+
+    stats = sync_institucion(
+        1, managers, on_progress=on_progress, concurrencia=3, procesos=procesos, lote=5
+    )
+
+    assert stats.nuevas == 24 and stats.errores == 0 and not stats.error
+    assert [e[0] for e in eventos] == list(range(1, 25))
+    assert hilos == {threading.current_thread()}
+    assert all(fila["articulos"] for fila in managers["normas"].guardadas.values())
+    assert not list(managers["normas"].md_dir.glob("*.tmp"))
+    assert (not inicios) if procesos == 1 else (inicios and "fork" not in inicios)
+
+    # Una escritura (y un registro de descargas) por lote, no por norma
+    lotes = managers["normas"].lotes
+    assert sorted(nid for ids in lotes for nid in ids) == sorted(managers["normas"].guardadas)
+    assert all(len(ids) <= 5 for ids in lotes)
+    assert len(managers["logger"].llamadas) == len(lotes)
+
+    # Segunda pasada: todo vuelve 304 y no se parsea ni se guarda nada
+    managers["logger"].llamadas.clear()
+    stats = sync_institucion(1, managers, concurrencia=3, procesos=procesos)
+    assert stats.sin_cambios == 24 and stats.nuevas == stats.actualizadas == 0
+    registradas = [e for llamada in managers["logger"].llamadas for e in llamada]
+    assert sorted(registradas) == sorted((nid, "sin_cambios") for nid in managers["normas"].guardadas)
+
+
+def test_pipeline_cancelado_no_deja_temporales(entorno):
+    managers, stub = entorno
+    procesadas = []
+
+    stats = sync_institucion(
+        1,
+        managers,
+        on_progress=lambda i, total, nid, resultado: procesadas.append(nid),
+        cancelado=lambda: len(procesadas) >= 5,
+        capacidad=2,
+    )
+
+    # Se cancela entre lotes: lo guardado es exactamente lo informado
+    assert stats.cancelada
+    assert 5 <= len(procesadas) < 24
+    assert sorted(managers["normas"].guardadas) == sorted(procesadas)
+    assert not list(managers["normas"].md_dir.glob("*.tmp"))
+
+
+def test_pipeline_xml_grande_en_streaming(entorno, monkeypatch):
+    from services import pipeline
+
+    managers, stub = entorno
+    monkeypatch.setattr(pipeline, "UMBRAL_MARKDOWN_STREAMING", 0)
+
+    stats = sync_institucion(1, managers, concurrencia=2)
+
+    assert stats.nuevas == 24 and stats.errores == 0
+    assert len(list(managers["normas"].md_dir.glob("*.md"))) == 24
+    assert not list(managers["normas"].md_dir.glob("*.tmp"))
+
+
+def test_sync_incremental_descarga_solo_el_diff(entorno):
+    managers, stub = entorno
+    managers["listados"] = _Listados()
+
+    # Primer sync: sin snapshot, todo el listado
+    stats = sync_institucion(1, managers, concurrencia=2, muestra=3)
+    assert stats.nuevas == 24 and stats.omitidas == 0
+    assert managers["listados"].marca["normas_listadas"] == 24
+
+    # Segundo: una entrada cambiada, una fuera del snapshot y 3 de muestra
+    ids = sorted(managers["listados"].snapshot)
+    managers["listados"].snapshot[ids[0]]["hash_entrada"] = "otro"
+    del managers["listados"].snapshot[ids[1]]
+    stub.reset_stats()
+    stats = sync_institucion(1, managers, concurrencia=2, muestra=3)
+
+    assert stats.total_procesadas == 5 and stats.omitidas == 19
+    assert stub.stats()["por_endpoint"].get("norma_completa") == 5
+    assert ids[1] in managers["listados"].snapshot
+
+    # La muestra rota: el siguiente sync revisa otras normas
+    def verificadas_desde(reloj):
+        return {nid for nid, e in managers["listados"].snapshot.items() if e["verificado_en"] > reloj}
+
+    reloj = managers["listados"].reloj
+    stats = sync_institucion(1, managers, concurrencia=2, muestra=3)
+    muestra = verificadas_desde(reloj)
+    reloj = managers["listados"].reloj
+    stats = sync_institucion(1, managers, concurrencia=2, muestra=3)
+    assert stats.total_procesadas == 3 and len(muestra) == 3
+    assert not muestra & verificadas_desde(reloj)
+
+    # --force (o incremental=False) vuelve a recorrer todo
+    stats = sync_institucion(1, managers, concurrencia=2, incremental=False)
+    assert stats.total_procesadas == 24 and stats.omitidas == 0
+
+
+def test_listado_cortado_no_poda_el_snapshot(entorno):
+    managers, stub = entorno
+    managers["listados"] = _Listados()
+    sync_institucion(1, managers, concurrencia=2, muestra=0)
+    marca = managers["listados"].marca
+
+    # Sin el listado en caché, la BCN corta la respuesta a la mitad
+    shutil.rmtree("data/cache")
+    stub.fallas = Fallas(corte=0.5)
+    stats = sync_institucion(1, managers, concurrencia=2, muestra=0)
+
+    assert stats.listado_incompleto and not stats.error
+    assert 0 < stats.omitidas < 24
+    assert len(managers["listados"].snapshot) == 24
+    assert managers["listados"].marca is marca
+
+
+def test_planificar_listado_respeta_el_orden_del_listado():
+    normas = [{"id": i, "hash_entrada": f"h{i}"} for i in (5, 3, 9, 1)]
+    snapshot = {
+        5: {"hash_entrada": "h5", "verificado_en": datetime(2026, 1, 2)},
+        3: {"hash_entrada": "viejo", "verificado_en": datetime(2026, 1, 1)},
+        1: {"hash_entrada": "h1", "verificado_en": None},
+    }
+
+    plan = planificar_listado(normas, snapshot, muestra=1)
+
+    assert [n["id"] for n in plan.nuevas] == [9]
+    assert [n["id"] for n in plan.cambiadas] == [3]
+    assert [n["id"] for n in plan.muestra] == [1]  # nunca verificada: va primero
+    assert [n["id"] for n in plan.cola] == [3, 9, 1]
+    assert plan.omitidas == 1
@@ -86,7 +86,10 @@ class SyncModal(ModalScreen):
                 cancelado=lambda: self._cancelled,
             )
 
-            severity = "information" if stats.errores == 0 else "warning"
+            if stats.error:
+                severity = "error"
+            else:
+                severity = "information" if stats.errores == 0 else "warning"
             self.app.call_from_thread(
                 self.app.notify, stats.resumen(), severity=severity
             )
@@ -16,6 +16,7 @@ from dotenv import load_dotenv
 
 from managers.downloads import DownloadManager
 from managers.institutions import InstitutionManager
+from managers.listados import ListadosManager
 from managers.metadata import MetadataManager
 from managers.norms import NormsManager
 from managers.nlp import NLPManager
@@ -76,6 +77,7 @@ def build_sync_managers() -> dict:
         "tipos": TiposNormasManager(db_connection=conn),
         "metadata": MetadataManager(db_connection=conn),
         "logger": DownloadManager(db_connection=conn),
+        "listados": ListadosManager(db_connection=conn),
     }
 
 
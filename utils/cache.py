@@ -0,0 +1,736 @@
+"""
+Índice del caché de XMLs de la BCN.
+
+Los XMLs siguen guardándose como archivos en data/cache/; este índice
+(SQLite, en el mismo directorio) guarda por cada entrada:
+
+  - los validadores HTTP que devolvió la BCN (ETag y Last-Modified) para
+    revalidarla con un GET condicional: si la norma no cambió la BCN
+    responde 304 sin cuerpo;
+  - el tipo de endpoint, para aplicar un TTL distinto a listados y normas;
+  - el tamaño y el último acceso, para desalojar por LRU cuando el caché
+    supera su presupuesto de bytes y para que las estadísticas no tengan
+    que recorrer el directorio;
+  - el md5 del contenido, calculado una sola vez al descargar, para que
+    NormsManager.save no tenga que volver a hashear el XML.
+
+Los backends trabajan en bytes (el XML tal como llegó de la BCN); get()
+decodifica solo para los consumidores que necesitan str.
+
+El contenido en sí lo guarda un CacheBackend:
+
+  FileCacheBackend → un <md5>.xml sin comprimir por URL (layout histórico)
+  PackCacheBackend → entradas comprimidas (zstd si está instalado, si no
+                     zlib) en unos pocos archivos pack append-only, con su
+                     ubicación (pack, offset, largo) en el mismo SQLite.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:  # Dependencia opcional: sin ella se comprime con zlib
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Errores al descomprimir una entrada de pack truncada o con basura
+_ERRORES_COMPRESION = (zlib.error,) + ((zstandard.ZstdError,) if zstandard else ())
+
+Contenido = Union[str, bytes]
+
+
+def a_bytes(contenido: Contenido) -> bytes:
+    return contenido.encode("utf-8") if isinstance(contenido, str) else contenido
+
+
+def a_texto(data: bytes) -> str:
+    """Los XML de la BCN vienen en UTF-8; latin-1 como respaldo nunca falla."""
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("latin-1")
+
+
+class CacheIndex:
+    """Metadatos por clave de caché, persistidos en SQLite."""
+
+    FILENAME = "index.db"
+
+    # Columnas agregadas después de la primera versión del índice
+    _COLUMNAS_NUEVAS = {
+        "tipo": "TEXT",
+        "tamano": "INTEGER NOT NULL DEFAULT 0",
+        "accedido_en": "REAL NOT NULL DEFAULT 0",
+        "hash": "TEXT",
+    }
+
+    def __init__(self, cache_dir: Path):
+        self.path = Path(cache_dir) / self.FILENAME
+
+        # El cliente async usa el índice desde el thread de su event loop y
+        # varios schedulers pueden compartir el directorio de caché.
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._ensure_table()
+
+    def _ensure_table(self) -> None:
+        with self._lock:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entradas (
+                    clave          TEXT PRIMARY KEY,
+                    tipo           TEXT,
+                    tamano         INTEGER NOT NULL DEFAULT 0,
+                    etag           TEXT,
+                    last_modified  TEXT,
+                    guardado_en    REAL NOT NULL,
+                    validado_en    REAL NOT NULL,
+                    accedido_en    REAL NOT NULL DEFAULT 0,
+                    hash           TEXT
+                )
+                """
+            )
+
+            existentes = {
+                row[1] for row in self.conn.execute("PRAGMA table_info(entradas)")
+            }
+            for columna, definicion in self._COLUMNAS_NUEVAS.items():
+                if columna not in existentes:
+                    self.conn.execute(
+                        f"ALTER TABLE entradas ADD COLUMN {columna} {definicion}"
+                    )
+
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_entradas_accedido ON entradas(accedido_en)"
+            )
+            self.conn.commit()
+
+    def get(self, clave: str) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute(
+                """
+                SELECT tipo, tamano, etag, last_modified,
+                       guardado_en, validado_en, accedido_en, hash
+                FROM entradas WHERE clave = ?
+                """,
+                (clave,),
+            ).fetchone()
+
+        if not row:
+            return None
+
+        return {
+            "tipo": row[0],
+            "tamano": row[1],
+            "etag": row[2],
+            "last_modified": row[3],
+            "guardado_en": row[4],
+            "validado_en": row[5],
+            "accedido_en": row[6],
+            "hash": row[7],
+        }
+
+    def save(
+        self,
+        clave: str,
+        tipo: Optional[str] = None,
+        tamano: int = 0,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        guardado_en: Optional[float] = None,
+        hash: Optional[str] = None,
+    ) -> None:
+        """Registra (o reemplaza) una entrada recién descargada."""
+        ahora = time.time()
+        guardado_en = guardado_en or ahora
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT INTO entradas (
+                    clave, tipo, tamano, etag, last_modified,
+                    guardado_en, validado_en, accedido_en, hash
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(clave) DO UPDATE SET
+                    tipo          = excluded.tipo,
+                    tamano        = excluded.tamano,
+                    etag          = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    guardado_en   = excluded.guardado_en,
+                    validado_en   = excluded.validado_en,
+                    accedido_en   = excluded.accedido_en,
+                    hash          = excluded.hash
+                """,
+                (clave, tipo, tamano, etag, last_modified, guardado_en, guardado_en, ahora, hash),
+            )
+            self.conn.commit()
+
+    def touch(self, clave: str) -> None:
+        """Marca una entrada como revalidada (la BCN respondió 304)."""
+        ahora = time.time()
+        with self._lock:
+            self.conn.execute(
+                "UPDATE entradas SET validado_en = ?, accedido_en = ? WHERE clave = ?",
+                (ahora, ahora, clave),
+            )
+            self.conn.commit()
+
+    def mark_access(self, clave: str) -> None:
+        """Registra un cache hit para el orden LRU."""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE entradas SET accedido_en = ? WHERE clave = ?",
+                (time.time(), clave),
+            )
+            self.conn.commit()
+
+    def keys(self, tipo: Optional[str] = None) -> List[str]:
+        with self._lock:
+            if tipo:
+                rows = self.conn.execute(
+                    "SELECT clave FROM entradas WHERE tipo = ?", (tipo,)
+                ).fetchall()
+            else:
+                rows = self.conn.execute("SELECT clave FROM entradas").fetchall()
+        return [row[0] for row in rows]
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            row = self.conn.execute("SELECT COALESCE(SUM(tamano), 0) FROM entradas").fetchone()
+        return row[0]
+
+    def lru_candidates(self, bytes_a_liberar: int) -> List[str]:
+        """Claves menos usadas recientemente hasta sumar bytes_a_liberar."""
+        claves = []
+        liberados = 0
+        with self._lock:
+            cursor = self.conn.execute(
+                "SELECT clave, tamano FROM entradas ORDER BY accedido_en ASC, rowid ASC"
+            )
+            for clave, tamano in cursor:
+                if liberados >= bytes_a_liberar:
+                    break
+                claves.append(clave)
+                liberados += tamano
+        return claves
+
+    def delete(self, claves: List[str]) -> None:
+        with self._lock:
+            self.conn.executemany(
+                "DELETE FROM entradas WHERE clave = ?", [(c,) for c in claves]
+            )
+            self.conn.commit()
+
+    def stats(self) -> Dict:
+        """Totales por tipo de endpoint, sin tocar el directorio de caché."""
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT COALESCE(tipo, 'otro'), COUNT(*), COALESCE(SUM(tamano), 0)
+                FROM entradas
+                GROUP BY COALESCE(tipo, 'otro')
+                """
+            ).fetchall()
+
+        por_tipo = {tipo: {"archivos": n, "bytes": b} for tipo, n, b in rows}
+        return {
+            "total_archivos": sum(t["archivos"] for t in por_tipo.values()),
+            "total_bytes": sum(t["bytes"] for t in por_tipo.values()),
+            "por_tipo": por_tipo,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM entradas")
+            self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class CacheBackend:
+    """
+    Almacenamiento del contenido del caché. El índice (TTL, LRU, validadores)
+    vive aparte en CacheIndex; el backend solo guarda y recupera XMLs.
+    """
+
+    nombre = "base"
+
+    def get_bytes(self, clave: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def get(self, clave: str) -> Optional[str]:
+        data = self.get_bytes(clave)
+        return a_texto(data) if data is not None else None
+
+    def put(self, clave: str, contenido: Contenido) -> int:
+        """Guarda una entrada y devuelve los bytes que ocupa en disco."""
+        raise NotImplementedError
+
+    def exists(self, clave: str) -> bool:
+        raise NotImplementedError
+
+    def stat(self, clave: str) -> Optional[Tuple[int, float]]:
+        """(bytes en disco, fecha de escritura) de una entrada, o None."""
+        raise NotImplementedError
+
+    def delete(self, claves: List[str]) -> None:
+        raise NotImplementedError
+
+    def iter_items(
+        self, claves: Iterable[str], en_bytes: bool = False
+    ) -> Iterator[Tuple[str, Contenido]]:
+        """Recorre (clave, contenido) para reprocesar en bloque. Omite las faltantes."""
+        for clave in claves:
+            data = self.get_bytes(clave)
+            if data is not None:
+                yield clave, data if en_bytes else a_texto(data)
+
+    def compact(self) -> Dict:
+        """Recupera el espacio de entradas eliminadas. Devuelve un resumen."""
+        return {}
+
+    def stats(self) -> Dict:
+        return {}
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class FileCacheBackend(CacheBackend):
+    """Un archivo <md5(clave)>.xml por entrada, sin comprimir."""
+
+    nombre = "file"
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, clave: str) -> Path:
+        hash_key = hashlib.md5(clave.encode()).hexdigest()
+        return self.cache_dir / f"{hash_key}.xml"
+
+    def get_bytes(self, clave: str) -> Optional[bytes]:
+        try:
+            return self._path(clave).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def put(self, clave: str, contenido: Contenido) -> int:
+        # Escritura atómica: temporal en el mismo directorio + rename, para que
+        # un lector concurrente vea el XML anterior o el nuevo, nunca uno a medias.
+        path = self._path(clave)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, prefix=f".{path.stem}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(a_bytes(contenido))
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return path.stat().st_size
+
+    def exists(self, clave: str) -> bool:
+        return self._path(clave).exists()
+
+    def stat(self, clave: str) -> Optional[Tuple[int, float]]:
+        try:
+            st = self._path(clave).stat()
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime
+
+    def delete(self, claves: List[str]) -> None:
+        for clave in claves:
+            self._path(clave).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        for f in self.cache_dir.glob("*.xml"):
+            f.unlink()
+
+
+class PackCacheBackend(CacheBackend):
+    """
+    Entradas comprimidas en archivos pack append-only (packs/pack-NNNNN.bin).
+
+    Cada escritura se agrega al final del pack activo y su ubicación queda en
+    la tabla `packs` del índice SQLite, así que una lectura es un SELECT por
+    clave más un seek. Las entradas reemplazadas o eliminadas dejan bytes
+    muertos en su pack hasta que compact() reescribe los packs con solo las
+    entradas vivas.
+
+    La escritura ocurre dentro de una transacción IMMEDIATE de SQLite, que
+    sirve de lock entre procesos que comparten el directorio.
+
+    Durabilidad: put() no hace fsync del pack en cada entrada (en un disco
+    lento cuesta más que descargar la norma), sino cada FSYNC_CADA puts, en
+    sincronizar(), compact() y close(). Si se corta la luz antes, el índice
+    puede apuntar a bytes que no llegaron al disco: esas entradas se leen
+    como un miss (get_bytes devuelve None) y se vuelven a descargar. Es un
+    caché, así que se pierde a lo más un tramo de descargas, nunca datos.
+    """
+
+    nombre = "pack"
+
+    # Tamaño a partir del cual se abre un pack nuevo
+    PACK_MAX_BYTES = 256 * 1024 * 1024
+
+    # puts entre fsync del pack activo (1 = fsync en cada put)
+    FSYNC_CADA = 64
+
+    def __init__(self, cache_dir: Path, compresion: Optional[str] = None):
+        self.cache_dir = Path(cache_dir)
+        self.packs_dir = self.cache_dir / "packs"
+        self.packs_dir.mkdir(parents=True, exist_ok=True)
+
+        if compresion is None:
+            compresion = "zstd" if zstandard else "zlib"
+        if compresion == "zstd" and zstandard is None:
+            raise ValueError("Compresión zstd requiere el paquete 'zstandard'")
+        self.compresion = compresion
+
+        self._lock = threading.Lock()
+        self._sin_fsync: set = set()  # packs con escrituras sin fsync
+        self._puts_sin_fsync = 0
+        self.conn = sqlite3.connect(
+            self.cache_dir / CacheIndex.FILENAME,
+            timeout=30,
+            check_same_thread=False,
+            isolation_level=None,  # transacciones explícitas
+        )
+        self._ensure_table()
+
+    def _ensure_table(self) -> None:
+        with self._lock:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS packs (
+                    clave        TEXT PRIMARY KEY,
+                    pack         INTEGER NOT NULL,
+                    posicion     INTEGER NOT NULL,
+                    largo        INTEGER NOT NULL,
+                    compresion   TEXT NOT NULL,
+                    guardado_en  REAL NOT NULL
+                )
+                """
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_packs_ubicacion ON packs(pack, posicion)"
+            )
+
+    # ── Compresión ────────────────────────────────────────────────────────────
+
+    def _comprimir(self, contenido: Contenido) -> bytes:
+        data = a_bytes(contenido)
+        if self.compresion == "zstd":
+            return zstandard.ZstdCompressor(level=9).compress(data)
+        return zlib.compress(data, 6)
+
+    @staticmethod
+    def _descomprimir(data: bytes, compresion: str) -> bytes:
+        if compresion == "zstd":
+            if zstandard is None:
+                raise RuntimeError("Entrada zstd en caché sin el paquete 'zstandard'")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+    def _descomprimir_entrada(
+        self, clave: str, data: Optional[bytes], largo: int, compresion: str
+    ) -> Optional[bytes]:
+        """
+        Contenido de una entrada, o None si sus bytes no están completos en
+        el pack (escritura sin fsync perdida en un corte de luz).
+        """
+        if data is None or len(data) < largo:
+            logger.warning(f"Entrada de caché incompleta en el pack, se ignora: {clave}")
+            return None
+        try:
+            return self._descomprimir(data, compresion)
+        except _ERRORES_COMPRESION as e:
+            logger.warning(f"Entrada de caché corrupta en el pack, se ignora: {clave} ({e})")
+            return None
+
+    # ── Packs ─────────────────────────────────────────────────────────────────
+
+    def _pack_path(self, numero: int) -> Path:
+        return self.packs_dir / f"pack-{numero:05d}.bin"
+
+    def _pack_numeros(self) -> List[int]:
+        return sorted(int(p.stem.split("-")[1]) for p in self.packs_dir.glob("pack-*.bin"))
+
+    def _pack_activo(self, largo: int) -> int:
+        numeros = self._pack_numeros()
+        if not numeros:
+            return 1
+        ultimo = numeros[-1]
+        if self._pack_path(ultimo).stat().st_size + largo > self.PACK_MAX_BYTES:
+            return ultimo + 1
+        return ultimo
+
+    def _fsync_packs(self, numeros: Iterable[int]) -> None:
+        for numero in numeros:
+            try:
+                with open(self._pack_path(numero), "rb") as f:
+                    os.fsync(f.fileno())
+            except FileNotFoundError:
+                # compact() ya lo reescribió con fsync y lo borró
+                pass
+
+    @staticmethod
+    def _cerrar_con_fsync(archivo) -> None:
+        archivo.flush()
+        os.fsync(archivo.fileno())
+        archivo.close()
+
+    def _fsync_directorio(self) -> None:
+        """fsync de packs/: que los packs creados o borrados sobrevivan un corte."""
+        if not hasattr(os, "O_DIRECTORY"):  # Windows no permite abrir directorios
+            return
+        fd = os.open(self.packs_dir, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def sincronizar(self) -> None:
+        """Fuerza a disco (fsync) las entradas escritas desde el último fsync."""
+        with self._lock:
+            self._fsync_packs(self._sin_fsync)
+            self._sin_fsync.clear()
+            self._puts_sin_fsync = 0
+
+    def _leer(self, pack: int, offset: int, largo: int) -> Optional[bytes]:
+        try:
+            with open(self._pack_path(pack), "rb") as f:
+                f.seek(offset)
+                return f.read(largo)
+        except FileNotFoundError:
+            # compact() de otro proceso movió la entrada
+            return None
+
+    def _ubicacion(self, clave: str) -> Optional[Tuple[int, int, int, str, float]]:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT pack, posicion, largo, compresion, guardado_en FROM packs WHERE clave = ?",
+                (clave,),
+            ).fetchone()
+
+    # ── Interfaz CacheBackend ─────────────────────────────────────────────────
+
+    def get_bytes(self, clave: str) -> Optional[bytes]:
+        ubicacion = self._ubicacion(clave)
+        if not ubicacion:
+            return None
+
+        pack, offset, largo, compresion, _ = ubicacion
+        return self._descomprimir_entrada(
+            clave, self._leer(pack, offset, largo), largo, compresion
+        )
+
+    def put(self, clave: str, contenido: Contenido) -> int:
+        data = self._comprimir(contenido)
+
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                pack = self._pack_activo(len(data))
+                with open(self._pack_path(pack), "ab") as f:
+                    offset = f.seek(0, os.SEEK_END)
+                    f.write(data)
+                    f.flush()
+                    # fsync por tandas: ver "Durabilidad" en el docstring
+                    self._sin_fsync.add(pack)
+                    self._puts_sin_fsync += 1
+                    if self._puts_sin_fsync >= self.FSYNC_CADA:
+                        os.fsync(f.fileno())
+                        self._fsync_packs(self._sin_fsync - {pack})
+                        self._sin_fsync.clear()
+                        self._puts_sin_fsync = 0
+
+                self.conn.execute(
+                    """
+                    INSERT OR REPLACE INTO packs
+                        (clave, pack, posicion, largo, compresion, guardado_en)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (clave, pack, offset, len(data), self.compresion, time.time()),
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        return len(data)
+
+    def exists(self, clave: str) -> bool:
+        return self._ubicacion(clave) is not None
+
+    def stat(self, clave: str) -> Optional[Tuple[int, float]]:
+        ubicacion = self._ubicacion(clave)
+        if not ubicacion:
+            return None
+        return ubicacion[2], ubicacion[4]
+
+    def delete(self, claves: List[str]) -> None:
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    "DELETE FROM packs WHERE clave = ?", [(c,) for c in claves]
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def iter_items(
+        self, claves: Iterable[str], en_bytes: bool = False
+    ) -> Iterator[Tuple[str, Contenido]]:
+        # Se leen en orden de (pack, offset) para que el disco lea secuencial
+        claves = list(claves)
+        with self._lock:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS _claves (clave TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM _claves")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO _claves VALUES (?)", [(c,) for c in claves]
+            )
+            ubicaciones = self.conn.execute(
+                """
+                SELECT p.clave, p.pack, p.posicion, p.largo, p.compresion
+                FROM packs p JOIN _claves c ON c.clave = p.clave
+                ORDER BY p.pack, p.posicion
+                """
+            ).fetchall()
+
+        archivo, abierto = None, None
+        try:
+            for clave, pack, offset, largo, compresion in ubicaciones:
+                if pack != abierto:
+                    if archivo:
+                        archivo.close()
+                    try:
+                        archivo = open(self._pack_path(pack), "rb")
+                    except FileNotFoundError:
+                        archivo, abierto = None, None
+                        continue
+                    abierto = pack
+                archivo.seek(offset)
+                data = self._descomprimir_entrada(clave, archivo.read(largo), largo, compresion)
+                if data is None:
+                    continue
+                yield clave, data if en_bytes else a_texto(data)
+        finally:
+            if archivo:
+                archivo.close()
+
+    def compact(self) -> Dict:
+        """
+        Reescribe las entradas vivas en packs nuevos y borra los anteriores.
+        Bloquea las escrituras de otros procesos mientras dura.
+        """
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                viejos = self._pack_numeros()
+                bytes_antes = sum(self._pack_path(n).stat().st_size for n in viejos)
+
+                filas = self.conn.execute(
+                    "SELECT clave, pack, posicion, largo FROM packs ORDER BY pack, posicion"
+                ).fetchall()
+
+                numero = (viejos[-1] + 1) if viejos else 1
+                destino = open(self._pack_path(numero), "wb")
+                nuevas = []
+                try:
+                    for clave, pack, offset, largo in filas:
+                        data = self._leer(pack, offset, largo)
+                        if data is None or len(data) < largo:
+                            continue
+                        if destino.tell() + largo > self.PACK_MAX_BYTES and destino.tell():
+                            self._cerrar_con_fsync(destino)
+                            numero += 1
+                            destino = open(self._pack_path(numero), "wb")
+                        nuevas.append((numero, destino.tell(), clave))
+                        destino.write(data)
+                    self._cerrar_con_fsync(destino)
+                finally:
+                    destino.close()
+                # El índice va a apuntar a los packs nuevos: sus entradas en
+                # el directorio tienen que estar en disco antes del COMMIT
+                self._fsync_directorio()
+
+                self.conn.executemany(
+                    "UPDATE packs SET pack = ?, posicion = ? WHERE clave = ?", nuevas
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+            # Cada pack nuevo tuvo fsync al cerrarse; los viejos se borran
+            self._sin_fsync.clear()
+            self._puts_sin_fsync = 0
+            for n in viejos:
+                self._pack_path(n).unlink(missing_ok=True)
+
+        bytes_despues = sum(self._pack_path(n).stat().st_size for n in self._pack_numeros())
+        logger.info(
+            f"Caché compactado: {len(nuevas)} entradas, "
+            f"{(bytes_antes - bytes_despues) / (1024 * 1024):.2f} MB liberados"
+        )
+        return {
+            "entradas": len(nuevas),
+            "bytes_antes": bytes_antes,
+            "bytes_despues": bytes_despues,
+        }
+
+    def stats(self) -> Dict:
+        numeros = self._pack_numeros()
+        en_disco = sum(self._pack_path(n).stat().st_size for n in numeros)
+        with self._lock:
+            vivos = self.conn.execute("SELECT COALESCE(SUM(largo), 0) FROM packs").fetchone()[0]
+        return {
+            "packs": len(numeros),
+            "bytes_en_disco": en_disco,
+            "bytes_muertos": en_disco - vivos,
+            "compresion": self.compresion,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("DELETE FROM packs")
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            for n in self._pack_numeros():
+                self._pack_path(n).unlink(missing_ok=True)
+
+    def close(self) -> None:
+        self.sincronizar()
+        self.conn.close()
+
+
+def make_backend(cache_dir: Path, nombre: Optional[str] = None) -> CacheBackend:
+    """Construye el backend indicado ('file' | 'pack'); por defecto BCN_CACHE_BACKEND."""
+    nombre = nombre or os.getenv("BCN_CACHE_BACKEND", "file")
+    if nombre == "pack":
+        return PackCacheBackend(cache_dir)
+    if nombre == "file":
+        return FileCacheBackend(cache_dir)
+    raise ValueError(f"Backend de caché desconocido: {nombre}")
@@ -0,0 +1,178 @@
+"""
+Circuit breaker para las requests a la BCN.
+
+Cuando leychile.cl está caído cada norma gasta varios timeouts completos
+antes de darse por perdida. El breaker corta eso:
+
+    cerrado     → requests normales; cuenta fallas consecutivas (timeouts,
+                  errores de conexión, 5xx). Al llegar a `umbral_fallas` abre.
+    abierto     → toda request falla al instante con CircuitoAbierto durante
+                  `enfriamiento` segundos.
+    semiabierto → pasado el enfriamiento se deja pasar `max_sondeos` requests
+                  de prueba. Si responden, el circuito se cierra; si fallan,
+                  vuelve a abrirse con el enfriamiento duplicado (hasta
+                  `enfriamiento_max`).
+
+Un 429 no cuenta como falla: la BCN está viva, solo pide bajar la tasa (eso
+lo maneja el rate limiter).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CERRADO = "cerrado"
+ABIERTO = "abierto"
+SEMIABIERTO = "semiabierto"
+
+
+class CircuitoAbierto(Exception):
+    """La BCN no responde: la request se rechazó sin enviarse."""
+
+    def __init__(self, reintentar_en: float, fallas: int):
+        self.reintentar_en = reintentar_en
+        self.fallas = fallas
+        super().__init__(
+            f"Circuito BCN abierto tras {fallas} fallas consecutivas; "
+            f"próximo intento en {reintentar_en:.0f}s"
+        )
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        umbral_fallas: int = 5,
+        enfriamiento: float = 30.0,
+        enfriamiento_max: float = 600.0,
+        max_sondeos: int = 1,
+    ):
+        self.umbral_fallas = umbral_fallas
+        self.enfriamiento_base = enfriamiento
+        self.enfriamiento_max = enfriamiento_max
+        self.max_sondeos = max_sondeos
+
+        self._lock = threading.Lock()
+        self._estado = CERRADO
+        self._fallas_consecutivas = 0
+        self._enfriamiento = enfriamiento
+        self._abierto_hasta = 0.0
+        self._sondeos_en_curso = 0
+        self._ultimo_sondeo = 0.0
+        self.aperturas = 0
+
+    def antes_de_request(self) -> None:
+        """Lanza CircuitoAbierto si la request no debe enviarse."""
+        with self._lock:
+            if self._estado == CERRADO:
+                return
+
+            ahora = time.monotonic()
+            if self._estado == ABIERTO:
+                if ahora < self._abierto_hasta:
+                    raise CircuitoAbierto(self._abierto_hasta - ahora, self._fallas_consecutivas)
+                self._estado = SEMIABIERTO
+                self._sondeos_en_curso = 0
+                logger.info("Circuito BCN semiabierto — enviando request de prueba")
+
+            # Semiabierto: solo pasan los sondeos. Un sondeo que nunca informó
+            # su resultado (p. ej. excepción inesperada) libera su cupo al
+            # cumplirse otro enfriamiento.
+            if ahora - self._ultimo_sondeo >= self._enfriamiento:
+                self._sondeos_en_curso = 0
+            if self._sondeos_en_curso >= self.max_sondeos:
+                raise CircuitoAbierto(self._enfriamiento, self._fallas_consecutivas)
+
+            self._sondeos_en_curso += 1
+            self._ultimo_sondeo = ahora
+
+    @property
+    def sondeo_en_curso(self) -> bool:
+        with self._lock:
+            return self._estado == SEMIABIERTO and self._sondeos_en_curso >= self.max_sondeos
+
+    def esperar_turno(self, intervalo: float = 0.1) -> None:
+        """
+        Como antes_de_request(), pero mientras hay un sondeo en curso espera
+        su resultado en vez de fallar: si la BCN respondió se sigue, si no
+        se lanza CircuitoAbierto. Evita que requests concurrentes al sondeo
+        aborten el sync justo cuando la BCN vuelve.
+        """
+        while True:
+            try:
+                return self.antes_de_request()
+            except CircuitoAbierto:
+                if not self.sondeo_en_curso:
+                    raise
+            time.sleep(intervalo)
+
+    async def esperar_turno_async(self, intervalo: float = 0.1) -> None:
+        """Igual que esperar_turno() pero cede el event loop mientras espera."""
+        while True:
+            try:
+                return self.antes_de_request()
+            except CircuitoAbierto:
+                if not self.sondeo_en_curso:
+                    raise
+            await asyncio.sleep(intervalo)
+
+    def registrar_exito(self) -> None:
+        with self._lock:
+            if self._estado != CERRADO:
+                logger.info("Circuito BCN cerrado — la BCN volvió a responder")
+            self._estado = CERRADO
+            self._fallas_consecutivas = 0
+            self._enfriamiento = self.enfriamiento_base
+            self._sondeos_en_curso = 0
+
+    def registrar_falla(self) -> None:
+        with self._lock:
+            self._fallas_consecutivas += 1
+
+            if self._estado == SEMIABIERTO:
+                # El sondeo falló: se vuelve a abrir con más enfriamiento
+                self._enfriamiento = min(self.enfriamiento_max, self._enfriamiento * 2)
+                self._abrir()
+            elif self._estado == CERRADO and self._fallas_consecutivas >= self.umbral_fallas:
+                self._abrir()
+
+    def _abrir(self) -> None:
+        self._estado = ABIERTO
+        self._abierto_hasta = time.monotonic() + self._enfriamiento
+        self._sondeos_en_curso = 0
+        self.aperturas += 1
+        logger.warning(
+            f"Circuito BCN abierto tras {self._fallas_consecutivas} fallas — "
+            f"pausa de {self._enfriamiento:.0f}s"
+        )
+
+    @property
+    def abierto(self) -> bool:
+        with self._lock:
+            return self._estado != CERRADO
+
+    def reintentar_en(self) -> Optional[float]:
+        """Segundos hasta que se permita el próximo sondeo, o None si está cerrado."""
+        with self._lock:
+            if self._estado == CERRADO:
+                return None
+            return max(0.0, self._abierto_hasta - time.monotonic())
+
+    def estado(self) -> Dict:
+        with self._lock:
+            return {
+                "estado": self._estado,
+                "fallas_consecutivas": self._fallas_consecutivas,
+                "aperturas": self.aperturas,
+                "enfriamiento": self._enfriamiento,
+                "reintentar_en": (
+                    max(0.0, self._abierto_hasta - time.monotonic())
+                    if self._estado != CERRADO
+                    else None
+                ),
+            }
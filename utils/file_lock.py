@@ -0,0 +1,113 @@
+"""
+Lock exclusivo entre procesos basado en un archivo.
+
+Lo usan los clientes BCN para que, cuando varios procesos (schedulers, TUI,
+workers de la API) no encuentran la misma clave en caché a la vez, solo uno
+vaya a la BCN y el resto espere su resultado.
+
+Usa flock en POSIX y msvcrt.locking en Windows. El sistema operativo libera
+el lock si el proceso muere, así que un crash no deja claves bloqueadas.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLock:
+    """
+    Uso:
+        with FileLock(Path("data/cache/locks/abc.lock"), timeout=60):
+            ...
+    """
+
+    def __init__(self, path: Path, timeout: Optional[float] = None, intervalo: float = 0.05):
+        self.path = Path(path)
+        self.timeout = timeout
+        self.intervalo = intervalo
+        self._fd: Optional[int] = None
+
+    def _try_lock(self, fd: int) -> bool:
+        try:
+            if sys.platform == "win32":
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _open(self) -> int:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        return os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _limite(self) -> Optional[float]:
+        return None if self.timeout is None else time.monotonic() + self.timeout
+
+    def acquire(self) -> bool:
+        """
+        Espera el lock hasta `timeout` segundos (None = sin límite).
+        Devuelve False si se agotó la espera sin obtenerlo.
+        """
+        fd = self._open()
+        limite = self._limite()
+        while not self._try_lock(fd):
+            if limite is not None and time.monotonic() >= limite:
+                os.close(fd)
+                return False
+            time.sleep(self.intervalo)
+
+        self._fd = fd
+        return True
+
+    async def acquire_async(self) -> bool:
+        """Igual que acquire() pero cede el event loop mientras espera."""
+        fd = self._open()
+        limite = self._limite()
+        try:
+            while not self._try_lock(fd):
+                if limite is not None and time.monotonic() >= limite:
+                    os.close(fd)
+                    return False
+                await asyncio.sleep(self.intervalo)
+        except BaseException:
+            # Cancelación durante la espera: no quedarse con el descriptor
+            os.close(fd)
+            raise
+
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        try:
+            if sys.platform == "win32":
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    @property
+    def locked(self) -> bool:
+        return self._fd is not None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
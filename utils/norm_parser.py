@@ -1,7 +1,88 @@
+import io
+import logging
+import multiprocessing
+import os
 import xml.etree.ElementTree as ET
-from typing import Optional, List
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from itertools import islice
+from pathlib import Path
+from typing import IO, Any, Iterable, Iterator, Optional, List, TextIO, Tuple, Union
 from datetime import date
-from utils.norm_types import Norm
+from utils.norm_types import Articulo, NormRecord
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # lxml es opcional: sin él se usa xml.etree
+    lxml_etree = None
+
+BACKENDS = ("lxml", "etree")
+
+# Tamaño de los trozos con que render_markdown alimenta al parser incremental
+TAMANO_TROZO = 64 * 1024
+# parse_metadata lee de a poco: los metadatos suelen estar en los primeros KB
+TAMANO_TROZO_METADATOS = 8 * 1024
+
+logger = logging.getLogger(__name__)
+
+# parse_many se llama desde procesos con threads (pipeline de sync, API):
+# un fork copiaría locks tomados por otros threads, así que los workers
+# arrancan desde un forkserver (o spawn donde no existe)
+INICIO_WORKERS = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# Item de parse_many: (id, xml | ruta) o directamente la ruta de un XML guardado
+ItemParseo = Union[Tuple[Any, Union[str, bytes, os.PathLike]], os.PathLike]
+# Resultado de parse_many: (id, markdown, NormRecord), o (id, None, excepción) si falló.
+# Con con_indice=True se agrega la lista de Articulo (None si falló).
+ResultadoParseo = Union[
+    Tuple[Any, Optional[str], Union[NormRecord, Exception]],
+    Tuple[Any, Optional[str], Union[NormRecord, Exception], Optional[List[Articulo]]],
+]
+
+
+# Marcas de estado que agrega el Markdown y no son texto de la norma
+_MARCAS_ESTADO = ("*[DEROGADO]*", "*[TRANSITORIO]*")
+
+
+def texto_plano(markdown: Union[str, Iterable[str]]) -> str:
+    """
+    Texto de la norma sin formato, para la búsqueda full-text: solo el
+    contenido de los elementos Texto (encabezado, articulado, promulgación,
+    anexos). Quita encabezados, la sección de Información Básica y las
+    marcas de estado; el título y las materias se indexan aparte.
+
+    Acepta el Markdown completo o sus líneas (p. ej. el archivo abierto que
+    escribió render_markdown), así no hace falta cargarlo entero.
+    """
+    lineas = markdown.splitlines() if isinstance(markdown, str) else markdown
+    partes: List[str] = []
+    en_info = False
+    for linea in lineas:
+        linea = linea.strip()
+        if linea.startswith("#"):
+            en_info = linea == "## Información Básica"
+            continue
+        if en_info or linea in _MARCAS_ESTADO:
+            continue
+        if linea.startswith("**") and linea.endswith("**") and len(linea) > 4:
+            linea = linea[2:-2]
+        if linea or (partes and partes[-1]):
+            partes.append(linea)
+    return "\n".join(partes).strip()
+
+
+def backend_por_defecto() -> str:
+    """lxml si está instalado, salvo que BCN_XML_BACKEND=etree lo desactive."""
+    if lxml_etree is None or os.getenv("BCN_XML_BACKEND", "").lower() == "etree":
+        return "etree"
+    return "lxml"
 
 
 class BCNXMLParser:
@@ -13,23 +94,334 @@ class BCNXMLParser:
         markdown, metadata = parser.parse_from_file('norma.xml')
         # O desde string:
         markdown, metadata = parser.parse_from_string(xml_string)
+
+    Backends ("lxml" | "etree"): ambos generan exactamente el mismo Markdown.
+    Por defecto se usa lxml si está instalado (BCN_XML_BACKEND=etree lo
+    desactiva). Los tags se resuelven una sola vez a notación Clark
+    ({ns}Tag), así find/findall no vuelven a expandir el prefijo bcn: en cada
+    llamada y xml.etree usa su búsqueda directa en C. Con lxml las búsquedas
+    en profundidad (TipoNumero, Organismo, Materia) son XPath precompiladas.
     """
     
-    def __init__(self, namespace: str = "http://www.leychile.cl/esquemas"):
+    def __init__(
+        self,
+        namespace: str = "http://www.leychile.cl/esquemas",
+        backend: Optional[str] = None,
+    ):
         self.ns = {'bcn': namespace}
+        self.backend = backend or backend_por_defecto()
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Backend XML desconocido: {self.backend!r} (lxml | etree)")
+        if self.backend == "lxml" and lxml_etree is None:
+            raise ValueError("El backend lxml requiere el paquete 'lxml'")
+
+        tag = lambda nombre: f"{{{namespace}}}{nombre}"
+        self._t_identificador = tag('Identificador')
+        self._t_metadatos = tag('Metadatos')
+        self._t_tipo_numero = tag('TipoNumero')
+        self._t_tipo = tag('Tipo')
+        self._t_numero = tag('Numero')
+        self._t_organismo = tag('Organismo')
+        self._t_titulo_norma = tag('TituloNorma')
+        self._t_materia = tag('Materia')
+        self._t_encabezado = tag('Encabezado')
+        self._t_estructuras = tag('EstructurasFuncionales')
+        self._t_estructura = tag('EstructuraFuncional')
+        self._t_nombre_parte = tag('NombreParte')
+        self._t_titulo_parte = tag('TituloParte')
+        self._t_texto = tag('Texto')
+        self._t_promulgacion = tag('Promulgacion')
+        self._t_anexos = tag('Anexos')
+        self._t_anexo = tag('Anexo')
+        self._t_titulo = tag('Titulo')
+        # Orden de los hijos de Norma y EstructuraFuncional en el esquema BCN
+        self._orden_esquema = {
+            t: i for i, t in enumerate((
+                self._t_identificador, self._t_texto, self._t_metadatos,
+                self._t_encabezado, self._t_estructuras, self._t_promulgacion,
+                self._t_anexos,
+            ))
+        }
+
+        if self.backend == "lxml":
+            xpath = lambda expr: lxml_etree.XPath(expr, namespaces=self.ns)
+            self._xp_tipo_numero = xpath('(bcn:Identificador//bcn:TipoNumero)[1]')
+            self._xp_organismos = xpath('bcn:Identificador//bcn:Organismo')
+            self._xp_materias = xpath('bcn:Metadatos//bcn:Materia')
+            # huge_tree: los códigos más grandes superan el límite por nodo de libxml2
+            self._lxml_parser = lxml_etree.XMLParser(
+                huge_tree=True, resolve_entities=False, no_network=True
+            )
+            self._lxml_parser_utf8 = lxml_etree.XMLParser(
+                encoding="utf-8", huge_tree=True, resolve_entities=False, no_network=True
+            )
+
+    def _fromstring(self, xml_string: Union[str, bytes]):
+        if self.backend == "etree":
+            return ET.fromstring(xml_string)
+        if isinstance(xml_string, str):
+            # lxml no acepta str con declaración de encoding: se pasa a UTF-8 y
+            # se fuerza ese encoding por sobre el declarado en el documento
+            return lxml_etree.fromstring(
+                xml_string.encode("utf-8"), parser=self._lxml_parser_utf8
+            )
+        return lxml_etree.fromstring(xml_string, parser=self._lxml_parser)
     
-    def parse_from_file(self, filepath: str) -> tuple[str, Norm]:
+    def parse_from_file(self, filepath: str) -> tuple[str, NormRecord]:
         """Parsea un archivo XML y retorna Markdown y metadatos"""
-        tree = ET.parse(filepath)
-        root = tree.getroot()
+        if self.backend == "lxml":
+            root = lxml_etree.parse(str(filepath), parser=self._lxml_parser).getroot()
+        else:
+            root = ET.parse(filepath).getroot()
         return self._parse_norma(root)
     
-    def parse_from_string(self, xml_string: str) -> tuple[str, Norm]:
-        """Parsea un string XML y retorna Markdown y metadatos"""
-        root = ET.fromstring(xml_string)
+    def parse_from_string(self, xml_string: Union[str, bytes]) -> tuple[str, NormRecord]:
+        """Parsea un XML (str, o bytes tal como vienen del caché) y retorna Markdown y metadatos"""
+        root = self._fromstring(xml_string)
         return self._parse_norma(root)
     
-    def _parse_norma(self, root: ET.Element) -> tuple[str, Norm]:
+    def parse_metadata(
+        self, fuente: Union[str, bytes, os.PathLike, IO[bytes]]
+    ) -> NormRecord:
+        """
+        Extrae solo los metadatos, sin generar Markdown: sirve para el XML de
+        opt=4546 y para normas completas. Parsea de forma incremental y deja
+        de leer apenas se cierran Identificador y Metadatos (en el esquema BCN
+        van antes del articulado), así el resto del documento ni se tokeniza.
+
+        `fuente` es el XML (str o bytes), una ruta (Path) o un archivo binario.
+        """
+        pull, trozos = self._pull_y_trozos(fuente, TAMANO_TROZO_METADATOS)
+        pendientes = {self._t_identificador, self._t_metadatos}
+        root = None
+        profundidad = 0
+        try:
+            for trozo in trozos:
+                pull.feed(trozo)
+                for evento, elem in pull.read_events():
+                    if evento == "start":
+                        if root is None:
+                            root = elem
+                        profundidad += 1
+                        continue
+                    profundidad -= 1
+                    if profundidad == 1:
+                        pendientes.discard(elem.tag)
+                        if not pendientes:
+                            return self._extract_metadata(root)
+            pull.close()
+            for evento, elem in pull.read_events():
+                if root is None and evento == "start":
+                    root = elem
+        finally:
+            trozos.close()
+
+        # Documento sin Identificador o Metadatos: mismo error que el parseo completo
+        return self._extract_metadata(root)
+    
+    def parse_con_indice(
+        self, fuente: Union[str, bytes, os.PathLike, IO[bytes]]
+    ) -> tuple[str, NormRecord, List[Articulo]]:
+        """
+        Como parse_from_string, pero además retorna el índice de estructuras
+        (artículos, títulos, párrafos...) con sus offsets en el Markdown.
+        """
+        destino = io.StringIO()
+        articulos: List[Articulo] = []
+        metadata = self.render_markdown(fuente, destino, indice=articulos)
+        return destino.getvalue(), metadata, articulos
+
+    def render_markdown(
+        self,
+        fuente: Union[str, bytes, os.PathLike, IO[bytes]],
+        destino: TextIO,
+        indice: Optional[List[Articulo]] = None,
+    ) -> NormRecord:
+        """
+        Escribe el Markdown de la norma en `destino` a medida que se parsea y
+        retorna los metadatos. No construye el árbol completo ni el string
+        final: cada EstructuraFuncional se escribe y se libera al cerrarse, así
+        la memoria no crece con el tamaño de la norma (Código Civil, Código
+        del Trabajo). El texto generado es idéntico al de parse_from_string.
+
+        `fuente` es el XML (str o bytes), una ruta (Path) o un archivo binario.
+        El streaming supone el orden del esquema BCN (Identificador y
+        Metadatos antes del resto; Texto y Metadatos antes de las
+        sub-estructuras). Si el documento no lo cumple se descarta lo escrito
+        y se renderiza desde el árbol completo, con el mismo resultado que
+        parse_from_string. Solo si `fuente` o `destino` no se pueden
+        rebobinar se lanza ValueError.
+
+        Si se pasa `indice`, se le agrega un Articulo por EstructuraFuncional
+        con su ubicación en bytes dentro del Markdown escrito.
+        """
+        releer = _posicion_inicial(fuente)
+        escrito = destino.tell() if destino.seekable() else None
+        indexados = len(indice) if indice is not None else 0
+
+        pull, trozos = self._pull_y_trozos(fuente)
+        try:
+            render = _MarkdownStreaming(self, destino, indice)
+            for trozo in trozos:
+                pull.feed(trozo)
+                render.procesar(pull.read_events())
+            pull.close()
+            render.procesar(pull.read_events())
+            return render.metadata
+
+        except ValueError as e:
+            if releer is None or escrito is None:
+                raise
+            logger.debug(f"Markdown en streaming descartado, se usa el árbol: {e}")
+        finally:
+            trozos.close()
+
+        destino.seek(escrito)
+        destino.truncate()
+        if indice is not None:
+            del indice[indexados:]
+        if not isinstance(fuente, (str, bytes, os.PathLike)):
+            fuente.seek(releer)
+
+        render = _MarkdownStreaming(self, destino, indice)
+        render.procesar(self._eventos_en_orden(self._raiz(fuente)))
+        return render.metadata
+
+    def _raiz(self, fuente: Union[str, bytes, os.PathLike, IO[bytes]]):
+        """Árbol completo de `fuente` (XML, ruta o archivo binario)."""
+        if isinstance(fuente, (str, bytes)):
+            return self._fromstring(fuente)
+        if self.backend == "lxml":
+            origen = str(fuente) if isinstance(fuente, os.PathLike) else fuente
+            return lxml_etree.parse(origen, parser=self._lxml_parser).getroot()
+        return ET.parse(fuente).getroot()
+
+    def _eventos_en_orden(self, elem) -> Iterator[Tuple[str, Any]]:
+        """
+        Eventos start/end de un árbol ya parseado, como los del parser
+        incremental pero con los hijos de cada elemento en el orden del
+        esquema BCN. El orden relativo de los tags iguales se mantiene, así
+        "el primero" sigue siendo el mismo que encuentra find().
+        """
+        orden = self._orden_esquema
+        yield "start", elem
+        for hijo in sorted(elem, key=lambda h: orden.get(h.tag, 0)):
+            yield from self._eventos_en_orden(hijo)
+        yield "end", elem
+
+    def parse_many(
+        self,
+        items: Iterable[ItemParseo],
+        procesos: Optional[int] = None,
+        chunksize: int = 16,
+        ordenado: bool = True,
+        con_indice: bool = False,
+    ) -> Iterator[ResultadoParseo]:
+        """
+        Parsea muchas normas repartiéndolas en un ProcessPoolExecutor: el
+        parseo es CPU pura y con threads no escala por el GIL.
+
+        Cada item es (id, xml) con el XML como str/bytes o una ruta, o solo la
+        ruta de un XML guardado (data/xml/<id>.xml), en cuyo caso el id es el
+        nombre del archivo. Las rutas las lee cada worker, así el XML no pasa
+        por el pipe entre procesos.
+
+        Los items se envían en lotes de `chunksize` y `items` se consume de a
+        poco (a lo más dos lotes por proceso en vuelo), así que sirve para
+        recorrer decenas de miles de archivos con memoria acotada. `items`
+        se recorre desde un thread aparte: los resultados listos se entregan
+        aunque el próximo item todavía no llegue.
+
+        Entrega (id, markdown, NormRecord) por norma: en el orden de entrada con
+        ordenado=True, o a medida que terminan los lotes con ordenado=False.
+        Un XML que no se puede parsear no corta el lote: llega como
+        (id, None, excepción). Con con_indice=True cada resultado trae además
+        el índice de artículos (parse_con_indice) como cuarto elemento.
+
+        procesos=None usa todos los núcleos; procesos=1 parsea en este mismo
+        proceso, sin pool. Los workers no se crean con fork (INICIO_WORKERS).
+        """
+        lotes = _en_lotes((_normalizar_item(item) for item in items), chunksize)
+
+        if procesos == 1:
+            for lote in lotes:
+                yield from _parsear_lote(self.ns['bcn'], self.backend, lote, con_indice)
+            return
+
+        procesos = procesos or os.cpu_count() or 1
+        limite = procesos * 2
+        contexto = multiprocessing.get_context(INICIO_WORKERS)
+        # La entrada se lee en un thread: si es perezosa (las descargas del
+        # pipeline) el próximo lote puede tardar, y lo ya parseado no debe
+        # quedar esperándolo. Se espera lo que llegue primero.
+        lector = ThreadPoolExecutor(max_workers=1, thread_name_prefix="parse-many-entrada")
+        try:
+            with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+                en_vuelo: deque = deque()
+                proximo = None  # lectura del próximo lote (None al agotar la entrada)
+                agotada = False
+
+                while True:
+                    if proximo is None and not agotada and len(en_vuelo) < limite:
+                        proximo = lector.submit(next, lotes, None)
+                    if proximo is None and not en_vuelo:
+                        break
+
+                    candidatos = [en_vuelo[0]] if ordenado and en_vuelo else list(en_vuelo)
+                    if proximo is not None:
+                        candidatos.append(proximo)
+                    terminados, _ = wait(candidatos, return_when=FIRST_COMPLETED)
+
+                    for futuro in [f for f in en_vuelo if f in terminados]:
+                        en_vuelo.remove(futuro)
+                        yield from futuro.result()
+
+                    if proximo is not None and proximo in terminados:
+                        lote = proximo.result()
+                        proximo = None
+                        if lote is None:
+                            agotada = True
+                        else:
+                            en_vuelo.append(
+                                pool.submit(
+                                    _parsear_lote, self.ns['bcn'], self.backend, lote, con_indice
+                                )
+                            )
+        finally:
+            lector.shutdown(wait=False, cancel_futures=True)
+
+    def _pull_y_trozos(self, fuente, tamano: int = TAMANO_TROZO):
+        """Parser incremental y generador de trozos de bytes/str para `fuente`."""
+        if isinstance(fuente, str):
+            pull = self._pull_parser(encoding="utf-8")
+            trozos = (fuente[i : i + tamano] for i in range(0, len(fuente), tamano))
+            if self.backend == "lxml":
+                trozos = (trozo.encode("utf-8") for trozo in trozos)
+        elif isinstance(fuente, bytes):
+            pull = self._pull_parser()
+            trozos = (fuente[i : i + tamano] for i in range(0, len(fuente), tamano))
+        elif isinstance(fuente, os.PathLike):
+            pull = self._pull_parser()
+            trozos = _leer_trozos(open(fuente, "rb"), cerrar=True, tamano=tamano)
+        else:
+            pull = self._pull_parser()
+            trozos = _leer_trozos(fuente, tamano=tamano)
+        return pull, trozos
+
+    def _pull_parser(self, encoding: Optional[str] = None):
+        eventos = ("start", "end")
+        if self.backend == "etree":
+            # pyexpat ya ignora la declaración de encoding cuando recibe str
+            return ET.XMLPullParser(events=eventos)
+        return lxml_etree.XMLPullParser(
+            events=eventos,
+            encoding=encoding,
+            huge_tree=True,
+            resolve_entities=False,
+            no_network=True,
+        )
+
+    def _parse_norma(self, root: ET.Element) -> tuple[str, NormRecord]:
         """Procesa el elemento raíz Norma"""
         md_parts = []
         
@@ -43,55 +435,60 @@ class BCNXMLParser:
         md_parts.append(self._format_info_basica(metadata))
         
         # Encabezado
-        encabezado = root.find('bcn:Encabezado', self.ns)
+        encabezado = root.find(self._t_encabezado)
         if encabezado is not None:
             md_parts.append(self._parse_encabezado(encabezado))
         
         # Estructuras Funcionales (Articulado)
-        estructuras = root.find('bcn:EstructurasFuncionales', self.ns)
+        estructuras = root.find(self._t_estructuras)
         if estructuras is not None:
             md_parts.append(self._parse_estructuras(estructuras))
         
         # Promulgación
-        promulgacion = root.find('bcn:Promulgacion', self.ns)
+        promulgacion = root.find(self._t_promulgacion)
         if promulgacion is not None:
             md_parts.append(self._parse_promulgacion(promulgacion))
         
         # Anexos
-        anexos = root.find('bcn:Anexos', self.ns)
+        anexos = root.find(self._t_anexos)
         if anexos is not None:
             md_parts.append(self._parse_anexos(anexos))
         
         return '\n'.join(md_parts), metadata
     
-    def _extract_metadata(self, root: ET.Element) -> Norm:
+    def _extract_metadata(self, root: ET.Element) -> NormRecord:
         """Extrae metadatos de la norma"""
-        identificador = root.find('bcn:Identificador', self.ns)
-        metadatos = root.find('bcn:Metadatos', self.ns)
+        identificador = root.find(self._t_identificador)
+        metadatos = root.find(self._t_metadatos)
         
         # Tipo y número
-        tipo_numero = identificador.find('.//bcn:TipoNumero', self.ns)
-        tipo = tipo_numero.find('bcn:Tipo', self.ns).text
-        numero = tipo_numero.find('bcn:Numero', self.ns).text
+        if self.backend == "lxml":
+            tipo_numero = next(iter(self._xp_tipo_numero(root)), None)
+            organismos_elem = self._xp_organismos(root)
+            materias_elem = self._xp_materias(root)
+        else:
+            tipo_numero = next(identificador.iter(self._t_tipo_numero), None)
+            organismos_elem = identificador.iter(self._t_organismo)
+            materias_elem = metadatos.iter(self._t_materia)
+
+        tipo = tipo_numero.find(self._t_tipo).text
+        numero = tipo_numero.find(self._t_numero).text
         
         # Organismos
-        organismos = [
-            org.text for org in identificador.findall('.//bcn:Organismo', self.ns)
-        ]
+        organismos = [org.text for org in organismos_elem]
         
         # Fechas
         fecha_pub = identificador.get('fechaPublicacion')
         fecha_prom = identificador.get('fechaPromulgacion')
+        fecha_version = root.get('fechaVersion')
         
         # Título
-        titulo = metadatos.find('bcn:TituloNorma', self.ns).text
+        titulo = metadatos.find(self._t_titulo_norma).text
         
         # Materias
-        materias = [
-            mat.text for mat in metadatos.findall('.//bcn:Materia', self.ns)
-        ]
+        materias = [mat.text for mat in materias_elem]
         
-        return Norm(
+        return NormRecord(
             norma_id=int(root.get('normaId')),
             tipo=tipo,
             numero=numero,
@@ -101,10 +498,11 @@ class BCNXMLParser:
             organismos=organismos,
             derogado=root.get('derogado') == 'derogado',
             es_tratado=root.get('esTratado') == 'tratado',
-            materias=materias
+            materias=materias,
+            fecha_version=self._parse_date(fecha_version)
         )
     
-    def _format_info_basica(self, metadata: Norm) -> str:
+    def _format_info_basica(self, metadata: NormRecord) -> str:
         """Formatea la información básica como Markdown"""
         lines = ["\n## Información Básica\n"]
         
@@ -130,7 +528,7 @@ class BCNXMLParser:
     
     def _parse_encabezado(self, encabezado: ET.Element) -> str:
         """Parsea el encabezado de la norma"""
-        texto = encabezado.find('bcn:Texto', self.ns)
+        texto = encabezado.find(self._t_texto)
         if texto is not None and texto.text:
             return f"\n## Encabezado\n\n{self._clean_text(texto.text)}\n"
         return ""
@@ -139,22 +537,49 @@ class BCNXMLParser:
         """Parsea las estructuras funcionales (articulado) recursivamente"""
         md_parts = []
         
-        for estructura in estructuras.findall('bcn:EstructuraFuncional', self.ns):
+        for estructura in estructuras.findall(self._t_estructura):
             md_parts.append(self._parse_estructura(estructura, level))
         
         return '\n'.join(md_parts)
     
     def _parse_estructura(self, estructura: ET.Element, level: int) -> str:
         """Parsea una estructura funcional individual"""
-        md_parts = []
+        # Una sola pasada por los hijos en vez de un find() por cada uno: con
+        # lxml cada find() pasa por ElementPath en Python. Se conserva el
+        # primero de cada tag, como find().
+        metadatos = texto = sub_estructuras = None
+        for hijo in estructura:
+            tag = hijo.tag
+            if tag == self._t_metadatos:
+                if metadatos is None:
+                    metadatos = hijo
+            elif tag == self._t_texto:
+                if texto is None:
+                    texto = hijo
+            elif tag == self._t_estructuras:
+                if sub_estructuras is None:
+                    sub_estructuras = hijo
+
+        md_parts = self._cabecera_estructura(estructura, metadatos, texto, level)
         
-        tipo_parte = estructura.get('tipoParte')
-        metadatos = estructura.find('bcn:Metadatos', self.ns)
+        # Sub-estructuras (recursivo)
+        if sub_estructuras is not None:
+            md_parts.append(self._parse_estructuras(sub_estructuras, level + 1))
         
+        return '\n'.join(md_parts)
+
+    def _cabecera_estructura(self, estructura, metadatos, texto, level: int) -> List[str]:
+        """Partes Markdown de una estructura sin sus sub-estructuras (título, texto, estado)"""
+        md_parts = []
+
         # Título de la parte
         if metadatos is not None:
-            nombre = metadatos.find('bcn:NombreParte', self.ns)
-            titulo = metadatos.find('bcn:TituloParte', self.ns)
+            nombre = titulo = None
+            for hijo in metadatos:
+                if hijo.tag == self._t_nombre_parte and nombre is None:
+                    nombre = hijo
+                elif hijo.tag == self._t_titulo_parte and titulo is None:
+                    titulo = hijo
             
             if nombre is not None and nombre.get('presente') == 'si':
                 md_parts.append(f"\n{'#' * level} {nombre.text}")
@@ -166,7 +591,6 @@ class BCNXMLParser:
                     md_parts.append(f"**{titulo.text}**")
         
         # Texto de la estructura
-        texto = estructura.find('bcn:Texto', self.ns)
         if texto is not None and texto.text:
             md_parts.append(f"\n{self._clean_text(texto.text)}")
         
@@ -177,16 +601,11 @@ class BCNXMLParser:
         if estructura.get('transitorio') == 'transitorio':
             md_parts.append("\n*[TRANSITORIO]*")
         
-        # Sub-estructuras (recursivo)
-        sub_estructuras = estructura.find('bcn:EstructurasFuncionales', self.ns)
-        if sub_estructuras is not None:
-            md_parts.append(self._parse_estructuras(sub_estructuras, level + 1))
-        
-        return '\n'.join(md_parts)
+        return md_parts
     
     def _parse_promulgacion(self, promulgacion: ET.Element) -> str:
         """Parsea la sección de promulgación"""
-        texto = promulgacion.find('bcn:Texto', self.ns)
+        texto = promulgacion.find(self._t_texto)
         if texto is not None and texto.text:
             return f"\n## Promulgación\n\n{self._clean_text(texto.text)}\n"
         return ""
@@ -195,17 +614,23 @@ class BCNXMLParser:
         """Parsea los anexos de la norma"""
         md_parts = ["\n## Anexos\n"]
         
-        for anexo in anexos_elem.findall('bcn:Anexo', self.ns):
-            metadatos = anexo.find('bcn:Metadatos', self.ns)
-            titulo = metadatos.find('bcn:Titulo', self.ns).text
-            
-            md_parts.append(f"\n### {titulo}\n")
-            
-            texto = anexo.find('bcn:Texto', self.ns)
-            if texto is not None and texto.text:
-                md_parts.append(self._clean_text(texto.text))
+        for anexo in anexos_elem.findall(self._t_anexo):
+            md_parts.extend(self._partes_anexo(anexo))
         
         return '\n'.join(md_parts)
+
+    def _partes_anexo(self, anexo: ET.Element) -> List[str]:
+        """Título y texto de un anexo individual"""
+        metadatos = anexo.find(self._t_metadatos)
+        titulo = metadatos.find(self._t_titulo).text
+
+        md_parts = [f"\n### {titulo}\n"]
+
+        texto = anexo.find(self._t_texto)
+        if texto is not None and texto.text:
+            md_parts.append(self._clean_text(texto.text))
+
+        return md_parts
     
     def _clean_text(self, text: str) -> str:
         """Limpia y formatea el texto"""
@@ -228,6 +653,288 @@ class BCNXMLParser:
             return None
 
 
+def _normalizar_item(item: ItemParseo) -> Tuple[Any, Union[str, bytes, os.PathLike]]:
+    if isinstance(item, os.PathLike):
+        ruta = Path(item)
+        return (int(ruta.stem) if ruta.stem.isdigit() else str(ruta)), ruta
+    return item
+
+
+def _en_lotes(items: Iterator, tamano: int) -> Iterator[List]:
+    while True:
+        lote = list(islice(items, tamano))
+        if not lote:
+            return
+        yield lote
+
+
+# Un parser por proceso worker, creado en el primer lote que recibe
+_parsers_worker = {}
+
+
+def _parsear_lote(
+    namespace: str, backend: str, lote: List, con_indice: bool = False
+) -> List[ResultadoParseo]:
+    """Corre en el worker: parsea un lote y devuelve resultados serializables."""
+    parser = _parsers_worker.get((namespace, backend))
+    if parser is None:
+        parser = _parsers_worker[(namespace, backend)] = BCNXMLParser(namespace, backend)
+
+    resultados = []
+    for id_norma, fuente in lote:
+        try:
+            if con_indice:
+                resultados.append((id_norma, *parser.parse_con_indice(fuente)))
+                continue
+            if isinstance(fuente, os.PathLike):
+                markdown, metadata = parser.parse_from_file(fuente)
+            else:
+                markdown, metadata = parser.parse_from_string(fuente)
+            resultados.append((id_norma, markdown, metadata))
+        except Exception as e:
+            logger.debug(f"Error parseando norma {id_norma}: {e}")
+            resultados.append((id_norma, None, e, None) if con_indice else (id_norma, None, e))
+    return resultados
+
+
+def _posicion_inicial(fuente: Union[str, bytes, os.PathLike, IO[bytes]]) -> Optional[int]:
+    """Desde dónde se puede volver a leer `fuente`; None si es un stream que no rebobina."""
+    if isinstance(fuente, (str, bytes, os.PathLike)):
+        return 0
+    if getattr(fuente, "seekable", lambda: False)():
+        return fuente.tell()
+    return None
+
+
+def _leer_trozos(
+    archivo: IO[bytes], cerrar: bool = False, tamano: int = TAMANO_TROZO
+) -> Iterator[bytes]:
+    try:
+        while True:
+            trozo = archivo.read(tamano)
+            if not trozo:
+                return
+            yield trozo
+    finally:
+        if cerrar:
+            archivo.close()
+
+
+class _EstructuraAbierta:
+    """Una EstructuraFuncional que render_markdown todavía no termina de escribir."""
+
+    __slots__ = (
+        "elem", "nivel", "metadatos", "texto", "partes", "tiene_sub", "inicio", "orden"
+    )
+
+    def __init__(self, elem, nivel: int, inicio: int, orden: Optional[int]):
+        self.elem = elem
+        self.nivel = nivel
+        self.metadatos = None
+        self.texto = None
+        self.partes: Optional[int] = None  # partes escritas; None = cabecera pendiente
+        self.tiene_sub = False
+        self.inicio = inicio  # offset en bytes donde empieza su Markdown
+        self.orden = orden  # posición reservada en el índice
+
+
+class _MarkdownStreaming:
+    """
+    Estado de BCNXMLParser.render_markdown mientras llegan los eventos.
+
+    Reproduce los joins de _parse_norma/_parse_estructuras/_parse_estructura
+    escribiendo el separador "\n" antes de cada parte que no es la primera de
+    su lista, en vez de armar las listas y unirlas al final. Igual que find()
+    se usa solo el primer hijo de cada tag; los siguientes se ignoran.
+    """
+
+    def __init__(
+        self, parser: BCNXMLParser, destino: TextIO, indice: Optional[List[Articulo]] = None
+    ):
+        self.p = parser
+        self.destino = destino
+        self.indice = indice
+        self.pos = 0  # bytes UTF-8 escritos; solo se cuentan si hay índice
+        self.metadata: Optional[NormRecord] = None
+        self.pila = []  # elementos abiertos, la raíz primero
+        self.estructuras: List[_EstructuraAbierta] = []
+        self.listas = []  # [elem EstructurasFuncionales, nivel, hijos escritos]
+        self.secciones = set()  # secciones de la raíz ya vistas
+        self.anexos = None
+        self.ignorar = None  # subárbol que find() no habría visitado
+
+    def _escribir(self, texto: str) -> None:
+        self.destino.write(texto)
+        if self.indice is not None:
+            self.pos += len(texto) if texto.isascii() else len(texto.encode("utf-8"))
+
+    def procesar(self, eventos) -> None:
+        for evento, elem in eventos:
+            if evento == "start":
+                self.pila.append(elem)
+                if self.ignorar is None:
+                    self._inicio(elem)
+            else:
+                if self.ignorar is None:
+                    self._fin(elem)
+                elif self.ignorar is elem:
+                    self.ignorar = None
+                self.pila.pop()
+
+    def _inicio(self, elem) -> None:
+        if len(self.pila) == 1:
+            return
+
+        p = self.p
+        tag = elem.tag
+        padre = self.pila[-2]
+
+        if padre is self.pila[0]:
+            if tag not in (p._t_encabezado, p._t_estructuras, p._t_promulgacion, p._t_anexos):
+                return
+            if tag in self.secciones:
+                self.ignorar = elem
+                return
+            self.secciones.add(tag)
+            self._escribir_cabecera()
+            if tag == p._t_estructuras:
+                self._escribir("\n")
+                self.listas.append([elem, 2, 0])
+            elif tag == p._t_anexos:
+                self._escribir("\n\n## Anexos\n")
+                self.anexos = elem
+
+        elif tag == p._t_estructura and self.listas and padre is self.listas[-1][0]:
+            lista = self.listas[-1]
+            if lista[2]:
+                self._escribir("\n")
+            lista[2] += 1
+            orden = None
+            if self.indice is not None:
+                # Se reserva el lugar: la contenedora queda antes que sus hijas
+                orden = len(self.indice)
+                self.indice.append(None)
+            self.estructuras.append(_EstructuraAbierta(elem, lista[1], self.pos, orden))
+
+        elif tag == p._t_estructuras and self.estructuras and padre is self.estructuras[-1].elem:
+            estructura = self.estructuras[-1]
+            if estructura.tiene_sub:
+                self.ignorar = elem
+                return
+            estructura.tiene_sub = True
+            self._escribir_estructura(estructura)
+            if estructura.partes:
+                self._escribir("\n")
+            self.listas.append([elem, estructura.nivel + 1, 0])
+
+    def _fin(self, elem) -> None:
+        if len(self.pila) == 1:
+            self._escribir_cabecera()
+            return
+
+        p = self.p
+        tag = elem.tag
+        padre = self.pila[-2]
+
+        if self.listas and elem is self.listas[-1][0]:
+            self.listas.pop()
+
+        elif self.estructuras and elem is self.estructuras[-1].elem:
+            estructura = self.estructuras.pop()
+            if estructura.partes is None:
+                self._escribir_estructura(estructura)
+            if self.indice is not None:
+                self.indice[estructura.orden] = self._articulo(estructura)
+            padre.remove(elem)
+
+        elif self.estructuras and padre is self.estructuras[-1].elem:
+            estructura = self.estructuras[-1]
+            if tag == p._t_texto and estructura.texto is None:
+                self._verificar_orden(estructura)
+                estructura.texto = elem
+            elif tag == p._t_metadatos and estructura.metadatos is None:
+                self._verificar_orden(estructura)
+                estructura.metadatos = elem
+
+        elif padre is self.anexos and tag == p._t_anexo:
+            self._escribir("\n" + "\n".join(p._partes_anexo(elem)))
+            padre.remove(elem)
+
+        elif padre is self.pila[0]:
+            if tag == p._t_encabezado:
+                self._escribir("\n" + p._parse_encabezado(elem))
+                padre.remove(elem)
+            elif tag == p._t_promulgacion:
+                self._escribir("\n" + p._parse_promulgacion(elem))
+                padre.remove(elem)
+
+    def _escribir_cabecera(self) -> None:
+        if self.metadata is not None:
+            return
+        raiz = self.pila[0]
+        if len(self.pila) > 1 and (
+            raiz.find(self.p._t_identificador) is None or raiz.find(self.p._t_metadatos) is None
+        ):
+            raise ValueError(
+                "Norma con Identificador o Metadatos después del contenido: "
+                "no se puede renderizar en streaming"
+            )
+        self.metadata = self.p._extract_metadata(self.pila[0])
+        self._escribir(
+            f"# {self.metadata.titulo}\n" + "\n" + self.p._format_info_basica(self.metadata)
+        )
+
+    def _escribir_estructura(self, estructura: _EstructuraAbierta) -> None:
+        partes = self.p._cabecera_estructura(
+            estructura.elem, estructura.metadatos, estructura.texto, estructura.nivel
+        )
+        self._escribir("\n".join(partes))
+        estructura.partes = len(partes)
+
+    def _articulo(self, estructura: _EstructuraAbierta) -> Articulo:
+        elem = estructura.elem
+        nombre, titulo = self._nombre_y_titulo(estructura)
+        ruta = []
+        for contenedora in self.estructuras:
+            nombre_c, titulo_c = self._nombre_y_titulo(contenedora)
+            tipo_c = contenedora.elem.get('tipoParte')
+            ruta.append(
+                f"{tipo_c} {nombre_c}" if nombre_c and tipo_c else nombre_c or titulo_c or tipo_c or "?"
+            )
+        return Articulo(
+            orden=estructura.orden,
+            tipo_parte=elem.get('tipoParte'),
+            id_parte=elem.get('idParte'),
+            nombre=nombre,
+            titulo=titulo,
+            nivel=estructura.nivel,
+            ruta=" > ".join(ruta),
+            derogado=elem.get('derogado') == 'derogado',
+            transitorio=elem.get('transitorio') == 'transitorio',
+            inicio=estructura.inicio,
+            fin=self.pos,
+        )
+
+    def _nombre_y_titulo(self, estructura: _EstructuraAbierta) -> Tuple[Optional[str], Optional[str]]:
+        """Texto de NombreParte y TituloParte con los espacios normalizados."""
+        nombre = titulo = None
+        if estructura.metadatos is not None:
+            for hijo in estructura.metadatos:
+                if hijo.tag == self.p._t_nombre_parte and nombre is None:
+                    nombre = " ".join((hijo.text or "").split()) or None
+                elif hijo.tag == self.p._t_titulo_parte and titulo is None:
+                    titulo = " ".join((hijo.text or "").split()) or None
+        return nombre, titulo
+
+    @staticmethod
+    def _verificar_orden(estructura: _EstructuraAbierta) -> None:
+        if estructura.partes is not None:
+            raise ValueError(
+                "EstructuraFuncional con Texto o Metadatos después de sus "
+                "sub-estructuras: no se puede renderizar en streaming"
+            )
+
+
 # Ejemplo de uso
 if __name__ == "__main__":
     parser = BCNXMLParser()
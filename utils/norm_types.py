@@ -1,11 +1,14 @@
 from datetime import date
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from pydantic import BaseModel
 
 
 class Norm(BaseModel):
-    """Metadatos extraídos de una norma BCN."""
+    """
+    Metadatos extraídos de una norma BCN, como modelo Pydantic para las
+    respuestas de la API. El parser entrega NormRecord (NormRecord.to_model()).
+    """
 
     norma_id: int
     tipo: str
@@ -17,23 +20,154 @@ class Norm(BaseModel):
     derogado: bool
     es_tratado: bool
     materias: List[str]
+    fecha_version: Optional[date] = None  # Última versión del texto según la BCN
 
-    def to_parsed_data(self) -> Dict[str, Any]:
-        """Convierte el modelo al dict que esperan NormsManager y MetadataManager."""
-        return {
-            "numero": self.numero,
-            "titulo": self.titulo,
-            "estado": "derogada" if self.derogado else "vigente",
-            "fecha_publicacion": self.fecha_publicacion,
-            "fecha_promulgacion": self.fecha_promulgacion,
-            "organismo": self.organismos[0] if self.organismos else None,
-            "contenido_texto": None,
-            # campos para MetadataManager
-            "materias": self.materias,
-            "organismos": self.organismos,
-            "derogado": self.derogado,
-            "es_tratado": self.es_tratado,
-        }
+    def to_parsed_data(self, contenido_texto: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Convierte el modelo al dict que esperan NormsManager y MetadataManager.
+        contenido_texto es el texto plano de la norma (norm_parser.texto_plano).
+        """
+        return _parsed_data(self, contenido_texto)
+
+
+class _Registro:
+    """
+    Base de los registros internos: atributos en __slots__, sin validación
+    ni coerción. Son los que circulan por el parser, el sync y el pipe de
+    parse_many; los modelos Pydantic se construyen solo en el borde de la API.
+    """
+
+    __slots__ = ()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, c) == getattr(other, c) for c in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        campos = ", ".join(f"{c}={getattr(self, c)!r}" for c in self.__slots__)
+        return f"{type(self).__name__}({campos})"
+
+
+class NormRecord(_Registro):
+    """Metadatos de una norma BCN tal como los entrega BCNXMLParser; ver Norm."""
+
+    __slots__ = (
+        "norma_id",
+        "tipo",
+        "numero",
+        "titulo",
+        "fecha_publicacion",
+        "fecha_promulgacion",
+        "organismos",
+        "derogado",
+        "es_tratado",
+        "materias",
+        "fecha_version",
+    )
+
+    def __init__(
+        self,
+        norma_id: int,
+        tipo: str,
+        numero: str,
+        titulo: str,
+        fecha_publicacion: Optional[date],
+        fecha_promulgacion: Optional[date],
+        organismos: List[str],
+        derogado: bool,
+        es_tratado: bool,
+        materias: List[str],
+        fecha_version: Optional[date] = None,
+    ):
+        self.norma_id = norma_id
+        self.tipo = tipo
+        self.numero = numero
+        self.titulo = titulo
+        self.fecha_publicacion = fecha_publicacion
+        self.fecha_promulgacion = fecha_promulgacion
+        self.organismos = organismos
+        self.derogado = derogado
+        self.es_tratado = es_tratado
+        self.materias = materias
+        self.fecha_version = fecha_version
+
+    def to_parsed_data(self, contenido_texto: Optional[str] = None) -> Dict[str, Any]:
+        """Igual que Norm.to_parsed_data, sin pasar por Pydantic."""
+        return _parsed_data(self, contenido_texto)
+
+    def to_model(self) -> Norm:
+        """Modelo Pydantic para respuestas de la API."""
+        return Norm(**self.as_dict())
+
+
+class Articulo(_Registro):
+    """Una EstructuraFuncional (artículo, título, párrafo...) y su ubicación en el Markdown."""
+
+    __slots__ = (
+        "orden",  # posición en el documento, la parte contenedora antes que sus hijas
+        "tipo_parte",  # atributo tipoParte: "Artículo", "Título", "Párrafo"...
+        "id_parte",
+        "nombre",  # NombreParte, p. ej. "14" o "1 bis"
+        "titulo",  # TituloParte
+        "nivel",  # nivel de encabezado Markdown (2 = estructura de primer nivel)
+        "ruta",  # partes contenedoras, p. ej. "Título II > Párrafo 1º Normas generales"
+        "derogado",
+        "transitorio",
+        "inicio",  # offsets en bytes (UTF-8) dentro del Markdown, [inicio, fin)
+        "fin",
+    )
+
+    def __init__(
+        self,
+        orden: int,
+        tipo_parte: Optional[str],
+        id_parte: Optional[str],
+        nombre: Optional[str],
+        titulo: Optional[str],
+        nivel: int,
+        ruta: str,
+        derogado: bool,
+        transitorio: bool,
+        inicio: int,
+        fin: int,
+    ):
+        self.orden = orden
+        self.tipo_parte = tipo_parte
+        self.id_parte = id_parte
+        self.nombre = nombre
+        self.titulo = titulo
+        self.nivel = nivel
+        self.ruta = ruta
+        self.derogado = derogado
+        self.transitorio = transitorio
+        self.inicio = inicio
+        self.fin = fin
+
+
+def _parsed_data(
+    norma: Union[Norm, NormRecord], contenido_texto: Optional[str]
+) -> Dict[str, Any]:
+    return {
+        "numero": norma.numero,
+        "titulo": norma.titulo,
+        "estado": "derogada" if norma.derogado else "vigente",
+        "fecha_publicacion": norma.fecha_publicacion,
+        "fecha_promulgacion": norma.fecha_promulgacion,
+        "fecha_version": norma.fecha_version,
+        "organismo": norma.organismos[0] if norma.organismos else None,
+        "contenido_texto": contenido_texto,
+        # campos para MetadataManager
+        "materias": norma.materias,
+        "organismos": norma.organismos,
+        "derogado": norma.derogado,
+        "es_tratado": norma.es_tratado,
+    }
 
 
 class NormResponse(BaseModel):
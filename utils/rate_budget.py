@@ -0,0 +1,229 @@
+"""
+Presupuesto de requests a la BCN compartido entre procesos.
+
+Cada proceso (schedulers, CLI, workers de la API) tiene su propio
+RateLimiter; sin coordinación diez schedulers que arrancan a la misma hora
+mandan diez veces la tasa prevista y la BCN los limita a todos. El
+presupuesto fija una tasa TOTAL para el nodo (BCN_RATE_TOTAL, req/s) y la
+reparte en partes iguales entre los consumidores activos:
+
+    - Cada consumidor (host:pid) avanza su propio turno cada
+      n_activos / tasa_total segundos, así la suma nunca supera la tasa total
+      y ninguno acapara el presupuesto aunque tenga más requests en vuelo.
+    - Un consumidor que no pidió turno en `ventana_actividad` segundos deja
+      de contar y su parte se reparte entre el resto.
+    - Un rechazo (429/5xx) visto por cualquier consumidor pone a todos en
+      backoff: la BCN limita por IP, no por proceso.
+
+El estado vive en un JSON protegido con FileLock (un nodo) o en una fila de
+Postgres bloqueada con SELECT ... FOR UPDATE (varios nodos detrás de la misma
+IP). Se configura con BCN_RATE_TOTAL y BCN_RATE_BACKEND (file | postgres).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from utils.file_lock import FileLock
+
+
+class PresupuestoCompartido:
+    """Base: la lógica de turnos; las subclases solo guardan el estado."""
+
+    backend = "base"
+
+    def __init__(self, tasa_total: float, ventana_actividad: float = 10.0):
+        self.tasa_total = tasa_total
+        self.ventana_actividad = ventana_actividad
+
+    @property
+    def consumidor(self) -> str:
+        # Se calcula en cada uso: los workers creados con fork heredan la instancia
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    @contextmanager
+    def _estado(self) -> Iterator[Dict]:
+        """Entrega el estado bloqueado para los demás procesos y lo guarda al salir."""
+        raise NotImplementedError
+
+    def reservar(self) -> float:
+        """Reserva el próximo turno de este consumidor; devuelve cuántos segundos esperar."""
+        with self._estado() as estado:
+            ahora = time.time()
+            consumidores = {
+                nombre: datos
+                for nombre, datos in estado.get("consumidores", {}).items()
+                if datos["ultimo_uso"] >= ahora - self.ventana_actividad
+            }
+            propio = consumidores.get(self.consumidor, {"proximo_turno": 0.0})
+            consumidores[self.consumidor] = propio
+
+            intervalo = len(consumidores) / self.tasa_total
+            inicio = max(ahora, propio["proximo_turno"], estado.get("backoff_hasta", 0.0))
+            propio["proximo_turno"] = inicio + intervalo
+            propio["ultimo_uso"] = ahora
+
+            estado["consumidores"] = consumidores
+            return inicio - ahora
+
+    def backoff(self, segundos: float) -> None:
+        """Pone a todos los consumidores en espera (la BCN rechazó una request)."""
+        with self._estado() as estado:
+            estado["backoff_hasta"] = max(estado.get("backoff_hasta", 0.0), time.time() + segundos)
+
+    def info(self) -> Dict:
+        with self._estado() as estado:
+            ahora = time.time()
+            activos = [
+                datos
+                for datos in estado.get("consumidores", {}).values()
+                if datos["ultimo_uso"] >= ahora - self.ventana_actividad
+            ]
+            return {
+                "backend": self.backend,
+                "tasa_total": self.tasa_total,
+                "consumidores": len(activos),
+                "tasa_por_consumidor": self.tasa_total / max(1, len(activos)),
+            }
+
+    def close(self) -> None:
+        pass
+
+
+class PresupuestoArchivo(PresupuestoCompartido):
+    """Estado en un JSON pequeño; el lock de archivo serializa a los procesos del nodo."""
+
+    backend = "file"
+
+    def __init__(self, path: Path, tasa_total: float, ventana_actividad: float = 10.0):
+        super().__init__(tasa_total, ventana_actividad)
+        self.path = Path(path)
+        self._lock_path = self.path.with_suffix(".lock")
+        # FileLock no es reentrante: los threads del proceso se serializan antes
+        self._mutex = threading.Lock()
+
+    @contextmanager
+    def _estado(self) -> Iterator[Dict]:
+        with self._mutex, FileLock(self._lock_path):
+            try:
+                estado = json.loads(self.path.read_text())
+            except (FileNotFoundError, ValueError):
+                estado = {}
+
+            yield estado
+
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(estado))
+            os.replace(tmp, self.path)
+
+
+class PresupuestoPostgres(PresupuestoCompartido):
+    """Estado en una fila de Postgres, para varios nodos que comparten IP de salida."""
+
+    backend = "postgres"
+
+    def __init__(
+        self,
+        tasa_total: float,
+        nombre: str = "bcn",
+        db_connection=None,
+        ventana_actividad: float = 10.0,
+    ):
+        super().__init__(tasa_total, ventana_actividad)
+        self.nombre = nombre
+        self._mutex = threading.Lock()
+
+        if db_connection:
+            self.conn = db_connection
+        else:
+            import psycopg2
+
+            self.conn = psycopg2.connect(
+                host=os.getenv("POSTGRES_HOST", "localhost"),
+                port=os.getenv("POSTGRES_PORT", 5432),
+                database=os.getenv("POSTGRES_DB", "bcn_normas"),
+                user=os.getenv("POSTGRES_USER", "bcn_user"),
+                password=os.getenv("POSTGRES_PASSWORD", "bcn_password"),
+            )
+
+        self.ensure_table()
+
+    def ensure_table(self) -> None:
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS bcn_presupuesto (
+                nombre  VARCHAR(50) PRIMARY KEY,
+                estado  JSONB NOT NULL DEFAULT '{}'::jsonb
+            );
+            """
+        )
+        cursor.execute(
+            "INSERT INTO bcn_presupuesto (nombre) VALUES (%s) ON CONFLICT DO NOTHING",
+            (self.nombre,),
+        )
+        self.conn.commit()
+        cursor.close()
+
+    @contextmanager
+    def _estado(self) -> Iterator[Dict]:
+        with self._mutex:
+            cursor = self.conn.cursor()
+            try:
+                cursor.execute(
+                    "SELECT estado FROM bcn_presupuesto WHERE nombre = %s FOR UPDATE",
+                    (self.nombre,),
+                )
+                estado = cursor.fetchone()[0] or {}
+
+                yield estado
+
+                cursor.execute(
+                    "UPDATE bcn_presupuesto SET estado = %s WHERE nombre = %s",
+                    (json.dumps(estado), self.nombre),
+                )
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+_presupuestos: Dict[str, PresupuestoCompartido] = {}
+_presupuestos_lock = threading.Lock()
+
+
+def presupuesto_del_nodo(cache_dir: Path) -> Optional[PresupuestoCompartido]:
+    """
+    Presupuesto configurado por entorno, o None si BCN_RATE_TOTAL no está
+    definido. Se comparte una sola instancia por proceso.
+    """
+    tasa_total = os.getenv("BCN_RATE_TOTAL")
+    if not tasa_total or float(tasa_total) <= 0:
+        return None
+
+    backend = os.getenv("BCN_RATE_BACKEND", "file").lower()
+    clave = f"{backend}:{Path(cache_dir).resolve()}"
+
+    with _presupuestos_lock:
+        if clave not in _presupuestos:
+            if backend == "postgres":
+                _presupuestos[clave] = PresupuestoPostgres(float(tasa_total))
+            elif backend == "file":
+                _presupuestos[clave] = PresupuestoArchivo(
+                    Path(cache_dir) / "locks" / "presupuesto.json", float(tasa_total)
+                )
+            else:
+                raise ValueError(f"BCN_RATE_BACKEND desconocido: {backend!r} (file | postgres)")
+        return _presupuestos[clave]
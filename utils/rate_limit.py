@@ -0,0 +1,269 @@
+"""
+Limitadores de tasa para las requests a la BCN.
+
+RateLimiter      → tasa fija (equivale al antiguo rate_limit_delay)
+AIMDRateLimiter  → tasa adaptativa: sube de a poco mientras la BCN responde
+                   rápido y con 2xx, y se reduce a la mitad ante 429/5xx,
+                   timeouts o latencia creciente.
+
+Ambos son token buckets implementados como GCRA (cada request reserva el
+siguiente turno libre) y sirven tanto para el cliente síncrono (acquire)
+como para el asíncrono (acquire_async). Los clientes informan cada respuesta
+con feedback(); ante un rechazo el limitador entra en backoff respetando
+Retry-After cuando la BCN lo envía.
+
+Con un `presupuesto` (utils/rate_budget.py) cada turno además se descuenta de
+la tasa total compartida por todos los procesos del nodo.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Dict, Optional
+
+if TYPE_CHECKING:
+    from utils.rate_budget import PresupuestoCompartido
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Convierte un header Retry-After (segundos o fecha HTTP) en segundos de espera."""
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        fecha = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return max(0.0, (fecha - datetime.now(timezone.utc)).total_seconds())
+
+
+def es_rechazo(status: Optional[int]) -> bool:
+    """True si la respuesta indica que la BCN está saturada o caída (None = sin respuesta)."""
+    return status is None or status == 429 or status >= 500
+
+
+class RateLimiter:
+    """Token bucket de tasa fija con backoff exponencial ante rechazos."""
+
+    modo = "fijo"
+
+    def __init__(
+        self,
+        delay: float = 0.5,
+        capacidad: int = 1,
+        backoff_base: float = 0.5,
+        backoff_max: float = 60.0,
+        presupuesto: Optional["PresupuestoCompartido"] = None,
+    ):
+        self.tasa = 1 / delay if delay > 0 else float("inf")
+        self.capacidad = capacidad
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.presupuesto = presupuesto
+
+        self._lock = threading.Lock()
+        self._proximo_turno = 0.0
+        self._backoff_hasta = 0.0
+        self._rechazos_consecutivos = 0
+
+    def _intervalo(self) -> float:
+        return 0.0 if self.tasa == float("inf") else 1 / self.tasa
+
+    def _reservar(self) -> float:
+        """Reserva un turno y devuelve cuántos segundos hay que esperar para usarlo."""
+        with self._lock:
+            ahora = time.monotonic()
+            intervalo = self._intervalo()
+            # Con capacidad > 1 se permite una ráfaga de hasta `capacidad` requests
+            inicio = max(
+                ahora - (self.capacidad - 1) * intervalo,
+                self._proximo_turno,
+                self._backoff_hasta,
+            )
+            self._proximo_turno = inicio + intervalo
+            espera = max(0.0, inicio - ahora)
+
+        if self.presupuesto is not None:
+            espera = max(espera, self.presupuesto.reservar())
+        return espera
+
+    def acquire(self) -> None:
+        espera = self._reservar()
+        if espera > 0:
+            time.sleep(espera)
+
+    async def acquire_async(self) -> None:
+        # Con presupuesto compartido la reserva toma un file lock y lee y
+        # escribe su JSON: se hace en un thread para no frenar el event loop
+        if self.presupuesto is None:
+            espera = self._reservar()
+        else:
+            espera = await asyncio.to_thread(self._reservar)
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+    def feedback(
+        self,
+        status: Optional[int],
+        latencia: float,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        """
+        Informa el resultado de una request.
+
+        Args:
+            status:      Código HTTP, o None si hubo timeout/error de conexión.
+            latencia:    Segundos que tardó la respuesta.
+            retry_after: Segundos indicados por el header Retry-After, si vino.
+        """
+        with self._lock:
+            if es_rechazo(status):
+                self._rechazos_consecutivos += 1
+                if retry_after is not None:
+                    backoff = min(retry_after, self.backoff_max)
+                else:
+                    backoff = min(
+                        self.backoff_max,
+                        self.backoff_base * 2 ** (self._rechazos_consecutivos - 1),
+                    )
+                self._backoff_hasta = max(self._backoff_hasta, time.monotonic() + backoff)
+                self._on_rechazo()
+                motivo = f"HTTP {status}" if status is not None else "sin respuesta"
+                logger.warning(
+                    f"BCN rechazó la request ({motivo}) — backoff {backoff:.1f}s, "
+                    f"tasa {self.tasa:.2f} req/s"
+                )
+            else:
+                self._rechazos_consecutivos = 0
+                self._on_respuesta(status, latencia)
+                return
+
+        # La BCN limita por IP: el resto de los procesos del nodo también espera
+        if self.presupuesto is not None:
+            self.presupuesto.backoff(backoff)
+
+    def _on_rechazo(self) -> None:
+        pass
+
+    def _on_respuesta(self, status: int, latencia: float) -> None:
+        pass
+
+    def estado(self) -> Dict:
+        """Estado actual del limitador, para mostrar en el progreso del sync."""
+        with self._lock:
+            backoff_restante = max(0.0, self._backoff_hasta - time.monotonic())
+            return {
+                "modo": self.modo,
+                "tasa": self.tasa,
+                "en_backoff": backoff_restante > 0,
+                "backoff_restante": backoff_restante,
+                "rechazos_consecutivos": self._rechazos_consecutivos,
+            }
+
+
+class AIMDRateLimiter(RateLimiter):
+    """
+    Token bucket con tasa adaptativa (additive increase, multiplicative decrease).
+
+    - 2xx/304 con latencia normal       → tasa += incremento (hasta tasa_max).
+    - 429/5xx/timeout                   → tasa *= factor (hasta tasa_min) + backoff.
+    - Latencia > umbral_latencia × base → tasa *= factor, como señal temprana de
+                                          saturación antes de que lleguen los 429.
+
+    La latencia base es la mínima media móvil observada. Las reducciones por
+    latencia se aplican como máximo una vez por ventana_reduccion segundos para
+    no desplomar la tasa con una sola racha lenta.
+    """
+
+    modo = "aimd"
+
+    def __init__(
+        self,
+        tasa_inicial: float = 2.0,
+        tasa_min: float = 0.2,
+        tasa_max: float = 8.0,
+        incremento: float = 0.05,
+        factor: float = 0.5,
+        umbral_latencia: float = 2.0,
+        ventana_reduccion: float = 5.0,
+        capacidad: int = 1,
+        backoff_base: float = 0.5,
+        backoff_max: float = 60.0,
+        presupuesto: Optional["PresupuestoCompartido"] = None,
+    ):
+        super().__init__(
+            delay=1 / tasa_inicial,
+            capacidad=capacidad,
+            backoff_base=backoff_base,
+            backoff_max=backoff_max,
+            presupuesto=presupuesto,
+        )
+        self.tasa_min = tasa_min
+        self.tasa_max = tasa_max
+        self.incremento = incremento
+        self.factor = factor
+        self.umbral_latencia = umbral_latencia
+        self.ventana_reduccion = ventana_reduccion
+
+        self._latencia_media: Optional[float] = None
+        self._latencia_base: Optional[float] = None
+        self._ultima_reduccion = 0.0
+        self.reducciones = 0
+
+    def _reducir(self) -> None:
+        self.tasa = max(self.tasa_min, self.tasa * self.factor)
+        self._ultima_reduccion = time.monotonic()
+        self.reducciones += 1
+
+    def _on_rechazo(self) -> None:
+        self._reducir()
+
+    def _on_respuesta(self, status: int, latencia: float) -> None:
+        # Media móvil exponencial de la latencia
+        if self._latencia_media is None:
+            self._latencia_media = latencia
+        else:
+            self._latencia_media = 0.8 * self._latencia_media + 0.2 * latencia
+
+        if self._latencia_base is None or self._latencia_media < self._latencia_base:
+            self._latencia_base = self._latencia_media
+
+        lenta = self._latencia_media > self._latencia_base * self.umbral_latencia
+        if lenta:
+            if time.monotonic() - self._ultima_reduccion >= self.ventana_reduccion:
+                self._reducir()
+                logger.info(
+                    f"Latencia BCN en aumento ({self._latencia_media:.2f}s) — "
+                    f"tasa reducida a {self.tasa:.2f} req/s"
+                )
+            return
+
+        # 2xx y 304 (revalidación sin cuerpo) cuentan como respuestas sanas
+        if 200 <= status < 400:
+            self.tasa = min(self.tasa_max, self.tasa + self.incremento)
+
+    def estado(self) -> Dict:
+        estado = super().estado()
+        estado.update(
+            {
+                "tasa_min": self.tasa_min,
+                "tasa_max": self.tasa_max,
+                "reducciones": self.reducciones,
+                "latencia_media": self._latencia_media,
+            }
+        )
+        return estado